@@ -2,389 +2,12 @@
 Secure Voice Media Controller - IMPROVED VERSION
 Enhanced microphone sensitivity for better distance detection
 Two-layer security: Startup password + Wake word
+Launcher kept for the old name; same as: python -m voice_assistant secure
 """
 
-import speech_recognition as sr
-from pynput.keyboard import Key, Controller
-import time
-import json
-import os
-import hashlib
-
-keyboard = Controller()
-recognizer = sr.Recognizer()
-
-# IMPROVED MICROPHONE SETTINGS FOR DISTANCE
-recognizer.energy_threshold = 200  # Lower = more sensitive (was 400)
-recognizer.dynamic_energy_threshold = True  # Adapts to ambient noise
-recognizer.dynamic_energy_adjustment_damping = 0.15
-recognizer.dynamic_energy_ratio = 1.5
-recognizer.pause_threshold = 0.8  # How long to wait for speech
-
-WAKE_WORD = "computer"
-ACTIVE_SESSION_DURATION = 60
-PASSWORD_FILE = "voice_password.json"
-MAX_PASSWORD_ATTEMPTS = 3
-
-session_active = False
-last_command_time = 0
-program_unlocked = False
-
-
-def adjust_microphone_for_distance(source, duration=1.5):
-    """
-    Enhanced microphone adjustment for better distance detection
-    """
-    print("Calibrating microphone for room acoustics...")
-
-    # Longer calibration for better ambient noise filtering
-    recognizer.adjust_for_ambient_noise(source, duration=duration)
-
-    # Additional boost for distance
-    if hasattr(source, 'CHUNK'):
-        source.CHUNK = 2048  # Larger chunks for better capture
-
-
-def setup_password():
-    """Set up the startup voice password"""
-    print("=" * 60)
-    print("STARTUP PASSWORD SETUP")
-    print("=" * 60)
-    print("Choose a secret password phrase.")
-    print("Example: 'open sesame', 'alpha gamma', 'my secret code'")
-    print("Use 2-3 words that are easy to remember.")
-    print("=" * 60)
-
-    while True:
-        with sr.Microphone() as source:
-            print("\nSay your new password...")
-            adjust_microphone_for_distance(source)
-
-            try:
-                # Longer timeout for distance speaking
-                audio = recognizer.listen(source, timeout=10, phrase_time_limit=5)
-                password_text = recognizer.recognize_google(audio).lower()
-
-                print(f"You said: '{password_text}'")
-                print("\nSay it again to confirm...")
-
-                adjust_microphone_for_distance(source, duration=1.0)
-                confirm_audio = recognizer.listen(source, timeout=10, phrase_time_limit=5)
-                confirm_text = recognizer.recognize_google(confirm_audio).lower()
-
-                if password_text == confirm_text:
-                    password_hash = hashlib.sha256(password_text.encode()).hexdigest()
-
-                    with open(PASSWORD_FILE, 'w') as f:
-                        json.dump({
-                            'password_hash': password_hash,
-                            'password_hint': password_text[:3] + "..."
-                        }, f)
-
-                    print("\n" + "=" * 60)
-                    print("PASSWORD SET SUCCESSFULLY")
-                    print("=" * 60)
-                    print(f"Hint: {password_text[:3]}...")
-                    print("Remember this password.")
-                    print("=" * 60)
-
-                    return password_text
-                else:
-                    print("Passwords do not match. Try again.")
-                    print(f"First: '{password_text}'")
-                    print(f"Second: '{confirm_text}'")
-
-            except sr.WaitTimeoutError:
-                print("Timeout - no speech detected. Speak louder or move closer.")
-            except sr.UnknownValueError:
-                print("Could not understand. Speak more clearly.")
-            except sr.RequestError:
-                print("Network error. Check internet connection.")
-            except Exception as e:
-                print(f"Error: {e}")
-
-
-def load_password():
-    """Load the saved password configuration"""
-    global program_unlocked
-
-    if not os.path.exists(PASSWORD_FILE):
-        print("No password found. First-time setup.")
-        setup_password()
-        return True
-
-    try:
-        with open(PASSWORD_FILE, 'r') as f:
-            data = json.load(f)
-
-        password_hint = data.get('password_hint', 'No hint')
-        print(f"Password hint: {password_hint}")
-        return True
-
-    except:
-        print("Error loading password file. Recreating...")
-        setup_password()
-        return True
-
-
-def verify_password(spoken_text):
-    """Verify the spoken password against stored hash"""
-    try:
-        with open(PASSWORD_FILE, 'r') as f:
-            data = json.load(f)
-
-        stored_hash = data.get('password_hash', '')
-        current_hash = hashlib.sha256(spoken_text.lower().encode()).hexdigest()
-
-        return current_hash == stored_hash
-
-    except:
-        return False
-
-
-def unlock_program():
-    """Unlock the program with voice password"""
-    global program_unlocked
-
-    if program_unlocked:
-        return True
-
-    print("\n" + "=" * 60)
-    print("PROGRAM LOCKED")
-    print("=" * 60)
-    print("Say the startup password to unlock.")
-
-    attempts = MAX_PASSWORD_ATTEMPTS
-
-    while attempts > 0:
-        with sr.Microphone() as source:
-            print(f"\nAttempts remaining: {attempts}")
-            print("Say password...")
-
-            try:
-                adjust_microphone_for_distance(source)
-
-                # Longer listening time for distance
-                audio = recognizer.listen(source, timeout=10, phrase_time_limit=5)
-                spoken_text = recognizer.recognize_google(audio)
-
-                print(f"You said: '{spoken_text}'")
-
-                if verify_password(spoken_text):
-                    program_unlocked = True
-                    print("\n" + "=" * 60)
-                    print("ACCESS GRANTED")
-                    print("=" * 60)
-                    print("Program unlocked.")
-                    print(f"Wake word: '{WAKE_WORD}'")
-                    print("=" * 60)
-                    return True
-                else:
-                    attempts -= 1
-                    if attempts > 0:
-                        print("Incorrect password. Try again.")
-                    else:
-                        print("Too many failed attempts.")
-                        return False
-
-            except sr.WaitTimeoutError:
-                attempts -= 1
-                print("Timeout. Speak louder or move closer.")
-            except sr.UnknownValueError:
-                attempts -= 1
-                print("Could not understand. Speak more clearly.")
-            except sr.RequestError:
-                print("Network error.")
-            except Exception as e:
-                attempts -= 1
-                print(f"Error: {e}")
-
-    return False
-
-
-def lock_program():
-    """Lock the program"""
-    global program_unlocked, session_active
-    program_unlocked = False
-    session_active = False
-    print("\n" + "=" * 60)
-    print("PROGRAM LOCKED")
-    print("=" * 60)
-
-
-def control_media(command):
-    """Execute media control commands"""
-    command = command.lower()
-
-    if any(word in command for word in ['play', 'pause', 'stop', 'resume']):
-        keyboard.press(Key.media_play_pause)
-        keyboard.release(Key.media_play_pause)
-        print("Command: Play/Pause")
-        return True
-
-    elif any(word in command for word in ['next', 'skip']):
-        keyboard.press(Key.media_next)
-        keyboard.release(Key.media_next)
-        print("Command: Next")
-        return True
-
-    elif any(word in command for word in ['previous', 'back']):
-        keyboard.press(Key.media_previous)
-        keyboard.release(Key.media_previous)
-        print("Command: Previous")
-        return True
-
-    elif any(word in command for word in ['volume up', 'louder']):
-        for _ in range(2):
-            keyboard.press(Key.media_volume_up)
-            keyboard.release(Key.media_volume_up)
-            time.sleep(0.05)
-        print("Command: Volume up")
-        return True
-
-    elif any(word in command for word in ['volume down', 'quieter']):
-        for _ in range(2):
-            keyboard.press(Key.media_volume_down)
-            keyboard.release(Key.media_volume_down)
-            time.sleep(0.05)
-        print("Command: Volume down")
-        return True
-
-    elif 'mute' in command:
-        keyboard.press(Key.media_volume_mute)
-        keyboard.release(Key.media_volume_mute)
-        print("Command: Mute")
-        return True
-
-    elif 'lock program' in command or 'lock system' in command:
-        lock_program()
-        print("Command: Lock program")
-        return True
-
-    print(f"Unknown command: {command}")
-    return False
-
-
-def display_status():
-    """Display current program status"""
-    print("\n" + "=" * 60)
-    print("VOICE MEDIA CONTROLLER - IMPROVED")
-    print("=" * 60)
-
-    if program_unlocked:
-        print("Status: UNLOCKED")
-        if session_active:
-            remaining = ACTIVE_SESSION_DURATION - (time.time() - last_command_time)
-            print(f"Session: ACTIVE ({int(remaining)} seconds remaining)")
-        else:
-            print(f"Session: INACTIVE (say '{WAKE_WORD}' to activate)")
-    else:
-        print("Status: LOCKED")
-        print("Say startup password to unlock")
-
-    print("\nAvailable Commands:")
-    print("-" * 60)
-    print("Media: play, pause, next, previous, volume up/down, mute")
-    print("System: lock program")
-    print("-" * 60)
-    print("\nMicrophone Settings:")
-    print(f"  Sensitivity: HIGH (optimized for distance)")
-    print(f"  Energy Threshold: {recognizer.energy_threshold}")
-    print(f"  Dynamic Adjustment: Enabled")
-    print("-" * 60)
-    print("Press Ctrl+C to exit")
-    print("=" * 60)
-
-
-def main():
-    """Main program loop"""
-    global session_active, last_command_time, program_unlocked
-
-    print("=" * 60)
-    print("SECURE VOICE MEDIA CONTROLLER - IMPROVED")
-    print("=" * 60)
-    print("Enhanced for better distance detection")
-    print("\nSecurity layers:")
-    print("1. Startup password (voice)")
-    print(f"2. Wake word: '{WAKE_WORD}'")
-    print("=" * 60)
-
-    if not load_password():
-        print("Failed to setup password system.")
-        return
-
-    try:
-        while True:
-            if not program_unlocked:
-                if not unlock_program():
-                    print("Failed to unlock. Exiting.")
-                    break
-                display_status()
-
-            if session_active:
-                elapsed = time.time() - last_command_time
-                if elapsed > ACTIVE_SESSION_DURATION:
-                    session_active = False
-                    print("\nSession expired")
-                    display_status()
-                    continue
-
-                with sr.Microphone() as source:
-                    remaining = ACTIVE_SESSION_DURATION - elapsed
-                    print(f"\nListening for command... ({int(remaining)} seconds)")
-
-                    try:
-                        # Quick adjustment for active session
-                        adjust_microphone_for_distance(source, duration=0.5)
-
-                        # Longer timeout and phrase limit for distance
-                        audio = recognizer.listen(source, timeout=5, phrase_time_limit=4)
-
-                        command = recognizer.recognize_google(audio)
-                        print(f"Command: {command}")
-
-                        if control_media(command):
-                            last_command_time = time.time()
-
-                    except sr.WaitTimeoutError:
-                        pass  # Timeout is normal, just continue
-                    except sr.UnknownValueError:
-                        pass  # Couldn't understand, continue listening
-                    except Exception as e:
-                        print(f"Error: {e}")
-
-            else:
-                # Waiting for wake word
-                with sr.Microphone() as source:
-                    try:
-                        # Calibrate for wake word detection
-                        adjust_microphone_for_distance(source, duration=0.7)
-
-                        # Longer listening for wake word from distance
-                        audio = recognizer.listen(source, timeout=None, phrase_time_limit=3)
-
-                        text = recognizer.recognize_google(audio).lower()
-
-                        if WAKE_WORD in text:
-                            print(f"\nWake word detected: '{text}'")
-                            session_active = True
-                            last_command_time = time.time()
-                            print(f"Session activated for {ACTIVE_SESSION_DURATION} seconds")
-
-                        elif 'lock' in text:
-                            lock_program()
-
-                    except sr.UnknownValueError:
-                        pass
-                    except Exception:
-                        pass
-
-                time.sleep(0.1)
-
-    except KeyboardInterrupt:
-        print("\nProgram terminated.")
-        lock_program()
+import sys
 
+from voice_assistant.cli import main
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main(["secure"] + sys.argv[1:]))
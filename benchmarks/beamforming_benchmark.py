@@ -0,0 +1,162 @@
+"""
+Beamforming Benchmark
+One talker heard by several microphones at different distances: each mic
+gets the voice delayed and quieter, plus its own uncorrelated noise
+Compares the output SNR of a single microphone, the best-SNR channel per
+phrase and the delay-and-sum beam, and the CPU cost of mixing one chunk
+The synthetic recordings are also written as multi-channel WAV files and
+replayed through MixedSource, the path --input takes
+
+Usage: python benchmarks/beamforming_benchmark.py [--seconds S] [--output-dir DIR]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synth
+from voice_assistant.audio_capture import DEFAULT_CHUNK_SIZE, WavFileSource
+from voice_assistant.beamforming import MIX_MODES, ChannelMixer, MixedSource
+
+PHRASES = ["computer", "next", "volume up", "pause", "computer", "previous track", "play", "volume down"]
+
+# name -> per-mic (delay in samples, voice gain, noise level)
+SCENES = {
+    "2 mics, even noise": [(0, 1.0, 150), (9, 0.85, 150)],
+    "4 mics, even noise": [(0, 1.0, 150), (6, 0.9, 150), (13, 0.8, 150), (19, 0.7, 150)],
+    "4 mics, one by a fan": [(0, 1.0, 600), (6, 0.9, 150), (13, 0.8, 150), (19, 0.7, 150)],
+    "4 mics, talker moves": None,  # first half like the even scene, second half mirrored
+}
+SEGMENT = 4096  # samples per SNR fit; the best mode may switch channel between segments
+
+
+def talk(seconds, seed):
+    """Clean speech: the phrases spaced out over ``seconds``"""
+    out = np.zeros(int(seconds * synth.SAMPLE_RATE))
+    spacing = len(out) // len(PHRASES)
+    for i, text in enumerate(PHRASES):
+        words = synth.spoken_phrase(text, seed=seed + i).astype(float)
+        start = i * spacing + spacing // 4
+        out[start:start + len(words)] += words[:len(out) - start]
+    return out
+
+
+def microphones(clean, mics, seed):
+    """(samples, channels) int16 recording of ``clean`` by each (delay, gain, noise) mic"""
+    rng = np.random.default_rng(seed)
+    channels = []
+    for delay, gain, noise in mics:
+        voice = gain * np.concatenate((np.zeros(delay), clean[:len(clean) - delay]))
+        channels.append(voice + noise * rng.standard_normal(len(clean)))
+    return np.clip(np.stack(channels, axis=1), -32768, 32767).astype(np.int16)
+
+
+def scene_recording(name, clean, seed):
+    if SCENES[name] is not None:
+        return microphones(clean, SCENES[name], seed)
+    near = SCENES["4 mics, even noise"]
+    far = [(19, 0.7, 150), (13, 0.8, 150), (6, 0.9, 150), (0, 1.0, 150)]  # now closest to mic 3
+    half = len(clean) // 2
+    first = microphones(clean, near, seed)[:half]
+    second = microphones(clean, far, seed + 1)[half:]
+    return np.concatenate((first, second))
+
+
+def snr(output, clean, max_lag):
+    """Output SNR in dB: per segment, the best scaled and delayed copy of the clean voice is the signal"""
+    signal = residual = 0.0
+    output = output.astype(float)
+    for start in range(0, len(output) - SEGMENT, SEGMENT):
+        piece = output[start:start + SEGMENT]
+        best = None
+        for lag in range(0, max_lag):
+            if start - lag < 0:
+                continue
+            reference = clean[start - lag:start - lag + SEGMENT]
+            power = reference @ reference
+            if power == 0:
+                continue
+            scale = (piece @ reference) / power
+            error = piece - scale * reference
+            if best is None or error @ error < best[1] @ best[1]:
+                best = (scale * reference, error)
+        if best is not None:
+            signal += best[0] @ best[0]
+            residual += best[1] @ best[1]
+    return 10 * np.log10(signal / max(residual, 1e-9))
+
+
+def mix(recording, mode, chunk_size):
+    """(mono output, microseconds per chunk) through a streaming ChannelMixer"""
+    mixer = ChannelMixer(recording.shape[1], synth.SAMPLE_RATE, mode)
+    blocks = []
+    started = time.perf_counter()
+    for start in range(0, len(recording), chunk_size):
+        blocks.append(mixer.process(recording[start:start + chunk_size]))
+    elapsed = time.perf_counter() - started
+    return np.concatenate(blocks), 1e6 * elapsed / len(blocks)
+
+
+def replay(path, mode, chunk_size):
+    """Mono output of a multi-channel WAV read through MixedSource"""
+    source = MixedSource(WavFileSource(path, chunk_size=chunk_size), mode)
+    source.open()
+    blocks = []
+    while True:
+        data = source.read()
+        if not data:
+            break
+        blocks.append(np.frombuffer(data, dtype=np.int16))
+    source.close()
+    return np.concatenate(blocks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=20.0)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--output-dir', help="keep the synthetic multi-channel WAV files here")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or tempfile.mkdtemp(prefix="beamforming_")
+    os.makedirs(output_dir, exist_ok=True)
+    clean = talk(args.seconds, args.seed)
+    max_lag = 2 * ChannelMixer(1, synth.SAMPLE_RATE).max_lag + 20
+
+    print("=" * 86)
+    print(f"{args.seconds:.0f} s of speech, {args.chunk_size}-sample chunks, SNR in dB")
+    print(f"{'scene':<22} {'mic 0':>7} {'best mic':>9} {'best':>7} {'beam':>7} {'gain':>7} "
+          f"{'best us':>9} {'beam us':>9} {'wav':>5}")
+    print("-" * 86)
+    for index, name in enumerate(SCENES):
+        recording = scene_recording(name, clean, args.seed + 10 * index)
+        single = [snr(recording[:, channel], clean, max_lag) for channel in range(recording.shape[1])]
+
+        results = {}
+        for mode in MIX_MODES:
+            results[mode] = mix(recording, mode, args.chunk_size)
+
+        path = os.path.join(output_dir, f"scene_{index}_{recording.shape[1]}ch.wav")
+        synth.write_wav(path, recording)
+        replayed = all(np.array_equal(replay(path, mode, args.chunk_size), results[mode][0]) for mode in MIX_MODES)
+
+        beam = snr(results["beam"][0], clean, max_lag)
+        print(f"{name:<22} {single[0]:>7.1f} {max(single):>9.1f} {snr(results['best'][0], clean, max_lag):>7.1f} "
+              f"{beam:>7.1f} {beam - single[0]:>+7.1f} {results['best'][1]:>9.0f} {results['beam'][1]:>9.0f} "
+              f"{'same' if replayed else 'DIFF':>5}")
+    print("-" * 86)
+    print("best mic: the single microphone with the highest SNR over the whole recording")
+    print("gain: beam over mic 0; us: CPU microseconds to mix one chunk")
+    print(f"wav: MixedSource replay of the files in {output_dir} matches the in-memory mix")
+    print("=" * 86)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Capture Benchmark
+Commands at random moments in a replayed recording, cut into phrases by
+a listen loop like the command pipeline's, which starts a new listen
+every time one times out in silence
+Before: sr.Recognizer.listen, whose pre-roll only holds chunks read by
+the current call, joined from fresh copies. After: CaptureStream.listen,
+whose pre-roll reaches back into the ring and whose phrase is a view of it
+Each command opens with a soft consonant below the energy threshold;
+a phrase that starts after it has lost the first syllable. Also reports
+the CPU time and memory allocated per phrase while endpointing
+
+Usage: python benchmarks/capture_benchmark.py [--commands N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import speech_recognition as sr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synth
+from voice_assistant.audio_capture import CaptureStream, WavFileSource
+
+COMMANDS = ["next track", "volume up", "pause", "previous track", "play"]
+SOFT_ONSET = 0.08  # seconds of quiet consonant before the first vowel
+LISTEN_TIMEOUT = 1.0  # the command pipeline's; every timeout starts a new listen
+
+
+def recognizer():
+    recognizer = sr.Recognizer()
+    recognizer.energy_threshold = 300
+    recognizer.dynamic_energy_threshold = False
+    recognizer.pause_threshold = 0.5
+    return recognizer
+
+
+def command(text, seed):
+    """A command whose first syllable starts softly, like 'n' or 's'"""
+    onset = synth.keyword([(120, 300, 2500)], speed=0.12 / SOFT_ONSET, level=220, seed=seed)
+    return np.concatenate((onset, synth.spoken_phrase(text, seed=seed)))
+
+
+def recording(count, seed):
+    """(samples, onsets): commands after random silences, and where each starts"""
+    rng = np.random.default_rng(seed)
+    parts, onsets, length = [], [], 0
+    for i in range(count):
+        quiet = synth.room_noise(rng.uniform(1.2, 2.4), seed=seed + i)
+        spoken = command(COMMANDS[i % len(COMMANDS)], seed + i)
+        onsets.append(length + len(quiet))
+        parts += [quiet, synth.mix(spoken, synth.room_noise(len(spoken) / synth.SAMPLE_RATE, seed=seed + 100 + i))]
+        length += len(quiet) + len(spoken)
+    parts.append(synth.room_noise(1.5, seed=seed + 999))
+    return np.concatenate(parts), onsets
+
+
+def endpoint(path, ring):
+    """Phrases cut from ``path`` by a listen loop like the command pipeline's: [(pcm, cpu, peak bytes)]"""
+    capture = CaptureStream(WavFileSource(path))
+    listener = recognizer()
+    phrases = []
+    with capture:
+        tracemalloc.start()
+        while not capture.finished:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            started = time.thread_time()
+            try:
+                if ring:
+                    audio = capture.listen(listener, timeout=LISTEN_TIMEOUT, phrase_time_limit=4)
+                else:
+                    audio = listener.listen(capture, timeout=LISTEN_TIMEOUT, phrase_time_limit=4)
+            except sr.WaitTimeoutError:
+                continue
+            cpu = time.thread_time() - started
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+            if audio.frame_data and len(audio.frame_data) > 0.3 * synth.SAMPLE_RATE * 2:
+                phrases.append((bytes(audio.frame_data), cpu, peak))
+            del audio
+        tracemalloc.stop()
+    capture.stop()
+    return phrases
+
+
+def find(haystack, phrase):
+    """Byte offset of ``phrase`` in ``haystack``, on a sample boundary"""
+    offset = haystack.find(phrase[:4096])
+    while offset != -1 and offset % 2:
+        offset = haystack.find(phrase[:4096], offset + 1)
+    return offset
+
+
+def table(samples, onsets, directory):
+    path = os.path.join(directory, "commands.wav")
+    synth.write_wav(path, samples)
+    data = samples.tobytes()
+
+    print(f"{'endpointer':<30} {'heard':>7} {'clipped':>8} {'mean clip':>10} {'CPU us':>7} {'KiB':>6}")
+    for name, ring in (("sr.Recognizer.listen (before)", False), ("CaptureStream.listen (after)", True)):
+        phrases = endpoint(path, ring)
+        starts = [find(data, pcm) // 2 for pcm, _, _ in phrases]
+        heard = clipped = 0
+        clips = []
+        for onset in onsets:
+            # The phrase holding this command's first vowel
+            start = next((at for at in starts if onset - synth.SAMPLE_RATE < at < onset + 0.2 * synth.SAMPLE_RATE), None)
+            if start is None:
+                continue
+            heard += 1
+            if start > onset + 0.01 * synth.SAMPLE_RATE:
+                clipped += 1
+                clips.append((start - onset) / synth.SAMPLE_RATE)
+        mean = f"{1000 * np.mean(clips):.0f} ms" if clips else "-"
+        cpu = 1e6 * np.mean([phrase[1] for phrase in phrases])
+        peak = np.median([phrase[2] for phrase in phrases]) / 1024
+        print(f"{name:<30} {heard:>3}/{len(onsets):<3} {clipped:>8} {mean:>10} {cpu:>7.0f} {peak:>6.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--commands', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    samples, onsets = recording(args.commands, args.seed)
+    with tempfile.TemporaryDirectory(prefix="capture_") as directory:
+        print("=" * 72)
+        print(f"{args.commands} commands, {SOFT_ONSET * 1000:.0f} ms soft onset, "
+              f"listen restarted every {LISTEN_TIMEOUT:g} s of silence")
+        print("-" * 72)
+        table(samples, onsets, directory)
+        print("-" * 72)
+        print("clipped: phrase starts more than 10 ms after the command's soft onset")
+        print("CPU us: per phrase endpointed; KiB: peak allocated while endpointing one (tracemalloc)")
+        print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
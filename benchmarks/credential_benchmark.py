@@ -0,0 +1,95 @@
+"""
+Credential Store Benchmark
+Compares the old verify_password (open, parse and SHA-256 on every
+attempt) with the cached CredentialStore, and times the scrypt cost
+settings so the hash can be as slow as the unlock latency budget allows
+
+Usage: python benchmarks/credential_benchmark.py [--budget MS]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice_assistant import credentials
+from voice_assistant.credentials import CredentialStore
+
+PASSWORD = "open sesame"
+COSTS = [2 ** k for k in range(11, 18)]
+
+
+def old_verify(path, spoken_text):
+    """verify_password before the store: every attempt re-reads the file"""
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return hashlib.sha256(spoken_text.lower().encode()).hexdigest() == data.get('password_hash', '')
+    except:
+        return False
+
+
+def per_call_us(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return 1e6 * (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget', type=float, default=150.0, help="unlock hashing budget in ms")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    legacy_path = os.path.join(directory, "legacy.json")
+    with open(legacy_path, 'w') as f:
+        json.dump({'password_hash': hashlib.sha256(PASSWORD.encode()).hexdigest(),
+                   'password_hint': "ope..."}, f)
+
+    store = CredentialStore(os.path.join(directory, "store.json"))
+    store.set_password(PASSWORD)
+
+    print("=" * 64)
+    print("Reading the record")
+    print(f"  old: open + parse per attempt   {per_call_us(lambda: old_verify(legacy_path, PASSWORD), 2000):>8.1f} us")
+    print(f"  store: cached, stat only        {per_call_us(lambda: store.record, 2000):>8.1f} us "
+          f"({store.loads} file read(s) in 2000 lookups)")
+
+    # Replacing the file is noticed on the next lookup
+    CredentialStore(store.path).set_password("something else")
+    changed = not store.verify(PASSWORD) and store.verify("something else")
+    print(f"  external change picked up:      {'yes' if changed else 'NO':>8} ({store.loads} file reads)")
+
+    print("-" * 64)
+    print(f"scrypt cost (r={credentials.SCRYPT_R}, p={credentials.SCRYPT_P}), budget {args.budget:.0f} ms")
+    print(f"{'n':>8} {'memory':>9} {'hash ms':>9}")
+    chosen = None
+    for n in COSTS:
+        record = credentials.hash_password(PASSWORD, n=n)
+        started = time.perf_counter()
+        for _ in range(3):
+            credentials.check_password(record, PASSWORD)
+        ms = 1000 * (time.perf_counter() - started) / 3
+        memory = 128 * n * credentials.SCRYPT_R / 2 ** 20
+        marker = ""
+        if ms <= args.budget:
+            chosen = n
+        if n == credentials.SCRYPT_N:
+            marker = "  <- current default"
+        print(f"{n:>8} {memory:>7.0f}MB {ms:>9.1f}{marker}")
+    print("-" * 64)
+    if chosen is None:
+        print("No cost setting fits the budget")
+    else:
+        print(f"Largest n within budget: {chosen}")
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Endpointing Benchmark
+Speech-end to phrase-handed-over latency and truncation with the fixed
+pause thresholds the modes used against the adaptive Endpointer
+A replayed recording of three speakers, fast, average and slow, each
+giving short session commands, passwords with a pause between the words,
+and a long spoken command. Every listen is told the context the modes
+would be in. A truncated utterance was split into several phrases or cut
+by the phrase time limit; latency is measured on the whole ones, as
+audio seconds from the end of speech to the listen returning
+
+Usage: python benchmarks/endpointing_benchmark.py [--rounds N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+import speech_recognition as sr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synth
+from voice_assistant.audio_capture import CaptureStream, WavFileSource
+from voice_assistant.endpointing import Endpointer
+
+# speaker: (pause between words, pause between password words)
+SPEAKERS = {'fast': (0.06, 0.45), 'average': (0.18, 0.7), 'slow': (0.4, 0.95)}
+COMMANDS = ["next", "pause", "volume up", "next track", "mute", "previous track", "play", "volume down"]
+PASSWORDS = ["open sesame", "alpha gamma delta"]
+LONG_COMMAND = "turn the volume up by five and then skip to the next track"
+TOLERANCE = 0.1  # seconds a phrase may miss the edge of an utterance by
+
+
+def utterances(rounds):
+    """(text, context, pause between words) in the order spoken"""
+    plan = []
+    for speaker, (gap, password_gap) in SPEAKERS.items():
+        for r in range(rounds):
+            plan.append((PASSWORDS[r % len(PASSWORDS)], 'password', password_gap))
+            plan += [(command, 'command', gap) for command in COMMANDS]
+            plan.append((LONG_COMMAND, 'command', gap))
+    return plan
+
+
+def recording(plan, seed):
+    """(samples, timeline): the utterances after quiet gaps, and each one's context, start and end"""
+    rng = np.random.default_rng(seed)
+    parts, timeline, length = [], [], 0
+    for i, (text, context, gap) in enumerate(plan):
+        quiet = synth.room_noise(rng.uniform(1.8, 2.6), seed=seed + i)
+        spoken = synth.spoken_phrase(text, gap=gap, seed=seed + 100 + i)
+        spoken = synth.mix(spoken, synth.room_noise(len(spoken) / synth.SAMPLE_RATE, seed=seed + 5000 + i))
+        start = length + len(quiet)
+        timeline.append((context, text, start / synth.SAMPLE_RATE, (start + len(spoken)) / synth.SAMPLE_RATE))
+        parts += [quiet, spoken]
+        length = start + len(spoken)
+    parts.append(synth.room_noise(3.0, seed=seed + 999))
+    return np.concatenate(parts), timeline
+
+
+def run(path, timeline, endpointer, pause_threshold):
+    """[(phrase start, phrase end, returned at)] in seconds, listening in each utterance's context"""
+    recognizer = sr.Recognizer()
+    recognizer.energy_threshold = 300
+    recognizer.dynamic_energy_threshold = False
+    recognizer.pause_threshold = pause_threshold
+    capture = CaptureStream(WavFileSource(path), endpointer=endpointer)
+    phrases = []
+    with capture:
+        while not capture.finished:
+            now = capture.position / capture.SAMPLE_RATE
+            upcoming = next((item for item in timeline if item[3] > now), timeline[-1])
+            try:
+                phrase = capture.listen(recognizer, timeout=1.0, context=upcoming[0])
+            except sr.WaitTimeoutError:
+                continue
+            if phrase.end > phrase.start:
+                phrases.append((phrase.start / capture.SAMPLE_RATE, phrase.end / capture.SAMPLE_RATE,
+                                capture.position / capture.SAMPLE_RATE))
+    capture.stop()
+    return phrases
+
+
+def score(timeline, phrases):
+    """Per kind of utterance: (count, truncated, latencies)"""
+    results = {}
+    for context, text, start, end in timeline:
+        kind = "long command" if text == LONG_COMMAND else context
+        count, truncated, latencies = results.get(kind, (0, 0, []))
+        overlapping = [phrase for phrase in phrases if phrase[0] < end and phrase[1] > start]
+        whole = (len(overlapping) == 1 and overlapping[0][0] <= start + TOLERANCE
+                 and overlapping[0][1] >= end - TOLERANCE)
+        if whole:
+            latencies.append(overlapping[0][2] - end)
+        results[kind] = (count + 1, truncated + (not whole), latencies)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=3, help="rounds of utterances per speaker")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    plan = utterances(args.rounds)
+    samples, timeline = recording(plan, args.seed)
+    endpointers = [
+        ("fixed 0.8 s (secure)", lambda: Endpointer(0.8, adaptive=False), 0.8),
+        ("fixed 1.0 s (basic, wake)", lambda: Endpointer(1.0, adaptive=False), 1.0),
+        ("adaptive", lambda: Endpointer(0.8), 0.8),
+    ]
+
+    with tempfile.TemporaryDirectory(prefix="endpointing_") as directory:
+        path = os.path.join(directory, "speakers.wav")
+        synth.write_wav(path, samples)
+
+        print("=" * 84)
+        print(f"{len(timeline)} utterances by {len(SPEAKERS)} speakers, {len(samples) / synth.SAMPLE_RATE:.0f} s "
+              f"of audio")
+        print(f"{'endpointing':<27} {'utterances':<13} {'truncated':>10} {'p50 ms':>8} {'p95 ms':>8}")
+        for name, build, pause_threshold in endpointers:
+            print("-" * 84)
+            endpointer = build()
+            results = score(timeline, run(path, timeline, endpointer, pause_threshold))
+            for kind, (count, truncated, latencies) in results.items():
+                if latencies:
+                    p50, p95 = 1000 * np.percentile(latencies, [50, 95])
+                    timing = f"{p50:>8.0f} {p95:>8.0f}"
+                else:
+                    timing = f"{'-':>8} {'-':>8}"
+                print(f"{name:<27} {kind:<13} {truncated:>4}/{count:<5} {timing}")
+                name = ""
+            if endpointer.adaptive:
+                print(f"{'':<27} learned: command pause {endpointer.pause_limit('command', 0.0):.2f} s, "
+                      f"{endpointer.resumes} resumed phrases")
+        print("-" * 84)
+        print("latency: end of speech to the phrase being handed over, on whole utterances")
+        print("=" * 84)
+
+
+if __name__ == "__main__":
+    main()
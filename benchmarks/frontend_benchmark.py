@@ -0,0 +1,239 @@
+"""
+Audio Front-End Benchmark
+Frames per second on one core for the streaming front-end - log-mel
+features on reused buffers against the previous per-chunk arrays, and
+conditioning (high-pass, noise suppression, AGC) - with the memory each
+chunk allocates along the way
+Also: SNR and speech level before and after conditioning for quiet,
+far-field speech; the wake word spotter fed by the front-end's features;
+and the VAD, recognition cache fingerprint and voiceprint sharing one
+phrase analysis instead of each computing their own
+
+Usage: python benchmarks/frontend_benchmark.py [--seconds S]
+"""
+
+import os
+
+# One core: the numbers are per-thread throughput
+for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(variable, "1")
+
+import argparse
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import speech_recognition as sr
+
+import synth
+import wake_word_benchmark
+from voice_assistant.frontend import AudioFrontEnd, FeatureExtractor, PhraseFeatures, mel_weights, phrase_features
+from voice_assistant.recognition_cache import AudioFingerprint
+from voice_assistant.speaker import MfccEncoder
+from voice_assistant.vad import VoiceActivityDetector
+from voice_assistant.wake_word import WakeWordSpotter
+
+CHUNK_SIZE = 1024
+
+# name -> (speech scale, noise level); synth speech peaks near 3000
+SCENES = {
+    "near, quiet room": (1.0, 60),
+    "far, quiet room": (0.3, 60),
+    "far, noisy room": (0.3, 150),
+    "very far, noisy room": (0.15, 150),
+}
+
+
+class AllocatingLogMel:
+    """The previous streaming log-mel: fresh arrays for every step of every chunk"""
+
+    def __init__(self, sample_rate=synth.SAMPLE_RATE):
+        self.frame_length, self.hop_length = int(0.025 * sample_rate), int(0.010 * sample_rate)
+        self.window = np.hamming(self.frame_length).astype(np.float32)
+        self.mel = mel_weights(sample_rate, 512, 26)
+        self.pending = np.zeros(0, dtype=np.float32)
+
+    def process(self, samples):
+        buffer = np.concatenate((self.pending, np.asarray(samples, dtype=np.float32)))
+        count = 1 + (len(buffer) - self.frame_length) // self.hop_length
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, self.frame_length)[::self.hop_length][:count]
+        self.pending = buffer[count * self.hop_length:]
+        spectrum = np.abs(np.fft.rfft(frames * self.window, 512)) ** 2
+        return np.log(spectrum.astype(np.float32) @ self.mel + 1e-6)
+
+
+def stream(seconds, seed=0):
+    """Room noise with speech every couple of seconds"""
+    noise = synth.room_noise(seconds, level=150, seed=seed)
+    speech = np.zeros(len(noise), dtype=np.int16)
+    for i, start in enumerate(np.arange(0.5, seconds - 2, 2.0)):
+        words = synth.spoken_phrase("computer next track", seed=seed + i)
+        at = int(start * synth.SAMPLE_RATE)
+        speech[at:at + len(words)] = words[:len(speech) - at]
+    return synth.mix(noise, speech)
+
+
+def throughput(process, samples, frames_of):
+    """(frames per second, peak bytes allocated per chunk) for ``process`` over ``samples``"""
+    chunks = [samples[i:i + CHUNK_SIZE] for i in range(0, len(samples) - CHUNK_SIZE + 1, CHUNK_SIZE)]
+    for chunk in chunks[:20]:
+        process(chunk)  # warm-up grows the buffers once
+
+    frames = 0
+    started = time.process_time()
+    for chunk in chunks:
+        frames += frames_of(process(chunk))
+    elapsed = time.process_time() - started
+
+    tracemalloc.start()
+    peaks = []
+    for chunk in chunks[:50]:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        process(chunk)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    return frames / elapsed, float(np.median(peaks))
+
+
+def snr(output, clean):
+    """SNR of ``output`` against the best scaled copy of ``clean``, in dB"""
+    output, clean = output.astype(float), clean.astype(float)
+    scale = (output @ clean) / (clean @ clean)
+    error = output - scale * clean
+    return 10 * np.log10((scale * scale * (clean @ clean)) / (error @ error))
+
+
+def dbfs(samples):
+    return 20 * np.log10(np.sqrt(np.mean(samples.astype(float) ** 2)) / 32768)
+
+
+def condition(samples):
+    frontend = AudioFrontEnd()
+    out = np.concatenate([frontend.process(samples[i:i + CHUNK_SIZE]).copy()
+                          for i in range(0, len(samples), CHUNK_SIZE)])
+    return out[frontend.hop:], frontend  # output lags by half a frame
+
+
+def conditioning_table(seed):
+    print(f"{'scene':<24} {'SNR in':>8} {'SNR out':>8} {'speech in':>10} {'speech out':>11}")
+    for index, (name, (scale, noise_level)) in enumerate(SCENES.items()):
+        speech = np.concatenate([np.zeros(2 * synth.SAMPLE_RATE, np.int16),
+                                 (synth.spoken_phrase("computer next volume up", seed=seed + index) * scale)
+                                 .astype(np.int16), np.zeros(synth.SAMPLE_RATE, np.int16)])
+        recorded = synth.mix(synth.room_noise(len(speech) / synth.SAMPLE_RATE, level=noise_level,
+                                              seed=seed + index), speech)
+        out, _ = condition(recorded)
+        clean = speech[:len(out)]
+        words = slice(2 * synth.SAMPLE_RATE, len(speech) - synth.SAMPLE_RATE)
+        print(f"{name:<24} {snr(recorded, speech):>6.1f}dB {snr(out, clean):>6.1f}dB "
+              f"{dbfs(recorded[words]):>7.1f}dBFS {dbfs(out[words]):>8.1f}dBFS")
+
+
+def wake_word_table():
+    enroll, samples, wake_ends = wake_word_benchmark.synthetic_corpus()
+    print(f"{'wake word spotter':<36} {'hits':>6} {'misses':>7} {'false':>6} {'CPU ms/s':>9}")
+    for name, conditioning in (("own MFCCs, raw audio", None), ("front-end features, raw", False),
+                               ("front-end features, conditioned", True)):
+        spotter = WakeWordSpotter()
+        for recording in enroll:
+            spotter.enroll(recording)
+        if conditioning is None:
+            result = wake_word_benchmark.run(spotter, samples, wake_ends)
+        else:
+            frontend = AudioFrontEnd(conditioning=conditioning)
+            spotter.attach(frontend)
+            result = wake_word_benchmark.run(FrontEndFeed(frontend, spotter), samples, wake_ends)
+        print(f"{name:<36} {result['hits']:>6} {result['misses']:>7} {result['false_accepts']:>6} "
+              f"{1000 * result['cpu_per_audio_second']:>9.1f}")
+
+
+class FrontEndFeed:
+    """Looks like a spotter to wake_word_benchmark.run, but sends chunks through a front-end first"""
+
+    def __init__(self, frontend, spotter):
+        self.frontend, self.spotter = frontend, spotter
+        self.sample_rate = spotter.sample_rate
+
+    def process(self, chunk):
+        detections = self.spotter.detections
+        self.frontend.process(np.frombuffer(chunk, dtype=np.int16))
+        return self.spotter.detections > detections
+
+    @property
+    def last_latency(self):
+        return self.spotter.last_latency
+
+    def stats(self):
+        stats = self.spotter.stats()
+        front = self.frontend.cpu_seconds / max(self.spotter.audio_seconds, 1e-9)
+        stats['cpu_per_audio_second'] += front
+        return stats
+
+
+def sharing_table(count, seed):
+    vad, fingerprint, encoder = VoiceActivityDetector(), AudioFingerprint(), MfccEncoder()
+    phrases = [synth.mix(synth.room_noise(2.0, seed=seed + i),
+                         np.concatenate([np.zeros(4000, np.int16), synth.spoken_phrase("volume up", seed=seed + i)]))
+               for i in range(count)]
+
+    started = time.process_time()
+    for samples in phrases:
+        # Each consumer analyses the phrase itself
+        vad.is_speech(PhraseFeatures(samples))
+        fingerprint(PhraseFeatures(samples))
+        encoder.embed(PhraseFeatures(samples))
+    separate = (time.process_time() - started) / count
+
+    started = time.process_time()
+    for samples in phrases:
+        audio = sr.AudioData(samples.tobytes(), synth.SAMPLE_RATE, 2)
+        vad.is_speech(phrase_features(audio))
+        fingerprint(phrase_features(audio))
+        encoder.embed(phrase_features(audio))
+    shared = (time.process_time() - started) / count
+    print(f"VAD + cache fingerprint + voiceprint per {len(phrases[0]) / synth.SAMPLE_RATE:.1f} s phrase: "
+          f"{1000 * separate:.2f} ms separately, {1000 * shared:.2f} ms sharing one analysis")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=30.0, help="audio streamed for the throughput runs")
+    parser.add_argument('--phrases', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    samples = stream(args.seconds, args.seed)
+    conditioned = AudioFrontEnd()
+    both = AudioFrontEnd()
+    both.add_listener(lambda log_mel: None)
+    runs = [
+        ("log-mel, per-chunk arrays (before)", AllocatingLogMel().process, len, "10 ms"),
+        ("log-mel, reused buffers", FeatureExtractor().process, len, "10 ms"),
+        ("conditioning", conditioned.process, lambda out: len(out) // conditioned.hop, "16 ms"),
+        ("conditioning + log-mel", both.process, lambda out: len(out) // both.hop, "16 ms"),
+    ]
+
+    print("=" * 78)
+    print(f"one core, {args.seconds:.0f} s of audio in {CHUNK_SIZE}-sample chunks")
+    print(f"{'stage':<36} {'frames/s':>10} {'frame':>6} {'x real time':>12} {'KiB/chunk':>10}")
+    print("-" * 78)
+    for name, process, frames_of, frame in runs:
+        rate, peak = throughput(process, samples, frames_of)
+        per_second = 1000 / float(frame.split()[0])
+        print(f"{name:<36} {rate:>10.0f} {frame:>6} {rate / per_second:>12.0f} {peak / 1024:>10.1f}")
+    print("-" * 78)
+    conditioning_table(args.seed)
+    print("-" * 78)
+    wake_word_table()
+    print("-" * 78)
+    sharing_table(args.phrases, args.seed)
+    print("KiB/chunk: peak memory allocated while processing one chunk (tracemalloc)")
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Command Grammar Benchmark
+Intent accuracy and latency of the grammar decoders against full
+transcription followed by intent matching, on a fixture corpus
+Fixtures: two recordings of every command phrase, as the replay backend
+and the template decoder read them. Tests: new takes of each phrase by
+two other voices in room noise, plus phrases outside the grammar that
+should be rejected
+A backend that cannot run here (no torch for grammar and local, no
+network for google) is listed as unavailable
+
+Usage: python benchmarks/grammar_benchmark.py [--backend SPEC ...] [--fixtures DIR]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import speech_recognition as sr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synth
+from voice_assistant.grammar import GrammarBackend
+from voice_assistant.intents import COMMANDS, NUMBER_SLOT, IntentEngine
+from voice_assistant.recognizer_backends import create_backend
+
+EXTRA_PHRASES = ["volume up three", "volume down two"]
+OUT_OF_GRAMMAR = ["what is the weather", "open sesame", "banana", "computer", "call mum",
+                  "remind me later", "good morning", "weather tomorrow"]
+TEST_VOICES = [(1.04, 1.03), (0.94, 0.96)]
+
+
+def grammar_phrases():
+    return [phrase for command in COMMANDS for phrase in command.phrases if NUMBER_SLOT not in phrase] + EXTRA_PHRASES
+
+
+def write_fixtures(directory, phrases, takes=2):
+    """``takes`` recordings of every phrase as <name>.wav and <name>.txt"""
+    for i, phrase in enumerate(phrases):
+        for take in range(takes):
+            name = f"{phrase.replace(' ', '_')}_{take}"
+            synth.write_wav(os.path.join(directory, f"{name}.wav"), synth.spoken_phrase(phrase, seed=10 * i + take))
+            with open(os.path.join(directory, f"{name}.txt"), 'w') as f:
+                f.write(phrase)
+
+
+def tests(phrases):
+    """(audio, spoken text) for new takes of every phrase and for the out-of-grammar phrases"""
+    cases = []
+    for v, voice in enumerate(TEST_VOICES):
+        for i, text in enumerate(phrases + OUT_OF_GRAMMAR):
+            seed = 5000 + 100 * v + i
+            spoken = synth.spoken_phrase(text, seed=seed, voice=voice)
+            padded = np.concatenate((synth.room_noise(0.3, seed=seed), spoken, synth.room_noise(0.3, seed=seed + 1)))
+            audio = synth.mix(padded, synth.room_noise(len(padded) / synth.SAMPLE_RATE, seed=seed + 2))
+            cases.append((sr.AudioData(audio.tobytes(), synth.SAMPLE_RATE, 2), text))
+    return cases
+
+
+def evaluate(backend, cases, engine):
+    """Counts of right, wrong and rejected commands, out-of-grammar phrases accepted, and latencies"""
+    right = wrong = rejected = accepted = 0
+    latencies = []
+    for audio, text in cases:
+        expected = engine.match(text)
+        start = time.perf_counter()
+        try:
+            if isinstance(backend, GrammarBackend):
+                intent = backend.decode(audio).intent  # straight to the intent
+            else:
+                match = engine.match(backend.transcribe(audio).text)
+                intent = match.intent if match else None
+        except sr.UnknownValueError:
+            intent = None
+        latencies.append(time.perf_counter() - start)
+
+        if expected is None:
+            accepted += intent is not None
+        elif intent is None:
+            rejected += 1
+        elif intent == expected.intent:
+            right += 1
+        else:
+            wrong += 1
+    return right, wrong, rejected, accepted, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', action='append',
+                        help="backends to compare (default: grammar:<fixtures>, grammar, local)")
+    parser.add_argument('--fixtures', help="fixture directory of <name>.wav and <name>.txt (default: synthetic)")
+    args = parser.parse_args()
+
+    engine = IntentEngine()
+    with tempfile.TemporaryDirectory(prefix="grammar_") as directory:
+        fixtures = args.fixtures or directory
+        if not args.fixtures:
+            write_fixtures(directory, grammar_phrases())
+        phrases = sorted({open(os.path.join(fixtures, name)).read().strip()
+                          for name in os.listdir(fixtures) if name.endswith(".txt")})
+        cases = tests(phrases)
+        commands = sum(engine.match(text) is not None for _, text in cases)
+        specs = args.backend or [f"grammar:{fixtures}", "grammar", "local"]
+
+        print("=" * 86)
+        print(f"{len(phrases)} fixture phrases; {commands} command takes and {len(cases) - commands} "
+              f"out-of-grammar takes by {len(TEST_VOICES)} new voices")
+        print(f"{'backend':<20} {'right':>7} {'wrong':>7} {'rejected':>9} {'OOG accepted':>13} {'p50 ms':>8} {'p95 ms':>8}")
+        print("-" * 86)
+        for spec in specs:
+            label = "grammar:<fixtures>" if spec == f"grammar:{fixtures}" else spec
+            try:
+                backend = create_backend(spec)
+                right, wrong, rejected, accepted, latencies = evaluate(backend, cases, engine)
+            except sr.RequestError as e:
+                print(f"{label:<20} unavailable: {e}")
+                continue
+            p50, p95 = 1000 * np.percentile(latencies, [50, 95])
+            print(f"{label:<20} {right:>7} {wrong:>7} {rejected:>9} {accepted:>6}/{len(cases) - commands:<6} "
+                  f"{p50:>8.1f} {p95:>8.1f}")
+        print("-" * 86)
+        print("right/wrong: intent of a command take; rejected: command take with no intent")
+        print("OOG accepted: phrases outside the grammar that were given an intent anyway")
+        print("=" * 86)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Intent Matcher Micro-Benchmark
+Compares the compiled IntentEngine with the old linear substring scan of
+control_media as the command table grows to hundreds of commands
+
+Usage: python benchmarks/intent_benchmark.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice_assistant.intents import COMMANDS, Command, IntentEngine
+
+TABLE_SIZES = [len(COMMANDS), 50, 100, 250, 500, 1000]
+SYLLABLES = ["ka", "lo", "mi", "ten", "ra", "vo", "shu", "pe", "dan", "ri", "zo", "gu", "fe", "nor"]
+FILLER = ["please", "could", "you", "now", "the", "um", "okay", "just", "for", "me"]
+
+# Substring scans get these wrong; word matching must not
+CONFUSIONS = {
+    "playback settings": None,
+    "unmute": 'mute',
+    "turn up the volume by five": 'volume_up',
+    "go back a song": 'previous',
+    "skip": 'next',
+}
+
+
+def synthetic_table(size, rng):
+    """The real commands plus generated ones with 1-3 word phrases"""
+    commands = list(COMMANDS)
+    words = {rng.choice(SYLLABLES) + rng.choice(SYLLABLES) + rng.choice(SYLLABLES) for _ in range(size * 4)}
+    words = sorted(words)
+    for i in range(size - len(COMMANDS)):
+        phrases = [" ".join(rng.sample(words, rng.randint(1, 3))) for _ in range(3)]
+        commands.append(Command(f"custom_{i}", f"custom {i}", None, rng.randint(1, 60), phrases))
+    return commands
+
+
+def linear_scan(commands, text):
+    """What control_media did: substring-test every phrase of every command in order"""
+    text = text.lower()
+    for command in commands:
+        if any(phrase in text for phrase in command.phrases if "{" not in phrase):
+            return command.intent
+    return None
+
+
+def utterances(commands, count, rng):
+    result = []
+    for _ in range(count):
+        phrase = rng.choice(rng.choice(commands).phrases).replace("{number}", "three")
+        words = rng.sample(FILLER, 3) + [phrase] + rng.sample(FILLER, 3)
+        result.append(" ".join(words))
+    return result
+
+
+def main():
+    rng = random.Random(7)
+    engine = IntentEngine()
+
+    print("=" * 64)
+    print("Correctness on known confusions:")
+    for text, expected in CONFUSIONS.items():
+        match = engine.match(text)
+        got = match.intent if match else None
+        old = linear_scan(COMMANDS, text)
+        print(f"  {text!r:32} engine={got!s:12} old={old!s:12} expected={expected}")
+
+    print("-" * 64)
+    print(f"{'commands':>9} {'phrases':>8} {'compile ms':>11} {'engine us':>10} {'linear us':>10}")
+    for size in TABLE_SIZES:
+        commands = synthetic_table(size, rng)
+        samples = utterances(commands, 200, rng)
+
+        compile_seconds = timeit.timeit(lambda: IntentEngine(commands), number=3) / 3
+        engine = IntentEngine(commands)
+        engine_seconds = timeit.timeit(lambda: [engine.match(text) for text in samples], number=5) / (5 * len(samples))
+        linear_seconds = timeit.timeit(lambda: [linear_scan(commands, text) for text in samples],
+                                       number=5) / (5 * len(samples))
+
+        phrases = sum(len(command.phrases) for command in commands)
+        print(f"{len(commands):>9} {phrases:>8} {compile_seconds * 1000:>11.2f} "
+              f"{engine_seconds * 1e6:>10.1f} {linear_seconds * 1e6:>10.1f}")
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
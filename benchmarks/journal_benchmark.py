@@ -0,0 +1,241 @@
+"""
+Session Journal Benchmark
+What journaling costs the listening thread, and how fast the journal is
+read back, against writing each record straight to a file
+Events: a session's worth of unlock, wake, command, expiry and lock
+records. Phrases: captured phrases of synthetic speech handed over by a
+CaptureStream, as the modes journal them with --journal-audio
+Reading: one pass over the events of the whole journal through mmap,
+against reading every segment into memory first; memory is the peak
+Python allocation during the pass. Replay: the journaled phrases played
+back by JournalSource must come out sample for sample as captured, and
+two runs journaled into one directory must both play, one after the
+other; the benchmark exits non-zero if either does not
+
+Usage: python benchmarks/journal_benchmark.py [--events N] [--phrases N] [--burst N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synth
+from voice_assistant.audio_capture import CaptureStream, WavFileSource
+from voice_assistant.journal import (RECORD_HEADER, SEGMENT_HEADER, Journal, JournalReader, JournalSource,
+                                     segment_paths)
+
+EVENTS = ['unlock', 'wake', 'command', 'command', 'command', 'expiry', 'wake', 'command', 'lock']
+COMMANDS = ["next: next track", "volume_up: volume up three", "pause: pause"]
+
+
+class DirectJournal:
+    """Baseline: each record appended to a JSON-lines file on the calling thread"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def record(self, event, detail=""):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({'time': time.time(), 'event': event, 'detail': detail}) + "\n")
+
+    def record_phrase(self, phrase):
+        with open(self.path, 'ab') as f:
+            f.write(phrase.frame_data)
+
+    def close(self):
+        pass
+
+
+def captured_phrases(directory, count, seed):
+    """Phrases handed over by a CaptureStream replaying synthetic commands"""
+    texts = [command.split(": ")[1] for command in COMMANDS]
+    parts = []
+    for i in range(count):
+        parts += [synth.room_noise(0.6, seed=seed + i), synth.spoken_phrase(texts[i % len(texts)], seed=seed + 50 + i)]
+    parts.append(synth.room_noise(1.5, seed=seed + 999))
+    path = os.path.join(directory, "phrases.wav")
+    synth.write_wav(path, np.concatenate(parts))
+
+    import speech_recognition as sr
+    recognizer = sr.Recognizer()
+    recognizer.energy_threshold = 300
+    recognizer.dynamic_energy_threshold = False
+    recognizer.pause_threshold = 0.5
+    capture = CaptureStream(WavFileSource(path), buffer_seconds=600)  # phrases stay views of the ring
+    phrases = []
+    with capture:
+        while not capture.finished:
+            try:
+                phrase = capture.listen(recognizer, timeout=2.0)
+            except sr.WaitTimeoutError:
+                continue
+            if phrase.end > phrase.start:
+                phrases.append(phrase)
+    capture.stop()
+    return phrases
+
+
+def time_calls(journal, events, phrases, burst):
+    """Calling-thread seconds per event record and per phrase record, in bursts the writer drains between"""
+    event_times, phrase_times = [], []
+    for i in range(events):
+        if i % burst == 0:
+            time.sleep(0.05)
+        event = EVENTS[i % len(EVENTS)]
+        detail = COMMANDS[i % len(COMMANDS)] if event == 'command' else ""
+        start = time.perf_counter()
+        journal.record(event, detail)
+        event_times.append(time.perf_counter() - start)
+        if i % 4 == 0 and phrases:
+            phrase = phrases[(i // 4) % len(phrases)]
+            start = time.perf_counter()
+            journal.record_phrase(phrase)
+            phrase_times.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    journal.close()
+    return event_times, phrase_times, time.perf_counter() - start
+
+
+def read_events(directory, mapped):
+    """(seconds, peak bytes allocated, events) for one pass over the journal's events"""
+    start = time.perf_counter()
+    count = scan(directory, mapped)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    scan(directory, mapped)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, count
+
+
+def scan(directory, mapped):
+    """Events in the journal, counted one way or the other"""
+    if mapped:
+        with JournalReader(directory) as reader:
+            count = sum(1 for _ in reader.events())
+    else:
+        count = 0
+        for path in segment_paths(directory):
+            with open(path, 'rb') as f:
+                data = f.read()  # the whole segment, audio included
+            offset = SEGMENT_HEADER.size
+            while offset + RECORD_HEADER.size <= len(data):
+                _, _, detail_size, audio_size, _, _ = RECORD_HEADER.unpack_from(data, offset)
+                offset += RECORD_HEADER.size + detail_size + audio_size
+                count += not audio_size
+    return count
+
+
+def replayed(directory):
+    """Everything JournalSource plays back from ``directory``"""
+    source = JournalSource(directory, chunk_size=1024)
+    source.open()
+    stream = bytearray()
+    while True:
+        data = source.read()
+        if not data:
+            break
+        stream += data
+    source.close()
+    return stream
+
+
+def replay_matches(directory, phrases):
+    """Whether JournalSource plays every journaled phrase back at its position, unchanged"""
+    stream = replayed(directory)
+    journaled = {phrase.start: bytes(phrase.frame_data) for phrase in phrases}
+    return all(stream[start * 2:start * 2 + len(audio)] == audio for start, audio in journaled.items())
+
+
+def runs_replayed(directory, phrases, rate, runs=2):
+    """Whether ``runs`` runs journaled into one directory, positions restarting at 0, all play in order"""
+    for _ in range(runs):
+        journal = Journal(directory, rate, audio=True)
+        for phrase in phrases:
+            journal.record_phrase(phrase)
+        journal.close()
+
+    stream = bytes(replayed(directory))
+    offset = 0
+    for _ in range(runs):
+        for phrase in phrases:
+            found = stream.find(bytes(phrase.frame_data), offset)
+            if found < 0:
+                return False
+            offset = found + len(phrase.frame_data)
+    return True
+
+
+def percentiles(seconds):
+    return 1e6 * np.percentile(seconds, [50, 99]) if seconds else (0.0, 0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--burst', type=int, default=200, help="events recorded back to back between pauses")
+    parser.add_argument('--phrases', type=int, default=12, help="distinct phrases captured for the audio records")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="journal_") as directory:
+        phrases = captured_phrases(directory, args.phrases, args.seed)
+        seconds = sum(phrase.seconds for phrase in phrases) / len(phrases)
+        rate = phrases[0].sample_rate
+
+        print("=" * 88)
+        print(f"{args.events} events and {args.events // 4} phrases ({len(phrases)} distinct, "
+              f"{seconds:.2f} s on average) recorded from the calling thread")
+        print(f"{'journal':<28} {'event p50 us':>13} {'event p99 us':>13} {'phrase p50 us':>14} "
+              f"{'phrase p99 us':>14} {'close ms':>9}")
+        print("-" * 88)
+        configurations = [
+            ("direct JSON-lines file", lambda: DirectJournal(os.path.join(directory, "direct.jsonl"))),
+            ("journal, events only", lambda: Journal(os.path.join(directory, "events"), rate)),
+            ("journal with audio", lambda: Journal(os.path.join(directory, "audio"), rate, audio=True)),
+        ]
+        for name, build in configurations:
+            journal = build()
+            event_times, phrase_times, closing = time_calls(journal, args.events, phrases, args.burst)
+            event_p50, event_p99 = percentiles(event_times)
+            phrase_p50, phrase_p99 = percentiles(phrase_times)
+            print(f"{name:<28} {event_p50:>13.2f} {event_p99:>13.2f} {phrase_p50:>14.2f} {phrase_p99:>14.2f} "
+                  f"{1000 * closing:>9.1f}")
+            if isinstance(journal, Journal):
+                stats = journal.stats()
+                print(f"{'':<28} {stats['records']} records, {stats['bytes'] / 1e6:.1f} MB in "
+                      f"{stats['segments']} segments, {stats['dropped']} dropped")
+
+        audio_directory = os.path.join(directory, "audio")
+        print("-" * 88)
+        print(f"{'reading the events':<28} {'ms':>13} {'peak MB':>13} {'events':>14}")
+        for name, mapped in [("mmap", True), ("read every segment", False)]:
+            seconds, peak, count = read_events(audio_directory, mapped)
+            print(f"{name:<28} {1000 * seconds:>13.1f} {peak / 1e6:>13.2f} {count:>14}")
+
+        replay = os.path.join(directory, "replay")
+        journal = Journal(replay, rate, audio=True)
+        for phrase in phrases:
+            journal.record_phrase(phrase)
+        journal.close()
+        matches = replay_matches(replay, phrases)
+        both_runs = runs_replayed(os.path.join(directory, "runs"), phrases, rate)
+        print("-" * 88)
+        print(f"replay: {len(phrases)} journaled phrases played back "
+              f"{'unchanged at their positions' if matches else 'WITH DIFFERENCES'}")
+        print(f"replay of two runs in one journal: {'both played in order' if both_runs else 'RUNS MISSING'}")
+        print("=" * 88)
+        if not (matches and both_runs):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
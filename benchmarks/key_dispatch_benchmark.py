@@ -0,0 +1,129 @@
+"""
+Key Dispatch Benchmark
+Replays bursts of volume commands against a recording keyboard controller
+(no display needed) and compares the old inline presses, which slept
+between steps on the listening thread, with the KeyDispatcher: how long
+the caller is held up, how many key events reach the OS and how far apart
+Exits non-zero if the dispatcher's presses differ from the merged bursts
+expected, or come closer together than the interval
+
+Usage: python benchmarks/key_dispatch_benchmark.py [--interval S]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice_assistant.keys import KeyDispatcher
+
+# (key, steps) as control_media submits them, and the bursts they should merge into
+SCENARIOS = {
+    "volume up x3": ([('media_volume_up', 2)] * 3, [('media_volume_up', 6)]),
+    "volume up 10": ([('media_volume_up', 10)], [('media_volume_up', 10)]),
+    "up 10, down 4": ([('media_volume_up', 10), ('media_volume_down', 4)], [('media_volume_up', 6)]),
+    "next, up 2, up 2": ([('media_next', 1), ('media_volume_up', 2), ('media_volume_up', 2)],
+                         [('media_next', 1), ('media_volume_up', 4)]),
+}
+HOLD = 'hold'  # key whose press blocks until released, so a scenario is queued whole before any of it plays
+
+
+class RecordingController:
+    """Stands in for pynput's Controller and records every key event"""
+
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+        self.holding = threading.Event()
+        self.resume = threading.Event()
+
+    def press(self, key):
+        if key == HOLD:
+            self.holding.set()
+            self.resume.wait()
+            return
+        with self.lock:
+            self.events.append((time.monotonic(), key))
+
+    def bursts(self):
+        """Events as (key, consecutive presses)"""
+        bursts = []
+        for _, key in self.events:
+            if bursts and bursts[-1][0] == key:
+                bursts[-1] = (key, bursts[-1][1] + 1)
+            else:
+                bursts.append((key, 1))
+        return bursts
+
+    def release(self, key):
+        pass
+
+    def min_gap_ms(self):
+        times = [t for t, _ in self.events]
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        return 1000 * min(gaps) if gaps else float('nan')
+
+
+def inline_press(controller, key, times, interval):
+    """MediaKeys.press before the dispatcher: sleeps on the caller's thread"""
+    for i in range(times):
+        if i and interval:
+            time.sleep(interval)
+        controller.press(key)
+        controller.release(key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--interval', type=float, default=0.05, help="minimum seconds between presses")
+    args = parser.parse_args()
+
+    print("=" * 78)
+    print(f"{'scenario':<18} {'old block ms':>12} {'old events':>10} "
+          f"{'new block ms':>12} {'new events':>10} {'net steps':>9} {'min gap ms':>10}")
+    print("-" * 78)
+
+    failures = []
+    for name, (actions, expected) in SCENARIOS.items():
+        old = RecordingController()
+        started = time.perf_counter()
+        for key, count in actions:
+            inline_press(old, key, count, args.interval)
+        old_block = 1000 * (time.perf_counter() - started)
+
+        new = RecordingController()
+        dispatcher = KeyDispatcher(controller=new, min_interval=args.interval)
+        dispatcher.submit(HOLD)
+        new.holding.wait()
+        started = time.perf_counter()
+        for key, count in actions:
+            dispatcher.submit(key, count)
+        new_block = 1000 * (time.perf_counter() - started)
+        new.resume.set()
+        dispatcher.close()
+
+        net = {}
+        for _, key in new.events:
+            net[key] = net.get(key, 0) + 1
+        summary = " ".join(f"{key.split('_')[-1]}:{n}" for key, n in net.items())
+        print(f"{name:<18} {old_block:>12.1f} {len(old.events):>10} "
+              f"{new_block:>12.3f} {len(new.events):>10} {summary:>9} {new.min_gap_ms():>10.1f}")
+        if new.bursts() != expected:
+            failures.append(f"{name}: pressed {new.bursts()}, expected {expected}")
+        if new.min_gap_ms() < 1000 * args.interval - 1.0:
+            failures.append(f"{name}: presses {new.min_gap_ms():.1f} ms apart, under the interval")
+
+    print("-" * 78)
+    print("block ms: time the listening thread spends in control_media's key presses")
+    print("=" * 78)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Noise-Floor Benchmark
+Replays room audio (no speech) through the capture stream and compares
+per-listen adjust_for_ambient_noise with the background NoiseFloorTracker
+
+Usage: python benchmarks/noise_floor_benchmark.py [room.wav ...]
+Without arguments a synthetic room recording is generated.
+
+Every phrase returned on speech-free audio is a false trigger.
+Time-to-first-listen is the audio time spent calibrating before each
+listen can start, which in live use is wall-clock time the user waits.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+
+import synth
+from voice_assistant.audio_capture import CaptureStream, WavFileSource
+from voice_assistant.noise_floor import NoiseFloorTracker
+
+CALIBRATION_DURATIONS = [0.3, 0.5, 0.7, 1.0, 1.5]  # values used across the scripts
+LISTEN_TIMEOUT = 5
+PHRASE_TIME_LIMIT = 3
+
+
+class _CountingReader:
+    """Counts chunks the recognizer pulls from the stream"""
+
+    def __init__(self, reader):
+        self._reader = reader
+        self.chunks = 0
+
+    def read(self, size=None):
+        self.chunks += 1
+        return self._reader.read(size)
+
+
+def make_recognizer():
+    recognizer = sr.Recognizer()
+    recognizer.energy_threshold = 300
+    recognizer.dynamic_energy_threshold = True
+    recognizer.dynamic_energy_adjustment_damping = 0.15
+    recognizer.dynamic_energy_ratio = 1.5
+    recognizer.pause_threshold = 1.0
+    return recognizer
+
+
+def run(path, calibration=None):
+    """Listen repeatedly over ``path``; ``calibration=None`` uses the tracker"""
+    recognizer = make_recognizer()
+    capture = CaptureStream(WavFileSource(path))
+    if calibration is None:
+        NoiseFloorTracker(recognizer).attach(capture)
+
+    capture.start()
+    counter = _CountingReader(capture.stream)
+    capture.stream = counter
+    seconds_per_chunk = capture.CHUNK / capture.SAMPLE_RATE
+
+    listens = triggers = 0
+    calibration_seconds = 0.0
+    cpu_start = time.process_time()
+
+    while not capture.finished:
+        before = counter.chunks
+        if calibration is not None:
+            recognizer.adjust_for_ambient_noise(capture, duration=calibration)
+        calibration_seconds += (counter.chunks - before) * seconds_per_chunk
+
+        try:
+            audio = recognizer.listen(capture, timeout=LISTEN_TIMEOUT, phrase_time_limit=PHRASE_TIME_LIMIT)
+            if audio.frame_data and not capture.finished:
+                triggers += 1
+        except sr.WaitTimeoutError:
+            pass
+        listens += 1
+
+    cpu_seconds = time.process_time() - cpu_start
+    audio_seconds = counter.chunks * seconds_per_chunk
+    capture.stop()
+
+    return {
+        'listens': listens,
+        'time_to_listen': calibration_seconds / max(listens, 1),
+        'false_triggers_per_min': triggers * 60 / max(audio_seconds, 1e-9),
+        'cpu_per_audio_second': cpu_seconds / max(audio_seconds, 1e-9),
+    }
+
+
+def synthetic_room(directory):
+    """Quiet room, then a fan switches on halfway, with occasional knocks"""
+    quiet = synth.room_noise(60, level=60, seed=0)
+    fan = synth.room_noise(60, level=250, hum_level=120, seed=3)
+    room = synth.mix(synth.noise_bursts(120, every=7.0, level=700), list(quiet) + list(fan))
+    path = os.path.join(directory, "synthetic_room.wav")
+    synth.write_wav(path, room)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='*', metavar="room.wav", help="speech-free room recordings")
+    args = parser.parse_args()
+    paths = args.paths
+    temp_dir = None
+    if not paths:
+        temp_dir = tempfile.TemporaryDirectory()
+        paths = [synthetic_room(temp_dir.name)]
+
+    print("=" * 72)
+    print(f"{'recording':24} {'mode':16} {'listens':>7} {'wait/listen':>12} {'false/min':>10} {'cpu/s':>8}")
+    print("-" * 72)
+    for path in paths:
+        name = os.path.basename(path)[:24]
+        modes = [(f"calibrate {d}s", d) for d in CALIBRATION_DURATIONS] + [("tracker", None)]
+        for label, duration in modes:
+            result = run(path, duration)
+            print(f"{name:24} {label:16} {result['listens']:>7} "
+                  f"{result['time_to_listen']:>11.3f}s {result['false_triggers_per_min']:>10.2f} "
+                  f"{result['cpu_per_audio_second']:>8.4f}")
+    print("=" * 72)
+
+    if temp_dir is not None:
+        temp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
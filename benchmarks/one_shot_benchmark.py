@@ -0,0 +1,139 @@
+"""
+One-Shot Command Benchmark
+End-to-end time per command when the wake word and the command are said
+in one breath ("computer next track"), against saying the wake word,
+waiting for the session to open and then giving the command
+Each interaction starts with the session closed. Time runs from the start
+of the wake word to the media key press, on the replayed audio's clock,
+so --speed 1 (the default) gives the figures a user would see. The wait
+in the two-step interactions is --reaction seconds after the wake word
+The secure mode runs over the joined recording as in replay_benchmark,
+with a shorter session window so that interactions do not run into
+each other
+
+Usage: python benchmarks/one_shot_benchmark.py [--interactions N] [--reaction S] [--speed X]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import replay_benchmark
+import synth
+from voice_assistant.modes import secure
+
+COMMANDS = [("next track", 'next'), ("volume up", 'volume_up'), ("pause", 'play_pause'),
+            ("previous track", 'previous'), ("volume down", 'volume_down'), ("mute", 'mute')]
+SESSION_SECONDS = 4  # session window while benchmarking
+
+
+def build_corpus(directory, interactions, reaction, password="open sesame"):
+    """corpus.json with alternating one-shot and two-step interactions; returns (kind, first, last) step indexes"""
+    def save(name, samples):
+        synth.write_wav(os.path.join(directory, name), samples)
+        return name
+
+    enroll = {
+        'voiceprint': [save(f"enroll_voice_{i}.wav", synth.spoken_phrase(password, seed=100 + i)) for i in range(3)],
+        'wake_word': [save(f"enroll_wake_{i}.wav", synth.keyword(synth.WORDS['computer'], seed=200 + i))
+                      for i in range(3)],
+    }
+    steps = [{'audio': save("unlock.wav", synth.spoken_phrase(password, seed=150)), 'text': password,
+              'expect': 'unlock', 'gap': 1.0}]
+    plan = []
+    closed = SESSION_SECONDS + 2.0  # lets the previous session expire first
+
+    for i in range(interactions):
+        text, intent = COMMANDS[i % len(COMMANDS)]
+        for kind in ("one-shot", "two-step"):
+            seed = 300 + 10 * len(plan)
+            first = len(steps)
+            if kind == "one-shot":
+                audio = replay_benchmark.one_shot_phrase(text, wake_seed=seed, seed=seed + 1)
+                steps.append({'audio': save(f"step_{first:02d}.wav", audio), 'text': f"computer {text}",
+                              'expect': intent, 'wake': True, 'gap': closed})
+            else:
+                wake = synth.keyword(synth.WORDS['computer'], seed=seed)
+                steps.append({'audio': save(f"step_{first:02d}.wav", wake), 'text': "computer",
+                              'expect': 'wake', 'gap': closed})
+                spoken = synth.spoken_phrase(text, seed=seed + 1)
+                steps.append({'audio': save(f"step_{first + 1:02d}.wav", spoken), 'text': text,
+                              'expect': intent, 'gap': reaction})
+            plan.append((kind, first, len(steps) - 1))
+
+    with open(os.path.join(directory, "corpus.json"), 'w') as f:
+        json.dump({'password': password, 'enroll': enroll, 'steps': steps}, f, indent=2)
+    return plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--interactions', type=int, default=4, help="commands of each kind")
+    parser.add_argument('--reaction', type=float, default=0.8,
+                        help="seconds between the wake word and a two-step command")
+    parser.add_argument('--speed', type=float, default=1.0, help="replay speed relative to real time")
+    parser.add_argument('--verbose', action='store_true', help="show the mode's own output")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    corpus_dir = os.path.join(work_dir, "corpus")
+    os.makedirs(corpus_dir)
+    plan = build_corpus(corpus_dir, args.interactions, args.reaction)
+    with open(os.path.join(corpus_dir, "corpus.json")) as f:
+        corpus = json.load(f)
+    recording, replay_dir, timeline = replay_benchmark.prepare(corpus_dir, corpus, work_dir)
+
+    secure.ACTIVE_SESSION_DURATION = SESSION_SECONDS
+    previous_dir = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        events, clock, metrics, wall = replay_benchmark.run_mode(recording, replay_dir, args.speed,
+                                                                 "pipeline", args.verbose)
+    finally:
+        os.chdir(previous_dir)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    results, _, false_accepts, false_rejects = replay_benchmark.score(corpus, timeline, events, clock)
+    presses = [event for event in events if event[0] == 'key']
+    recognitions = metrics.snapshot().get('recognition', {}).get('count', 0)
+
+    times = {"one-shot": [], "two-step": []}
+    done = {"one-shot": 0, "two-step": 0}
+    for kind, first, last in plan:
+        start, end = timeline[first][0], timeline[last][1]
+        outcomes = [results[index]['outcome'] for index in range(first, last + 1)]
+        press = next((event for event in presses if event[2] >= end), None)
+        if all(outcome == 'pass' for outcome in outcomes) and press is not None:
+            done[kind] += 1
+            times[kind].append(press[2] - start)
+
+    print("=" * 72)
+    print(f"{args.interactions} commands of each kind, {args.reaction:g} s wait before two-step commands, "
+          f"replayed at {args.speed:g}x")
+    print(f"{'interaction':<14} {'done':>7} {'mean s':>8} {'p50 s':>8} {'max s':>8}")
+    print("-" * 72)
+    for kind, values in times.items():
+        if values:
+            print(f"{kind:<14} {done[kind]:>3}/{args.interactions:<3} {np.mean(values):>8.2f} "
+                  f"{np.median(values):>8.2f} {np.max(values):>8.2f}")
+        else:
+            print(f"{kind:<14} {done[kind]:>3}/{args.interactions:<3} {'-':>8} {'-':>8} {'-':>8}")
+    print("-" * 72)
+    if times["one-shot"] and times["two-step"]:
+        print(f"time saved per command: {np.mean(times['two-step']) - np.mean(times['one-shot']):.2f} s")
+    print(f"recognitions: {recognitions} for the password and {2 * args.interactions} commands "
+          f"(the wake word itself is spotted, not recognized)")
+    print(f"false accepts {false_accepts}, false rejects {false_rejects}, wall {wall:.1f} s")
+    print("time: start of the wake word to the key press, in seconds of replayed audio")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
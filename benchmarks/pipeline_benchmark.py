@@ -0,0 +1,155 @@
+"""
+Pipeline Throughput Benchmark
+Pushes a burst of short commands, spoken back to back, through a
+real-time replay of the microphone and compares the old sequential
+listen -> recognize -> dispatch loop with the RecognitionPipeline
+
+Recognition latency is simulated with the replay backend's fixed delay,
+standing in for a cloud round trip. Exits non-zero if a pipeline run
+drops or fails a phrase, misses a command or dispatches out of order;
+the sequential loop is the baseline and is expected to lose some.
+
+Usage: python benchmarks/pipeline_benchmark.py [--phrases N] [--delay SECONDS]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import speech_recognition as sr
+
+import synth
+from voice_assistant.audio_capture import CaptureStream, WavFileSource
+from voice_assistant.pipeline import RecognitionPipeline
+from voice_assistant.recognizer_backends import ReplayBackend
+
+GAP_SECONDS = 0.6  # silence between commands in the burst
+
+
+def build_burst(count, delay):
+    """A WAV of ``count`` back-to-back commands, its backend and each command's end time"""
+    backend = ReplayBackend(tempfile.mkdtemp(), delay=delay)
+    words = list(synth.WORDS.items())
+    track = [synth.room_noise(0.5, seed=0)]
+    ends = {}
+    for i in range(count):
+        word, segments = words[i % len(words)]
+        spoken = synth.keyword(segments, seed=10 + i)
+        transcript = f"{word} {i}"
+        backend.add(transcript, spoken.tobytes(), transcript)
+        track.append(spoken)
+        ends[transcript] = sum(len(part) for part in track) / synth.SAMPLE_RATE
+        track.append(synth.room_noise(GAP_SECONDS, seed=100 + i))
+    track.append(synth.room_noise(1.0, seed=999))
+
+    path = os.path.join(tempfile.mkdtemp(), "burst.wav")
+    synth.write_wav(path, np.concatenate(track))
+    return path, backend, ends
+
+
+def make_recognizer():
+    recognizer = sr.Recognizer()
+    recognizer.energy_threshold = 300
+    recognizer.dynamic_energy_threshold = False
+    recognizer.pause_threshold = 0.4
+    recognizer.non_speaking_duration = 0.3
+    return recognizer
+
+
+def run_sequential(path, backend, buffer_seconds):
+    """The original loop: nothing is endpointed while a phrase is being recognized"""
+    capture = CaptureStream(WavFileSource(path, realtime=True), buffer_seconds=buffer_seconds)
+    recognizer = make_recognizer()
+    dispatched = []
+    start = time.perf_counter()
+    capture.start()
+
+    while not capture.finished:
+        try:
+            audio = recognizer.listen(capture, timeout=1, phrase_time_limit=4)
+            if not audio.frame_data:
+                continue
+            dispatched.append((backend.transcribe(audio).text, time.perf_counter() - start))
+        except (sr.WaitTimeoutError, sr.UnknownValueError):
+            pass
+
+    capture.stop()
+    return dispatched, capture.overruns, None
+
+
+def run_pipeline(path, backend, buffer_seconds, workers):
+    capture = CaptureStream(WavFileSource(path, realtime=True), buffer_seconds=buffer_seconds)
+    recognizer = make_recognizer()
+    dispatched = []
+    start = time.perf_counter()
+
+    def dispatch(text, transcription, phrase):
+        dispatched.append((text, time.perf_counter() - start))
+
+    pipeline = RecognitionPipeline(capture, recognizer, backend, dispatch, workers=workers, queue_size=8)
+    pipeline.start()
+    pipeline.wait_finished()
+    capture.stop()
+    return dispatched, capture.overruns, pipeline.stats
+
+
+def report(label, dispatched, overruns, stats, ends, elapsed_audio):
+    """Print one row; returns what went wrong, if anything"""
+    order = [text for text, _ in dispatched]
+    in_order = order == sorted(order, key=lambda text: ends.get(text, 0))
+    latencies = [at - ends[text] for text, at in dispatched if text in ends]
+    finished = max((at for _, at in dispatched), default=0.0)
+
+    print(f"{label:22} {len(dispatched):>4}/{len(ends):<4} {overruns:>8} "
+          f"{np.mean(latencies) if latencies else float('nan'):>9.2f}s "
+          f"{np.max(latencies) if latencies else float('nan'):>8.2f}s "
+          f"{len(dispatched) / max(finished, elapsed_audio):>9.2f} {'yes' if in_order else 'NO':>8}")
+    if stats is not None:
+        print(f"{'':22} queue high water {stats.queue_high_water}, dropped {stats.dropped}, "
+              f"failed {stats.failed}")
+
+    failures = []
+    if len(dispatched) != len(ends):
+        failures.append(f"{len(dispatched)} of {len(ends)} commands dispatched")
+    if not in_order:
+        failures.append("dispatched out of order")
+    if stats is not None and (stats.dropped or stats.failed):
+        failures.append(f"{stats.dropped} phrases dropped, {stats.failed} failed")
+    return [f"{label}: {failure}" for failure in failures]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--phrases', type=int, default=12)
+    parser.add_argument('--delay', type=float, default=1.5, help="simulated recognition latency")
+    parser.add_argument('--buffer', type=float, default=3.0, help="capture ring buffer seconds")
+    args = parser.parse_args()
+
+    path, backend, ends = build_burst(args.phrases, args.delay)
+    audio_seconds = synth.read_wav(path)[0].size / synth.SAMPLE_RATE
+
+    print("=" * 80)
+    print(f"Burst: {args.phrases} commands in {audio_seconds:.1f}s, recognition delay {args.delay}s")
+    print(f"{'mode':22} {'done':>9} {'overruns':>8} {'mean lat':>10} {'max lat':>9} "
+          f"{'cmds/s':>9} {'ordered':>8}")
+    print("-" * 80)
+
+    report("sequential", *run_sequential(path, backend, args.buffer), ends, audio_seconds)
+    failures = []
+    for workers in (1, 3):
+        failures += report(f"pipeline, {workers} worker(s)", *run_pipeline(path, backend, args.buffer, workers),
+                           ends, audio_seconds)
+    print("=" * 80)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
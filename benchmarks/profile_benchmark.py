@@ -0,0 +1,192 @@
+"""
+Voice Profile Benchmark
+Unlock and wake word cost with hundreds of enrolled profiles, matched in
+one pass by ProfileIndex and one DtwBank, against going through the
+profiles one at a time
+Each synthetic profile is a voice (pitch and formant scale), a two-word
+password and one of a few wake words, enrolled from three recordings of
+each. Genuine attempts are the owner saying their password again;
+impostors are unenrolled voices saying an enrolled profile's password
+Unlock: indexed is one embedding and one matrix product, then the
+password hashes of the profiles the voice matched; one by one is
+Voiceprint.verify per profile, then the same hashes. Wake word: CPU per
+second of audio to step every profile's templates, all at once or each
+on its own, and whether a detection names the right profile
+
+Usage: python benchmarks/profile_benchmark.py [--profiles N ...] [--attempts N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synth
+from voice_assistant.credentials import check_password, hash_password
+from voice_assistant.frontend import phrase_features
+from voice_assistant.profiles import ProfileIndex
+from voice_assistant.speaker import Voiceprint, create_encoder
+from voice_assistant.wake_word import DtwBank, WakeWordSpotter
+
+PASSWORD_WORDS = ["alpha", "gamma", "delta", "open", "sesame", "river", "stone", "maple", "cobalt", "orbit",
+                  "velvet", "falcon", "harbor", "lemon", "quartz", "tango", "willow", "ember", "nova", "pepper"]
+WAKE_WORDS = ["computer", "banana", "weather"]
+SCRYPT_COST = {'n': 2 ** 12, 'r': 8, 'p': 1}  # cheaper than the default so the one-by-one runs finish
+
+
+def profile_voices(count, seed):
+    """Distinct (pitch scale, formant scale) voices, one per profile"""
+    rng = np.random.default_rng(seed)
+    return [(float(rng.uniform(0.75, 1.35)), float(rng.uniform(0.8, 1.25))) for _ in range(count)]
+
+
+def utterance(text, voice, seed):
+    """``text`` spoken in ``voice`` in a quiet room"""
+    spoken = synth.spoken_phrase(text, seed=seed, voice=voice)
+    return synth.mix(synth.room_noise(0.4 + len(spoken) / synth.SAMPLE_RATE, seed=seed), np.concatenate(
+        [np.zeros(int(0.2 * synth.SAMPLE_RATE), np.int16), spoken]))
+
+
+def build_profiles(count, encoder, seed):
+    """(index, voiceprints, password records, spotters, passwords, voices, wake words) for ``count`` profiles"""
+    rng = np.random.default_rng(seed + 1)
+    voices = profile_voices(count, seed)
+    index = ProfileIndex(encoder)
+    voiceprints, records, spotters, passwords, wake_words = [], [], [], [], []
+    for i, voice in enumerate(voices):
+        password = " ".join(rng.choice(PASSWORD_WORDS, size=2, replace=False))
+        wake_word = WAKE_WORDS[i % len(WAKE_WORDS)]
+        voiceprint = Voiceprint(encoder)
+        voiceprint.enroll([phrase_features(utterance(password, voice, seed=1000 * i + k)) for k in range(3)])
+        spotter = WakeWordSpotter()
+        for k in range(3):
+            spotter.enroll(synth.keyword(synth.WORDS[wake_word], seed=1000 * i + 10 + k, voice=voice))
+        index.add(f"user{i}", voiceprint, spotter)
+        voiceprints.append(voiceprint)
+        records.append(hash_password(password, **SCRYPT_COST))
+        spotters.append(spotter)
+        passwords.append(password)
+        wake_words.append(wake_word)
+    return index, voiceprints, records, spotters, passwords, voices, wake_words
+
+
+def unlock_indexed(index, records, features, password):
+    """(profile unlocked or None, password hashes checked)"""
+    checks = 0
+    for name in index.identify(features):
+        checks += 1
+        if check_password(records[int(name[4:])], password):
+            return name, checks
+    return None, checks
+
+
+def unlock_one_by_one(voiceprints, records, features, password):
+    """The same decision, with each profile's voiceprint asked in turn"""
+    checks = 0
+    accepted = [(distance, i) for i, voiceprint in enumerate(voiceprints)
+                for ok, distance in [voiceprint.verify(features)] if ok]
+    for _, i in sorted(accepted):
+        checks += 1
+        if check_password(records[i], password):
+            return f"user{i}", checks
+    return None, checks
+
+
+def unlock_trials(profiles, attempts, seed):
+    """Per method: (latencies, hash checks, genuine unlocked as themselves, impostors unlocked)"""
+    index, voiceprints, records, _, passwords, voices, _ = profiles
+    rng = np.random.default_rng(seed + 2)
+    results = {'indexed': ([], [], 0, 0), 'one by one': ([], [], 0, 0)}
+    for attempt in range(attempts):
+        owner = int(rng.integers(len(voices)))
+        impostor = (float(rng.uniform(0.75, 1.35)), float(rng.uniform(0.8, 1.25)))
+        for genuine, voice in ((True, voices[owner]), (False, impostor)):
+            features = phrase_features(utterance(passwords[owner], voice, seed=900000 + 2 * attempt + genuine))
+            for method, unlock in (('indexed', lambda: unlock_indexed(index, records, features, passwords[owner])),
+                                   ('one by one', lambda: unlock_one_by_one(voiceprints, records, features,
+                                                                            passwords[owner]))):
+                latencies, checks, right, false = results[method]
+                start = time.perf_counter()
+                name, count = unlock()
+                latencies.append(time.perf_counter() - start)
+                checks.append(count)
+                results[method] = (latencies, checks, right + (genuine and name == f"user{owner}"),
+                                   false + (not genuine and name is not None))
+    return results
+
+
+def wake_trials(profiles, seed, seconds=2.0):
+    """(CPU per audio second all at once, one by one, detections naming the right profile, detections)"""
+    _, _, _, spotters, _, voices, wake_words = profiles
+    templates = [template for spotter in spotters for template in spotter.templates]
+    frames = WakeWordSpotter().extractor.features(synth.room_noise(seconds, seed=seed))
+    frames /= np.maximum(np.linalg.norm(frames, axis=1, keepdims=True), 1e-9)
+    hop = WakeWordSpotter().extractor.hop_length / synth.SAMPLE_RATE
+
+    bank = DtwBank(templates)
+    start = time.process_time()
+    for frame in frames:
+        bank.step(frame)
+    together = (time.process_time() - start) / (len(frames) * hop)
+
+    banks = [DtwBank([template]) for template in templates]
+    start = time.process_time()
+    for frame in frames[:len(frames) // 4]:
+        for single in banks:
+            single.step(frame)
+    apart = (time.process_time() - start) / (len(frames) // 4 * hop)
+
+    spotter = WakeWordSpotter()
+    for i, enrolled in enumerate(spotters):
+        spotter.add(enrolled.templates, enrolled.threshold, owner=f"user{i}")
+    right = heard = 0
+    rng = np.random.default_rng(seed + 3)
+    for trial in range(10):
+        owner = int(rng.integers(len(voices)))
+        spoken = synth.keyword(synth.WORDS[wake_words[owner]], seed=800000 + trial, voice=voices[owner])
+        spotter.reset()
+        audio = np.concatenate((synth.room_noise(0.3, seed=trial), spoken, synth.room_noise(0.5, seed=trial + 1)))
+        if spotter.process(audio.tobytes()):
+            heard += 1
+            right += spotter.detection_owner == f"user{owner}"
+    return together, apart, right, heard
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', type=int, nargs='+', default=[30, 100, 300])
+    parser.add_argument('--attempts', type=int, default=20, help="genuine and impostor unlock attempts each")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    encoder = create_encoder("mfcc")
+
+    print("=" * 92)
+    print(f"{args.attempts} genuine and {args.attempts} impostor unlock attempts per store; "
+          f"scrypt n={SCRYPT_COST['n']}")
+    print(f"{'profiles':>8} {'unlock':<11} {'p50 ms':>8} {'p95 ms':>8} {'hashes':>7} {'genuine':>9} {'impostor':>9}"
+          f" {'wake cpu/s':>11} {'wake owner':>11}")
+    for count in args.profiles:
+        print("-" * 92)
+        profiles = build_profiles(count, encoder, args.seed)
+        unlocks = unlock_trials(profiles, args.attempts, args.seed)
+        together, apart, right, heard = wake_trials(profiles, args.seed)
+        wake = {'indexed': (together, f"{right}/{heard}"), 'one by one': (apart, "")}
+        for method, (latencies, checks, genuine, false) in unlocks.items():
+            p50, p95 = 1000 * np.percentile(latencies, [50, 95])
+            cpu, owner = wake[method]
+            print(f"{count:>8} {method:<11} {p50:>8.1f} {p95:>8.1f} {np.mean(checks):>7.2f} "
+                  f"{genuine:>5}/{args.attempts:<3} {false:>5}/{args.attempts:<3} {1000 * cpu:>9.1f}ms {owner:>11}")
+            count = ""
+    print("-" * 92)
+    print("hashes: password hashes checked per attempt; genuine: owners unlocked as themselves;")
+    print("impostor: unenrolled voices let in; wake cpu/s: CPU to step every profile's wake word templates")
+    print("per second of audio (over 1000 ms cannot keep up); wake owner: detections naming the speaker")
+    print("=" * 92)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Racing Recognition Benchmark
+Tail latency and lost commands with one recognizer against several raced
+by RacingBackend, on simulated engines with realistic latency spreads
+cloud: fast on average, a long lognormal tail, occasional stalls and
+network errors. local: steady CPU time, often unsure of itself.
+grammar: a small command decoder, very fast but only for phrases in its
+grammar. A transcript is wrong about as often as its confidence says;
+every phrase gets the same draws in every configuration
+Simulated seconds are slept at --time-scale of real time; the figures
+are reported back in simulated seconds
+
+Usage: python benchmarks/racing_benchmark.py [--phrases N] [--time-scale X]
+"""
+
+import argparse
+import os
+import sys
+import time
+import zlib
+
+import numpy as np
+import speech_recognition as sr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice_assistant.racing import RacingBackend
+from voice_assistant.recognizer_backends import RecognizerBackend
+
+# name: (median s, lognormal sigma, stall rate, stall s, error rate, confidence range, coverage)
+ENGINES = {
+    'cloud': (0.55, 0.55, 0.03, 6.0, 0.05, (0.80, 0.97), 1.0),
+    'local': (0.45, 0.15, 0.0, 0.0, 0.0, (0.50, 0.95), 1.0),
+    'grammar': (0.10, 0.25, 0.0, 0.0, 0.0, (0.85, 0.99), 0.7),
+}
+TRANSCRIPT = "next track"
+CONFIGURATIONS = [["cloud"], ["local"], ["local", "cloud"], ["grammar", "local", "cloud"]]
+
+
+class SimulatedBackend(RecognizerBackend):
+    """Sleeps a drawn latency, then answers, fails or does not understand"""
+
+    def __init__(self, name, seed, time_scale):
+        self.name = name
+        self.seed = seed
+        self.time_scale = time_scale
+        self.calls = 0
+
+    def draw(self, index):
+        """(latency, 'error'|'unknown'|'text'|'wrong', confidence) for phrase ``index``"""
+        median, sigma, stall_rate, stall, error_rate, (low, high), coverage = ENGINES[self.name]
+        rng = np.random.default_rng([self.seed, zlib.crc32(self.name.encode()), index])
+        latency = median * float(np.exp(sigma * rng.standard_normal()))
+        if rng.random() < stall_rate:
+            latency += stall
+        if rng.random() < error_rate:
+            return latency, 'error', 0.0
+        if rng.random() >= coverage:
+            return latency, 'unknown', 0.0
+        confidence = float(rng.uniform(low, high))
+        return latency, 'text' if rng.random() < confidence else 'wrong', confidence
+
+    def _recognize(self, audio):
+        self.calls += 1
+        latency, outcome, confidence = self.draw(int.from_bytes(audio.frame_data, 'little'))
+        time.sleep(latency * self.time_scale)
+        if outcome == 'error':
+            raise sr.RequestError("simulated network error")
+        if outcome == 'unknown':
+            raise sr.UnknownValueError()
+        return TRANSCRIPT if outcome == 'text' else "necks truck", confidence
+
+
+def run(names, phrases, seed, time_scale, timeout):
+    """Per-phrase (simulated latency, correct) or None when lost, the backend calls made and the backend"""
+    backends = [SimulatedBackend(name, seed, time_scale) for name in names]
+    backend = backends[0] if len(backends) == 1 else RacingBackend(backends, timeout=timeout * time_scale)
+    latencies = []
+    for index in range(phrases):
+        audio = sr.AudioData(index.to_bytes(4, 'little'), 16000, 2)
+        start = time.perf_counter()
+        try:
+            text = backend.transcribe(audio).text
+        except (sr.RequestError, sr.UnknownValueError):
+            latencies.append(None)
+            continue
+        latencies.append(((time.perf_counter() - start) / time_scale, text == TRANSCRIPT))
+    backend.close()
+    return latencies, sum(b.calls for b in backends), backend
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--phrases', type=int, default=200)
+    parser.add_argument('--time-scale', type=float, default=0.05, help="real seconds slept per simulated second")
+    parser.add_argument('--timeout', type=float, default=8.0, help="race timeout in simulated seconds")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"{args.phrases} phrases, simulated engines slept at {args.time_scale:g}x real time")
+    print(f"{'recognizers':<26} {'lost':>5} {'wrong':>6} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'max s':>7} {'calls':>7}")
+    print("-" * 80)
+    for names in CONFIGURATIONS:
+        latencies, calls, backend = run(names, args.phrases, args.seed, args.time_scale, args.timeout)
+        heard = [latency for latency in latencies if latency is not None]
+        wrong = sum(not correct for _, correct in heard)
+        heard = [latency for latency, _ in heard]
+        p50, p95, p99 = np.percentile(heard, [50, 95, 99])
+        label = names[0] if len(names) == 1 else "race " + ",".join(names)
+        print(f"{label:<26} {len(latencies) - len(heard):>5} {wrong:>6} {p50:>7.2f} {p95:>7.2f} {p99:>7.2f} "
+              f"{max(heard):>7.2f} {calls:>7}")
+        if isinstance(backend, RacingBackend):
+            stats = backend.stats()
+            wins = ", ".join(f"{name} {count}" for name, count in stats['wins'].items())
+            print(f"{'':<26} wins {wins}; {stats['fallbacks']} by fallback, {stats['cancelled']} cancelled")
+    print("-" * 80)
+    print("lost: phrases with no transcript (network error, not understood or a stall past the timeout)")
+    print("wrong: a transcript other than the one spoken")
+    print("latency: phrase handed over to transcript returned; calls: backend calls started")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
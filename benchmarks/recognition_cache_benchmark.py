@@ -0,0 +1,125 @@
+"""
+Recognition Cache Benchmark
+Replays a session of repeated short commands - each repeat a fresh take
+with its own noise, loudness and a slightly different voice - through the
+replay backend with and without the fingerprint cache in front of it
+Counts recognition calls avoided and wrong transcripts returned from the
+cache for several distance thresholds; with --delay standing in for a
+network round trip, shows the recognition time saved
+
+Usage: python benchmarks/recognition_cache_benchmark.py [--phrases N] [--delay S]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import speech_recognition as sr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synth
+from voice_assistant.recognition_cache import CachedBackend
+from voice_assistant.recognizer_backends import ReplayBackend
+
+# Spoken often, so repeats dominate; weights roughly follow a listening session
+VOCABULARY = {
+    "computer": 6, "next": 4, "pause": 3, "play": 3, "volume up": 3, "volume down": 2,
+    "previous": 1, "mute": 1, "open sesame": 1, "next track": 1, "turn it up": 1,
+}
+THRESHOLDS = [0.1, 0.15, 0.2, 0.25, 0.3]
+
+
+def take(text, rng, index):
+    """One captured phrase: a new take of ``text`` between stretches of room audio"""
+    voice = (rng.uniform(0.97, 1.03), rng.uniform(0.98, 1.02))
+    if text == "computer":
+        words = synth.keyword(synth.WORDS['computer'], seed=index, voice=voice)
+    else:
+        words = synth.spoken_phrase(text, seed=index, voice=voice)
+    words = (words * rng.uniform(0.6, 1.2)).astype(np.int16)
+    before = synth.room_noise(rng.uniform(0.2, 0.5), seed=2 * index)
+    after = synth.room_noise(rng.uniform(0.6, 0.9), seed=2 * index + 1)
+    return words, np.concatenate([before, words, after])
+
+
+def session(count, seed):
+    """(text, phrase samples, words samples) for ``count`` phrases"""
+    rng = np.random.default_rng(seed)
+    texts = list(VOCABULARY)
+    weights = np.array(list(VOCABULARY.values()), dtype=float)
+    picks = rng.choice(len(texts), size=count, p=weights / weights.sum())
+    phrases = []
+    for index, pick in enumerate(picks):
+        words, phrase = take(texts[pick], rng, index)
+        phrases.append((texts[pick], phrase, words))
+    return phrases
+
+
+def replay_backend(phrases, delay):
+    """Replay backend that knows every take, with a simulated recognition delay"""
+    backend = ReplayBackend.__new__(ReplayBackend)
+    backend.sample_rate = synth.SAMPLE_RATE
+    backend.delay = delay
+    backend.fixtures = []
+    for index, (text, _, words) in enumerate(phrases):
+        backend.add(f"take_{index}", words.tobytes(), text)
+    return backend
+
+
+def run(backend, phrases):
+    """(wrong transcripts, failures, seconds) over the session"""
+    wrong = failed = 0
+    started = time.perf_counter()
+    for text, phrase, _ in phrases:
+        audio = sr.AudioData(phrase.tobytes(), synth.SAMPLE_RATE, 2)
+        try:
+            if backend.transcribe(audio).text != text:
+                wrong += 1
+        except sr.UnknownValueError:
+            failed += 1
+    return wrong, failed, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--phrases', type=int, default=200)
+    parser.add_argument('--delay', type=float, default=0.0, help="simulated recognition latency in seconds")
+    parser.add_argument('--capacity', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    phrases = session(args.phrases, args.seed)
+    print("=" * 74)
+    print(f"{len(phrases)} phrases, {len(VOCABULARY)} distinct commands, capacity {args.capacity}, "
+          f"delay {1000 * args.delay:.0f} ms")
+    print("-" * 74)
+    print(f"{'cache':<16} {'calls':>7} {'avoided':>9} {'wrong':>7} {'failed':>7} {'seconds':>9} {'per phrase':>12}")
+
+    backend = replay_backend(phrases, args.delay)
+    wrong, failed, seconds = run(backend, phrases)
+    print(f"{'none':<16} {len(phrases):>7} {'0%':>9} {wrong:>7} {failed:>7} {seconds:>9.2f} "
+          f"{1000 * seconds / len(phrases):>10.1f}ms")
+
+    for threshold in THRESHOLDS:
+        cached = CachedBackend(replay_backend(phrases, args.delay), capacity=args.capacity, threshold=threshold)
+        wrong, failed, seconds = run(cached, phrases)
+        print(f"{'threshold ' + str(threshold):<16} {cached.misses:>7} {cached.hits / len(phrases):>9.0%} "
+              f"{wrong:>7} {failed:>7} {seconds:>9.2f} {1000 * seconds / len(phrases):>10.1f}ms")
+
+    # Cost of the fingerprint itself
+    cached = CachedBackend(replay_backend(phrases[:1], 0.0))
+    samples = phrases[0][1]
+    started = time.perf_counter()
+    for _ in range(50):
+        cached.fingerprint(samples)
+    print("-" * 74)
+    print(f"fingerprint: {1000 * (time.perf_counter() - started) / 50:.2f} ms for a {len(samples) / synth.SAMPLE_RATE:.1f} s phrase")
+    print("wrong: cache returned another phrase's transcript")
+    print("=" * 74)
+
+
+if __name__ == "__main__":
+    main()
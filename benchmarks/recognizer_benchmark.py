@@ -0,0 +1,126 @@
+"""
+Recognizer Backend Benchmark
+Replays a recorded session through the capture stream, endpoints it with
+sr.Recognizer.listen and transcribes every phrase with a backend
+Reports accuracy and per-phrase latency with no live microphone
+
+Usage: python benchmarks/recognizer_benchmark.py [--backend SPEC] [--fixtures DIR]
+SPEC is google, local or replay:<dir> (default: replay on the fixtures).
+Without --fixtures a synthetic fixture set is generated. Each fixture is
+<name>.wav plus <name>.txt; they are played back-to-back with room noise
+between them.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import speech_recognition as sr
+
+import synth
+from voice_assistant.audio_capture import CaptureStream, WavFileSource
+from voice_assistant.recognizer_backends import create_backend
+
+
+def write_synthetic_fixtures(directory):
+    """One fixture per synthetic word"""
+    for i, (word, segments) in enumerate(synth.WORDS.items()):
+        synth.write_wav(os.path.join(directory, f"{word}.wav"), synth.keyword(segments, seed=i))
+        with open(os.path.join(directory, f"{word}.txt"), 'w') as f:
+            f.write(word)
+
+
+def build_session(directory, repeats=5):
+    """Concatenate fixtures with noise gaps; return the session path and expected transcripts"""
+    names = sorted(name[:-4] for name in os.listdir(directory) if name.endswith(".wav"))
+    track, expected = [synth.room_noise(1.0, seed=0)], []
+    for round_index in range(repeats):
+        for i, name in enumerate(names):
+            samples, rate = synth.read_wav(os.path.join(directory, name + ".wav"))
+            if rate != synth.SAMPLE_RATE:
+                raise ValueError(f"{name}.wav: expected {synth.SAMPLE_RATE} Hz")
+            track.append(samples)
+            track.append(synth.room_noise(1.2, seed=round_index * 100 + i))
+            with open(os.path.join(directory, name + ".txt"), 'r') as f:
+                expected.append(f.read().strip().lower())
+
+    session_path = os.path.join(tempfile.mkdtemp(), "session.wav")
+    synth.write_wav(session_path, np.concatenate(track))
+    return session_path, expected
+
+
+def run(backend, session_path, expected):
+    recognizer = sr.Recognizer()
+    recognizer.energy_threshold = 300
+    recognizer.dynamic_energy_threshold = False
+    recognizer.pause_threshold = 0.8
+
+    capture = CaptureStream(WavFileSource(session_path))
+    capture.start()
+
+    heard, latencies = [], []
+    start = time.perf_counter()
+    while not capture.finished:
+        try:
+            audio = recognizer.listen(capture, timeout=5, phrase_time_limit=4)
+        except sr.WaitTimeoutError:
+            continue
+        if not audio.frame_data:
+            continue
+        try:
+            result = backend.transcribe(audio)
+            heard.append(result.text.lower())
+            latencies.append(result.latency)
+        except sr.UnknownValueError:
+            heard.append("")
+        except sr.RequestError as e:
+            print(f"Backend error: {e}")
+            heard.append("")
+    elapsed = time.perf_counter() - start
+    capture.stop()
+
+    correct = sum(1 for got, want in zip(heard, expected) if got == want)
+    return {
+        'phrases': len(heard),
+        'expected': len(expected),
+        'accuracy': correct / len(expected) if expected else 0.0,
+        'latency_p50': float(np.percentile(latencies, 50)) if latencies else None,
+        'latency_p95': float(np.percentile(latencies, 95)) if latencies else None,
+        'phrases_per_second': len(heard) / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', help="google, local or replay:<dir>")
+    parser.add_argument('--fixtures', help="directory of <name>.wav / <name>.txt pairs")
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    fixtures = args.fixtures
+    if fixtures is None:
+        fixtures = tempfile.mkdtemp()
+        write_synthetic_fixtures(fixtures)
+
+    backend = create_backend(args.backend or f"replay:{fixtures}")
+    session_path, expected = build_session(fixtures, args.repeats)
+    result = run(backend, session_path, expected)
+
+    print("=" * 60)
+    print(f"Backend: {backend.name}")
+    print(f"Phrases: {result['phrases']} heard / {result['expected']} expected")
+    print(f"Accuracy: {result['accuracy'] * 100:.1f}%")
+    if result['latency_p50'] is not None:
+        print(f"Transcribe latency: p50 {result['latency_p50'] * 1000:.2f} ms, "
+              f"p95 {result['latency_p95'] * 1000:.2f} ms")
+    print(f"Throughput: {result['phrases_per_second']:.1f} phrases/s")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
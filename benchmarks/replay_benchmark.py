@@ -0,0 +1,374 @@
+"""
+Replay Benchmark
+Runs the secure mode's full state machine over a corpus of recorded
+utterances with expected outcomes: password unlock, wake word, the session
+window, media commands and locking
+The corpus is joined into one recording and replayed faster than real time.
+Session timers run on a clock driven by the replayed audio, and a recording
+keyboard stands in for pynput. Each step is scored from what the mode did
+while that step's audio was playing
+
+Reports commands per second, per-stage latency, command latency, false
+accepts and false rejects. Latencies are wall time at the replay speed,
+so endpointing silences shrink with --speed; --speed 1 gives live figures.
+--output writes the results as JSON and --compare prints them against an
+earlier results file
+
+Corpus: a directory with corpus.json and the WAV files it names
+  {"password": "open sesame",
+   "enroll": {"voiceprint": [wav, ...], "wake_word": [wav, ...]},
+   "steps": [{"audio": "unlock.wav", "text": "open sesame", "expect": "unlock", "gap": 1.5}, ...]}
+expect is "unlock", "wake", "lock", a media intent (volume_up, next, ...)
+or null when the step must have no effect; "presses" optionally checks
+how many key presses a command sends, and "wake": true marks a command
+said in one breath after the wake word, which must open the session too. Without --corpus a synthetic corpus
+is generated (--save-corpus keeps it)
+
+Usage: python benchmarks/replay_benchmark.py [--corpus DIR] [--speed X] [--output FILE] [--compare FILE]
+"""
+
+import argparse
+import bisect
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synth
+from voice_assistant.cli import build_parser
+from voice_assistant.credentials import CredentialStore
+from voice_assistant.intents import COMMANDS
+from voice_assistant.keys import KeyDispatcher
+from voice_assistant.metrics import Metrics
+from voice_assistant import session
+from voice_assistant.modes import secure
+from voice_assistant.speaker import MfccEncoder, Voiceprint
+from voice_assistant.wake_word import WakeWordSpotter
+
+INTENT_KEYS = {command.intent: command.key for command in COMMANDS}
+OWNER = (1.0, 1.0)
+IMPOSTOR = (1.35, 1.25)  # pitch and formant scale of a different speaker
+HEADLINE = ['steps_passed', 'false_accepts', 'false_rejects', 'commands_per_second',
+            'command_latency_p50_ms', 'command_latency_p95_ms', 'realtime_factor']
+
+
+def build_synthetic_corpus(directory, password="open sesame"):
+    """Write WAVs and corpus.json covering each state of the secure mode"""
+    def save(name, samples):
+        synth.write_wav(os.path.join(directory, name), samples)
+        return name
+
+    def phrase(text, seed, voice=OWNER):
+        return synth.spoken_phrase(text, seed=seed, voice=voice)
+
+    enroll = {
+        'voiceprint': [save(f"enroll_voice_{i}.wav", phrase(password, seed=100 + i)) for i in range(3)],
+        'wake_word': [save(f"enroll_wake_{i}.wav", synth.keyword(synth.WORDS['computer'], seed=200 + i))
+                      for i in range(3)],
+    }
+
+    wake = 0
+    steps = []
+
+    def step(text, expect, gap=1.5, presses=None, audio=None, voice=OWNER, one_shot=False):
+        nonlocal wake
+        index = len(steps)
+        if audio is None:
+            if text == "computer":
+                wake += 1
+                audio = synth.keyword(synth.WORDS['computer'], seed=300 + wake)
+            elif one_shot:
+                wake += 1
+                audio = one_shot_phrase(text, wake_seed=300 + wake, seed=400 + index, voice=voice)
+                text = f"computer {text}"
+            else:
+                audio = phrase(text, seed=400 + index, voice=voice)
+        entry = {'audio': save(f"step_{index:02d}.wav", audio), 'text': text, 'expect': expect, 'gap': gap}
+        if presses is not None:
+            entry['presses'] = presses
+        if one_shot:
+            entry['wake'] = True
+        steps.append(entry)
+
+    step(password, None, voice=IMPOSTOR, gap=1.0)  # right words, wrong speaker
+    step("volume up", None)  # a command while locked is only a wrong password
+    step(password, 'unlock')
+    step("play", None)  # unlocked, but no session yet
+    step("computer", 'wake')
+    step("volume up", 'volume_up', presses=2)
+    step("next track", 'next')
+    step("volume down three", 'volume_down', presses=3)
+    step(None, None, audio=synth.music(2.0))  # not speech: must not reach recognition
+    step("pause", 'play_pause')
+    step("mute", None, gap=secure.ACTIVE_SESSION_DURATION + 5)  # session has expired
+    step("computer", 'wake')
+    step("previous", 'previous')
+    step("volume up", 'volume_up', gap=secure.ACTIVE_SESSION_DURATION + 5, one_shot=True, presses=2)
+    step("lock program", 'lock')
+    step("play", None)  # locked again
+    step(password, 'unlock')
+
+    corpus = {'password': password, 'enroll': enroll, 'steps': steps}
+    with open(os.path.join(directory, "corpus.json"), 'w') as f:
+        json.dump(corpus, f, indent=2)
+
+
+def one_shot_phrase(text, wake_seed, seed, pause=0.15, voice=OWNER):
+    """The wake word and a command in one breath, ``pause`` seconds apart"""
+    return np.concatenate((synth.keyword(synth.WORDS['computer'], seed=wake_seed, voice=voice),
+                           synth.room_noise(pause, level=30, hum_level=0, seed=seed),
+                           synth.spoken_phrase(text, seed=seed, voice=voice)))
+
+
+class AudioClock:
+    """Seconds of replayed audio, ticked by the capture thread, with the wall time of each tick"""
+
+    def __init__(self, sample_rate, sample_width):
+        self.bytes_per_second = sample_rate * sample_width
+        self.seconds = 0.0
+        self.ticks = []  # (audio seconds, monotonic) after each chunk
+        self._lock = threading.Lock()
+
+    def tick(self, chunk):
+        with self._lock:
+            self.seconds += len(chunk) / self.bytes_per_second
+            self.ticks.append((self.seconds, time.monotonic()))
+
+    def __call__(self):
+        return self.seconds
+
+    def wall_time(self, audio_seconds):
+        """Monotonic time at which the replay reached ``audio_seconds``"""
+        with self._lock:
+            index = bisect.bisect_left(self.ticks, (audio_seconds,))
+            return self.ticks[min(index, len(self.ticks) - 1)][1] if self.ticks else None
+
+
+class RecordingKeyboard:
+    """Fake pynput Controller: records presses against the audio clock"""
+
+    def __init__(self, events, clock):
+        self.events = events
+        self.clock = clock
+
+    def press(self, key):
+        self.events.append(('key', key, self.clock(), time.monotonic()))
+
+    def release(self, key):
+        pass
+
+
+def record_transitions(events, clock):
+    """Session listener logging unlock, wake and lock events"""
+    kinds = {(session.LOCKED, session.IDLE): 'unlock', (session.IDLE, session.ACTIVE): 'wake'}
+
+    def listener(old, new):
+        kind = 'lock' if new == session.LOCKED else kinds.get((old, new))
+        if kind is not None:
+            events.append((kind, None, clock(), time.monotonic()))
+    return listener
+
+
+def prepare(corpus_dir, corpus, work_dir):
+    """Replay fixtures, the joined input recording and the mode's enrolled state"""
+    replay_dir = os.path.join(work_dir, "replay")
+    os.makedirs(replay_dir)
+
+    noise_seed = 0
+    parts, timeline, position = [], [], 0
+    for index, entry in enumerate(corpus['steps']):
+        samples, rate = synth.read_wav(os.path.join(corpus_dir, entry['audio']))
+        gap = synth.room_noise(entry.get('gap', 1.5), seed=noise_seed)
+        noise_seed += 1
+        parts += [gap, samples]
+        start = position + len(gap)
+        position = start + len(samples)
+        timeline.append((start / rate, position / rate))
+        if entry.get('text'):
+            shutil.copy(os.path.join(corpus_dir, entry['audio']), os.path.join(replay_dir, f"step_{index:02d}.wav"))
+            with open(os.path.join(replay_dir, f"step_{index:02d}.txt"), 'w') as f:
+                f.write(entry['text'])
+    parts.append(synth.room_noise(4.0, seed=noise_seed))
+    recording = os.path.join(work_dir, "input.wav")
+    synth.write_wav(recording, np.concatenate(parts))
+
+    CredentialStore(os.path.join(work_dir, secure.PASSWORD_FILE)).set_password(corpus['password'])
+    voiceprint = Voiceprint(MfccEncoder())
+    voiceprint.enroll([synth.read_wav(os.path.join(corpus_dir, name))[0] for name in corpus['enroll']['voiceprint']])
+    voiceprint.save(os.path.join(work_dir, secure.VOICEPRINT_FILE))
+    spotter = WakeWordSpotter()
+    for name in corpus['enroll']['wake_word']:
+        spotter.enroll(synth.read_wav(os.path.join(corpus_dir, name))[0])
+    spotter.save(os.path.join(work_dir, secure.WAKE_WORD_FILE))
+    return recording, replay_dir, timeline
+
+
+def run_mode(recording, replay_dir, speed, command_mode, verbose):
+    """Run SecureMode over the recording; returns events, clock, metrics and wall seconds"""
+    options = build_parser().parse_args([
+        "secure", "--input", recording, "--backend", "replay:" + replay_dir, "--replay-speed", str(speed),
+        "--speaker-encoder", "mfcc", "--command-mode", command_mode,
+        "--conditioning", "off",  # the replay backend matches fixture audio byte for byte
+    ])
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        mode = secure.SecureMode(options)
+
+        events = []
+        clock = AudioClock(mode.microphone.SAMPLE_RATE, mode.microphone.SAMPLE_WIDTH)
+        mode.microphone.add_listener(clock.tick)
+        mode.microphone.add_listener(lambda chunk: mode.session.check())  # deadlines run on audio time
+        mode.clock = mode.session.clock = clock
+        mode.keys = KeyDispatcher(controller=RecordingKeyboard(events, clock), min_interval=0.0)
+        mode.metrics = Metrics(enabled=True)
+        mode.metrics.instrument(mode, mode.timed_methods)
+
+        mode.session.add_listener(record_transitions(events, clock))
+
+        started = time.monotonic()
+        mode.run()
+        wall = time.monotonic() - started
+    return events, clock, mode.metrics, wall
+
+
+def score(corpus, timeline, events, clock):
+    """Match events to the step whose audio they followed and score each step"""
+    steps, windows = corpus['steps'], []
+    for index, (start, end) in enumerate(timeline):
+        window_end = timeline[index + 1][0] if index + 1 < len(timeline) else float('inf')
+        windows.append((start, window_end))
+
+    results, latencies = [], []
+    false_accepts = false_rejects = 0
+    for entry, (start, window_end), (_, end) in zip(steps, windows, timeline):
+        seen = [event for event in events if start <= event[2] < window_end]
+        expect = entry.get('expect')
+        wanted = INTENT_KEYS.get(expect) if expect not in ('unlock', 'wake', 'lock') else None
+
+        if expect in ('unlock', 'wake', 'lock'):
+            hits = [event for event in seen if event[0] == expect]
+        elif wanted is not None:
+            hits = [event for event in seen if event[0] == 'key' and event[1] == wanted]
+        else:
+            hits = []
+        extra = [event for event in seen if event not in hits and not (entry.get('wake') and event[0] == 'wake')]
+
+        outcome = 'pass'
+        if expect is not None and not hits:
+            outcome = 'false_reject'
+            false_rejects += 1
+        elif extra:
+            outcome = 'false_accept'
+            false_accepts += 1
+        elif 'presses' in entry and len(hits) != entry['presses']:
+            outcome = 'wrong_presses'
+
+        result = {'step': entry['audio'], 'text': entry.get('text'), 'expect': expect, 'outcome': outcome,
+                  'events': [event[0] if event[0] != 'key' else event[1] for event in seen]}
+        spoken_end = clock.wall_time(end)
+        if hits and spoken_end is not None:
+            latency = max(0.0, hits[-1][3] - spoken_end) if wanted else max(0.0, hits[0][3] - spoken_end)
+            result['latency_ms'] = round(1000 * latency, 1)
+            if wanted is not None or expect == 'lock':
+                latencies.append(latency)
+        results.append(result)
+    return results, latencies, false_accepts, false_rejects
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', help="corpus directory (default: generate a synthetic one)")
+    parser.add_argument('--save-corpus', metavar="DIR", help="write the synthetic corpus here")
+    parser.add_argument('--speed', type=float, default=5.0, help="replay speed relative to real time")
+    parser.add_argument('--command-mode', choices=["pipeline", "streaming"], default="pipeline")
+    parser.add_argument('--output', metavar="JSON", help="write machine-readable results")
+    parser.add_argument('--compare', metavar="JSON", help="earlier results to compare against")
+    parser.add_argument('--verbose', action='store_true', help="show the mode's own output")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    corpus_dir = args.corpus
+    if corpus_dir is None:
+        corpus_dir = args.save_corpus or os.path.join(work_dir, "corpus")
+        os.makedirs(corpus_dir, exist_ok=True)
+        build_synthetic_corpus(corpus_dir)
+    corpus_dir = os.path.abspath(corpus_dir)
+    with open(os.path.join(corpus_dir, "corpus.json")) as f:
+        corpus = json.load(f)
+
+    recording, replay_dir, timeline = prepare(corpus_dir, corpus, work_dir)
+    audio_seconds = timeline[-1][1] + 4.0
+
+    # The mode keeps its password and templates in the working directory
+    previous_dir = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        events, clock, metrics, wall = run_mode(recording, replay_dir, args.speed, args.command_mode, args.verbose)
+    finally:
+        os.chdir(previous_dir)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    results, latencies, false_accepts, false_rejects = score(corpus, timeline, events, clock)
+    stages = metrics.snapshot()
+    commands = stages.get('control_media', {}).get('count', 0)
+    summary = {
+        'corpus': corpus_dir if args.corpus else "synthetic",
+        'speed': args.speed,
+        'command_mode': args.command_mode,
+        'audio_seconds': round(audio_seconds, 2),
+        'wall_seconds': round(wall, 2),
+        'realtime_factor': round(audio_seconds / wall, 2),
+        'steps': len(results),
+        'steps_passed': sum(1 for result in results if result['outcome'] == 'pass'),
+        'false_accepts': false_accepts,
+        'false_rejects': false_rejects,
+        'commands': commands,
+        'commands_per_second': round(commands / wall, 3),
+    }
+    for q in (50, 95, 99):
+        summary[f"command_latency_p{q}_ms"] = round(1000 * float(np.percentile(latencies, q)), 1) if latencies else None
+
+    print("=" * 78)
+    print(f"{'step':<14} {'text':<20} {'expect':<12} {'outcome':<14} {'events':<10} {'latency':>6}")
+    print("-" * 78)
+    for result in results:
+        latency = f"{result['latency_ms']:.0f}ms" if 'latency_ms' in result else ""
+        events_text = ",".join(event.replace('media_', '') for event in result['events'])
+        print(f"{result['step']:<14} {str(result['text'])[:20]:<20} {str(result['expect']):<12} "
+              f"{result['outcome']:<14} {events_text[:10]:<10} {latency:>6}")
+    print("-" * 78)
+    print(f"{'stage':<22} {'count':>6} {'errors':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for stage, values in stages.items():
+        print(f"{stage:<22} {values['count']:>6} {values['errors']:>7} " +
+              " ".join(f"{values[q]:>10.1f}" if values[q] is not None else f"{'-':>10}"
+                       for q in ('p50_ms', 'p95_ms', 'p99_ms')))
+    print("-" * 78)
+    for key, value in summary.items():
+        print(f"{key:<26} {value}")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['summary']
+        print("-" * 78)
+        print(f"{'compared to ' + args.compare:<40} {'before':>12} {'after':>12}")
+        for key in HEADLINE:
+            print(f"{key:<40} {str(baseline.get(key)):>12} {str(summary.get(key)):>12}")
+    print("=" * 78)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'summary': summary, 'stages': stages, 'steps': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Session Timing Benchmark
+How late a session expires, and how often an idle loop wakes up, for the
+old polling loops and for the SessionStateMachine timer
+Old wake mode: expiry checked between blocking listens (up to 6 s) and a
+0.1 s sleep; old secure mode: a 0.5 s polling sleep. New: a timer thread
+sleeps until the deadline, whatever the main thread is blocked in
+
+Usage: python benchmarks/session_benchmark.py [--sessions N] [--duration S]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice_assistant.session import ACTIVE, IDLE, SessionStateMachine
+
+
+def polled(duration, poll, blocking_listen, sessions):
+    """Lateness of expiry seen by a loop that checks the clock between waits"""
+    lateness, wakeups = [], 0
+    for _ in range(sessions):
+        started = time.monotonic()
+        deadline = started + duration
+        while True:
+            wakeups += 1
+            now = time.monotonic()
+            if now >= deadline:
+                lateness.append(now - deadline)
+                break
+            if blocking_listen:
+                # A listen that hears nothing runs to its timeout, min(remaining + 1, 6) in the wake mode
+                time.sleep(min(blocking_listen, deadline - now + 1.0))
+                time.sleep(poll)
+            else:
+                time.sleep(min(poll, deadline - now))
+    return lateness, wakeups
+
+
+def timed(duration, blocking_listen, sessions):
+    """Lateness of expiry from the state machine while the main thread is blocked"""
+    machine = SessionStateMachine(duration, locked=False)
+    lateness, wakeups = [], 0
+    expired = threading.Event()
+    deadline = [0.0]
+
+    def listener(old, new):
+        if old == ACTIVE and new == IDLE:
+            lateness.append(time.monotonic() - deadline[0])
+            expired.set()
+
+    machine.add_listener(listener)
+    for _ in range(sessions):
+        expired.clear()
+        machine.wake()
+        deadline[0] = time.monotonic() + duration
+        if blocking_listen:
+            time.sleep(blocking_listen)  # main thread stuck in a capture past the deadline
+        wakeups += 1
+        machine.wait_change(ACTIVE)
+        expired.wait()
+    machine.close()
+    return lateness, wakeups
+
+
+def report(name, lateness, wakeups, sessions):
+    lateness = sorted(lateness)
+    p50 = 1000 * lateness[len(lateness) // 2]
+    worst = 1000 * lateness[-1]
+    print(f"{name:<36} {p50:>10.1f} {worst:>10.1f} {wakeups / sessions:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=5)
+    parser.add_argument('--duration', type=float, default=1.0, help="session length in seconds")
+    args = parser.parse_args()
+
+    print("=" * 74)
+    print(f"{args.duration:.1f} s sessions")
+    print(f"{'expiry':<36} {'p50 late ms':>10} {'worst ms':>10} {'wakeups/session':>14}")
+    print("-" * 74)
+    report("old secure loop (0.5 s poll)", *polled(args.duration, 0.5, 0, args.sessions), args.sessions)
+    report("old wake loop (6 s listen + 0.1 s)", *polled(args.duration, 0.1, 6.0, args.sessions), args.sessions)
+    report("state machine, main thread idle", *timed(args.duration, 0, args.sessions), args.sessions)
+    report("state machine, blocked in capture", *timed(args.duration, 1.5 * args.duration, args.sessions),
+           args.sessions)
+    print("-" * 74)
+    print("wakeups: times the main loop ran to find out whether the session was over")
+    print("=" * 74)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Speaker Verification Benchmark
+Times voiceprint enrollment, loading the cached voiceprint and verifying
+one unlock attempt, and reports how well synthetic voices are told apart
+
+Other speakers are the same password spoken with scaled pitch and
+formants. Recorded audio can be used instead: --enroll takes the
+enrollment WAVs, --genuine and --impostor the attempts to score.
+
+Usage: python benchmarks/speaker_benchmark.py [--encoder auto|mfcc|wav2vec2]
+       [--enroll a.wav b.wav c.wav --genuine x.wav ... --impostor y.wav ...]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import synth
+from voice_assistant.speaker import ENROLLMENT_SAMPLES, Voiceprint, create_encoder
+
+PASSWORD = "open sesame"
+SPEAKER = (1.0, 1.0)  # (pitch scale, formant scale)
+IMPOSTORS = [(1.3, 1.15), (0.8, 0.9), (1.2, 1.0), (1.0, 1.2), (1.1, 1.05), (0.9, 1.0)]
+
+
+def utterance(voice, seed):
+    """The password in a quiet room, with a little leading silence"""
+    spoken = synth.spoken_phrase(PASSWORD, level=1500 + (seed * 377) % 4000, seed=seed, voice=voice)
+    lead = np.zeros(int(0.3 * synth.SAMPLE_RATE), np.int16)
+    return synth.mix(synth.room_noise(0.6 + len(spoken) / synth.SAMPLE_RATE, seed=seed),
+                     np.concatenate([lead, spoken]))
+
+
+def load_many(paths):
+    return [synth.read_wav(path)[0] for path in paths]
+
+
+def timed(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, 1000 * (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--encoder', default="auto")
+    parser.add_argument('--enroll', nargs='+')
+    parser.add_argument('--genuine', nargs='+')
+    parser.add_argument('--impostor', nargs='+')
+    parser.add_argument('--trials', type=int, default=20, help="synthetic attempts per speaker")
+    args = parser.parse_args()
+
+    if args.enroll:
+        enroll = load_many(args.enroll)
+        genuine = load_many(args.genuine or [])
+        impostors = {"impostor": load_many(args.impostor or [])}
+    else:
+        enroll = [utterance(SPEAKER, seed) for seed in range(ENROLLMENT_SAMPLES)]
+        genuine = [utterance(SPEAKER, 100 + i) for i in range(args.trials)]
+        impostors = {f"pitch x{p} formants x{f}": [utterance((p, f), 200 + i) for i in range(args.trials)]
+                     for p, f in IMPOSTORS}
+
+    encoder = create_encoder(args.encoder)
+    started = time.perf_counter()
+    encoder.load()
+    model_ms = 1000 * (time.perf_counter() - started)
+
+    voiceprint = Voiceprint(encoder)
+    _, enroll_ms = timed(lambda: voiceprint.enroll(enroll), 5)
+
+    path = os.path.join(tempfile.mkdtemp(), "voiceprint.npz")
+    voiceprint.save(path)
+    loaded, load_ms = timed(lambda: Voiceprint.load(path, encoder), 20)
+
+    attempt = genuine[0] if genuine else enroll[0]
+    _, verify_ms = timed(lambda: loaded.verify(attempt), 20)
+    audio_seconds = len(attempt) / synth.SAMPLE_RATE
+
+    print("=" * 64)
+    print(f"Encoder: {encoder.name}, {len(enroll)} enrollment samples, "
+          f"threshold {loaded.threshold:.3f} (cosine distance)")
+    print("-" * 64)
+    print(f"model load (once):        {model_ms:>8.1f} ms")
+    print(f"enrollment:               {enroll_ms:>8.1f} ms")
+    print(f"voiceprint file:          {os.path.getsize(path):>8} bytes, loads in {load_ms:.2f} ms")
+    print(f"verify one attempt:       {verify_ms:>8.1f} ms for {audio_seconds:.1f}s of audio")
+    print("-" * 64)
+
+    if genuine:
+        distances = [loaded.distance(samples) for samples in genuine]
+        accepted = sum(distance <= loaded.threshold for distance in distances)
+        print(f"{'enrolled speaker':28} accepted {accepted:>3}/{len(genuine):<3} "
+              f"distance {np.min(distances):.3f}-{np.max(distances):.3f}")
+    for label, attempts in impostors.items():
+        if not attempts:
+            continue
+        distances = [loaded.distance(samples) for samples in attempts]
+        accepted = sum(distance <= loaded.threshold for distance in distances)
+        print(f"{label:28} accepted {accepted:>3}/{len(attempts):<3} "
+              f"distance {np.min(distances):.3f}-{np.max(distances):.3f}")
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Startup Benchmark
+Launches each CLI mode in a fresh interpreter and reports the time from
+process start until it first listens for speech, and which heavy modules
+had been imported by then
+
+Modes read a replayed WAV through the replay backend, so no microphone,
+network or display is needed. The secure mode starts from an existing
+password, voiceprint and wake word, as on every run after the first.
+The calibration wait (the noise tracker's warm-up) is part of the time.
+
+Usage: python benchmarks/startup_benchmark.py [--repeat N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+import synth
+from voice_assistant.credentials import CredentialStore
+from voice_assistant.modes.basic import BasicMode
+from voice_assistant.modes.secure import SecureMode
+from voice_assistant.modes.wake import WakeWordMode
+from voice_assistant.speaker import MfccEncoder, Voiceprint
+from voice_assistant.wake_word import WakeWordSpotter
+
+# mode -> (first line printed once it is listening, mode class)
+READY = {
+    'basic': ("Listening...", BasicMode),
+    'wake': ("Waiting for wake word...", WakeWordMode),
+    'secure': ("Say password...", SecureMode),
+}
+HEAVY_MODULES = ["numpy", "scipy", "torch", "torchaudio", "pyaudio", "pynput"]
+
+
+def prepare(directory):
+    """Replay fixtures, an input recording and the secure mode's enrolled state"""
+    replay = os.path.join(directory, "replay")
+    os.makedirs(replay)
+    spoken = synth.spoken_phrase("open sesame", seed=1)
+    synth.write_wav(os.path.join(replay, "password.wav"), spoken)
+    with open(os.path.join(replay, "password.txt"), 'w') as f:
+        f.write("open sesame")
+
+    recording = os.path.join(directory, "input.wav")
+    synth.write_wav(recording, synth.room_noise(30.0, seed=2))
+
+    CredentialStore(os.path.join(directory, "voice_password.json")).set_password("open sesame")
+    voiceprint = Voiceprint(MfccEncoder())
+    voiceprint.enroll([synth.spoken_phrase("open sesame", seed=seed) for seed in range(3)])
+    voiceprint.save(os.path.join(directory, "voice_password_voiceprint.npz"))
+    spotter = WakeWordSpotter()
+    for seed in range(3):
+        spotter.enroll(synth.keyword(synth.WORDS['computer'], seed=seed))
+    spotter.save(os.path.join(directory, "wake_word_templates.npz"))
+    return recording, "replay:" + replay
+
+
+def time_to_ready(mode, directory, recording, backend):
+    """Seconds until the ready line, and the heavy modules imported before it"""
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONUNBUFFERED="1")
+    command = [sys.executable, "-X", "importtime", "-m", "voice_assistant", mode,
+               "--input", recording, "--backend", backend]
+
+    with tempfile.TemporaryFile() as imports:
+        started = time.perf_counter()
+        process = subprocess.Popen(command, cwd=directory, env=env, stdout=subprocess.PIPE,
+                                   stderr=imports, text=True)
+        elapsed = None
+        for line in process.stdout:
+            if READY[mode][0] in line:
+                elapsed = time.perf_counter() - started
+                break
+        process.kill()
+        process.wait()
+
+        imports.seek(0)
+        names = {line.decode().rsplit("|", 1)[-1].strip() for line in imports if line.startswith(b"import time:")}
+    loaded = [module for module in HEAVY_MODULES if module in names]
+    return elapsed, loaded
+
+
+def import_cost(module):
+    """Seconds to import ``module`` in a fresh interpreter, or the reason it cannot be"""
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", f"import {module}"], capture_output=True, text=True)
+    if result.returncode != 0:
+        return "not installed" if "ModuleNotFoundError" in result.stderr else "fails to import here"
+    return f"{1000 * (time.perf_counter() - started):.0f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    recording, backend = prepare(directory)
+
+    print("=" * 72)
+    print(f"{'mode':8} {'ready':>10} {'best':>10} {'warm-up':>9}  heavy modules loaded by then")
+    print("-" * 72)
+    for mode, (_, mode_class) in READY.items():
+        times, loaded = [], []
+        for _ in range(args.repeat):
+            elapsed, loaded = time_to_ready(mode, directory, recording, backend)
+            if elapsed is not None:
+                times.append(elapsed)
+        if not times:
+            print(f"{mode:8} {'never':>10}")
+            continue
+        print(f"{mode:8} {1000 * np.median(times):>8.0f}ms {1000 * min(times):>8.0f}ms "
+              f"{1000 * mode_class.warmup_seconds:>7.0f}ms  {', '.join(loaded) or '-'}")
+
+    print("-" * 72)
+    print("Cost of loading a heavy module up front (fresh interpreter, includes startup):")
+    for module in ["speech_recognition"] + HEAVY_MODULES + ["pynput.keyboard"]:
+        print(f"  {module:20} {import_cost(module)}")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
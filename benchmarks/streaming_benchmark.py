@@ -0,0 +1,142 @@
+"""
+Streaming Command Latency Harness
+Replays spoken commands in real time and measures the delay from the end
+of speech to the key press, for whole-phrase recognition versus the
+StreamingCommandListener acting on partial results
+
+The replay backend answers partial audio with the words heard so far,
+standing in for an incremental recognizer; ``--delay`` adds a fixed
+recognition time to every call.
+
+Usage: python benchmarks/streaming_benchmark.py [--delay SECONDS] [--rounds N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import speech_recognition as sr
+
+import synth
+from voice_assistant.audio_capture import CaptureStream, WavFileSource
+from voice_assistant.intents import IntentEngine
+from voice_assistant.modes.secure import SecureMode
+from voice_assistant.recognizer_backends import ReplayBackend
+from voice_assistant.streaming import StreamingCommandListener
+
+COMMANDS = ["next", "pause", "skip track", "mute", "volume up by five", "go back", "play", "next track"]
+GAP_SECONDS = 1.5
+
+
+def build_session(rounds, delay):
+    backend = ReplayBackend(tempfile.mkdtemp(), delay=delay)
+    track = [synth.room_noise(1.0, seed=0)]
+    speech_ends = []
+    for round_index in range(rounds):
+        for i, command in enumerate(COMMANDS):
+            seed = round_index * 100 + i
+            spoken = synth.spoken_phrase(command, seed=seed)
+            backend.add(f"{command} {seed}", spoken.tobytes(), command)
+            track.append(spoken)
+            speech_ends.append((command, sum(len(part) for part in track) / synth.SAMPLE_RATE))
+            track.append(synth.room_noise(GAP_SECONDS, seed=1000 + seed))
+
+    path = os.path.join(tempfile.mkdtemp(), "commands.wav")
+    synth.write_wav(path, np.concatenate(track))
+    return path, backend, speech_ends
+
+
+def make_recognizer():
+    recognizer = sr.Recognizer()
+    recognizer.energy_threshold = 300
+    recognizer.dynamic_energy_threshold = False
+    recognizer.pause_threshold = SecureMode.pause_threshold
+    return recognizer
+
+
+def run_whole_phrase(path, backend, engine):
+    capture = CaptureStream(WavFileSource(path, realtime=True))
+    recognizer = make_recognizer()
+    pressed = []
+    capture.start()
+    start = time.perf_counter()
+
+    while not capture.finished:
+        try:
+            audio = recognizer.listen(capture, timeout=3, phrase_time_limit=4)
+            if not audio.frame_data:
+                continue
+            match = engine.match(backend.transcribe(audio).text)
+            if match is not None:
+                pressed.append((match.intent, time.perf_counter() - start))
+        except (sr.WaitTimeoutError, sr.UnknownValueError):
+            pass
+
+    capture.stop()
+    return pressed, None
+
+
+def run_streaming(path, backend, engine):
+    capture = CaptureStream(WavFileSource(path, realtime=True))
+    recognizer = make_recognizer()
+    pressed = []
+    capture.start()
+    start = time.perf_counter()
+
+    def execute(match, text, partial):
+        pressed.append((match.intent, time.perf_counter() - start))
+        return True
+
+    listener = StreamingCommandListener(capture, recognizer, backend, engine, execute)
+    while not capture.finished:
+        try:
+            listener.listen(timeout=3, phrase_time_limit=4)
+        except sr.WaitTimeoutError:
+            pass
+
+    listener.close()
+    capture.stop()
+    return pressed, listener
+
+
+def report(label, pressed, listener, speech_ends, engine):
+    expected = [(engine.match(command).intent, end) for command, end in speech_ends]
+    latencies, remaining = [], list(pressed)
+    for intent, end in expected:
+        hit = next((item for item in remaining if item[0] == intent and -1.0 < item[1] - end < 3.0), None)
+        if hit is not None:
+            latencies.append(hit[1] - end)
+            remaining.remove(hit)
+
+    extra = f", early {listener.early}, duplicates {listener.duplicates}, corrections {listener.corrections}" \
+        if listener is not None else ""
+    print(f"{label:14} presses {len(pressed):>3} matched {len(latencies):>3}/{len(expected):<3} "
+          f"p50 {np.percentile(latencies, 50) * 1000:>6.0f} ms  p95 {np.percentile(latencies, 95) * 1000:>6.0f} ms"
+          f"  extra presses {len(remaining)}{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--delay', type=float, default=0.1, help="simulated recognition time per call")
+    parser.add_argument('--rounds', type=int, default=2)
+    args = parser.parse_args()
+
+    engine = IntentEngine()
+    path, backend, speech_ends = build_session(args.rounds, args.delay)
+
+    print("=" * 72)
+    print(f"{len(speech_ends)} commands, recognition delay {args.delay * 1000:.0f} ms; "
+          f"latency = key press - end of speech")
+    print("-" * 72)
+    report("whole phrase", *run_whole_phrase(path, backend, engine), speech_ends, engine)
+    report("streaming", *run_streaming(path, backend, engine), speech_ends, engine)
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Synthetic Audio Fixtures
+Generates room noise and speech-like bursts for the replay benchmarks
+when no recorded audio is supplied
+"""
+
+import wave
+
+import numpy as np
+from scipy.signal import lfilter
+
+SAMPLE_RATE = 16000
+
+
+def room_noise(seconds, level=60, hum_level=40, seed=0):
+    """Pink-ish background noise with mains hum, as int16 samples"""
+    rng = np.random.default_rng(seed)
+    count = int(seconds * SAMPLE_RATE)
+    white = rng.standard_normal(count)
+    # One-pole low-pass gives the 1/f tilt of a real room
+    pink = lfilter([0.03], [1, -0.97], white)
+    pink *= level / (np.std(pink) or 1.0)
+    t = np.arange(count) / SAMPLE_RATE
+    hum = hum_level * np.sin(2 * np.pi * 50 * t)
+    return np.clip(pink + hum, -32768, 32767).astype(np.int16)
+
+
+def noise_bursts(seconds, every=4.0, length=0.3, level=900, seed=1):
+    """Short clicks and knocks (doors, keyboards) spread over ``seconds``"""
+    rng = np.random.default_rng(seed)
+    out = np.zeros(int(seconds * SAMPLE_RATE))
+    burst = int(length * SAMPLE_RATE)
+    for start in np.arange(every / 2, seconds - length, every):
+        i = int(start * SAMPLE_RATE)
+        envelope = np.exp(-np.arange(burst) / (burst / 6))
+        out[i:i + burst] += level * rng.standard_normal(burst) * envelope
+    return np.clip(out, -32768, 32767).astype(np.int16)
+
+
+def speech_like(seconds, pitch=140, level=3000, seed=2):
+    """Voiced harmonic signal with a syllable-rate envelope"""
+    rng = np.random.default_rng(seed)
+    count = int(seconds * SAMPLE_RATE)
+    t = np.arange(count) / SAMPLE_RATE
+    vibrato = pitch * (1 + 0.05 * np.sin(2 * np.pi * 3 * t))
+    phase = 2 * np.pi * np.cumsum(vibrato) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 12))
+    syllables = 0.5 * (1 - np.cos(2 * np.pi * 4 * t))
+    signal = voiced * syllables + 0.05 * rng.standard_normal(count)
+    signal *= level / (np.max(np.abs(signal)) or 1.0)
+    return signal.astype(np.int16)
+
+
+def music(seconds, note_seconds=0.5, level=3000, seed=3):
+    """Sustained chords, one every ``note_seconds``, like background music"""
+    rng = np.random.default_rng(seed)
+    count = int(seconds * SAMPLE_RATE)
+    t = np.arange(count) / SAMPLE_RATE
+    out = np.zeros(count)
+    for start in np.arange(0, seconds, note_seconds):
+        note = (t >= start) & (t < start + note_seconds)
+        root = rng.choice([110, 131, 147, 165, 196, 220])
+        for interval in (1, 1.26, 1.5):  # major triad
+            out[note] += sum(np.sin(2 * np.pi * root * interval * k * t[note]) / k for k in range(1, 8))
+    out *= level / (np.max(np.abs(out)) or 1.0)
+    return out.astype(np.int16)
+
+
+def keyword(segments, speed=1.0, level=3000, seed=0, voice=(1.0, 1.0)):
+    """
+    A word-like sequence of vowel segments
+
+    ``segments`` is a list of (pitch, formant1, formant2) in Hz, each
+    lasting 120 ms at ``speed`` 1.0. Different segment lists give words
+    that a spotter should be able to tell apart. ``voice`` scales the
+    pitch and the formants, standing in for a different speaker.
+    """
+    pitch_scale, formant_scale = voice
+    rng = np.random.default_rng(seed)
+    parts = []
+    for pitch, formant1, formant2 in segments:
+        pitch, formant1, formant2 = pitch * pitch_scale, formant1 * formant_scale, formant2 * formant_scale
+        count = int(0.12 * SAMPLE_RATE / speed)
+        phase = 2 * np.pi * pitch * np.arange(count) / SAMPLE_RATE
+        voiced = sum(
+            np.sin(k * phase) / k * (np.exp(-((k * pitch - formant1) / 200) ** 2)
+                                     + np.exp(-((k * pitch - formant2) / 300) ** 2) + 0.05)
+            for k in range(1, 40)
+        )
+        parts.append(voiced * np.hanning(count) ** 0.3)
+    signal = np.concatenate(parts)
+    signal *= level / (np.max(np.abs(signal)) or 1.0)
+    signal += 50 * rng.standard_normal(len(signal))
+    return np.clip(signal, -32768, 32767).astype(np.int16)
+
+
+# Formant sequences standing in for spoken words in the synthetic corpora
+WORDS = {
+    'computer': [(120, 700, 1200), (125, 400, 2000), (118, 300, 900), (110, 600, 1700)],
+    'commuter': [(120, 700, 1200), (125, 350, 900), (118, 300, 900), (110, 600, 1700)],
+    'banana': [(130, 300, 2300), (130, 700, 1100), (125, 500, 1500), (120, 350, 2100)],
+    'weather': [(140, 300, 800), (135, 550, 1800), (130, 500, 1500)],
+}
+
+
+def spoken_phrase(text, gap=0.06, level=3000, seed=0, voice=(1.0, 1.0)):
+    """
+    Several synthetic words in a row, one per word of ``text``
+
+    Words from WORDS keep their formants; any other word gets a stable
+    pseudo-random segment list of its own.
+    """
+    parts = []
+    for i, word in enumerate(text.split()):
+        segments = WORDS.get(word)
+        if segments is None:
+            rng = np.random.default_rng(sum(ord(c) * 31 ** k for k, c in enumerate(word)) % 2 ** 32)
+            segments = [(int(rng.integers(100, 160)), int(rng.integers(300, 800)), int(rng.integers(900, 2400)))
+                        for _ in range(min(5, len(word) // 2 + 2))]
+        parts.append(keyword(segments, level=level, seed=seed + i, voice=voice))
+        parts.append(room_noise(gap, level=30, hum_level=0, seed=seed + 1000 + i))
+    return np.concatenate(parts[:-1])
+
+
+def mix(*tracks):
+    """Sum int16 tracks of possibly different length"""
+    length = max(len(track) for track in tracks)
+    out = np.zeros(length)
+    for track in tracks:
+        out[:len(track)] += track
+    return np.clip(out, -32768, 32767).astype(np.int16)
+
+
+def write_wav(path, samples, sample_rate=SAMPLE_RATE):
+    """Write int16 samples to a WAV file; a (samples, channels) array gives a multi-channel file"""
+    samples = np.asarray(samples, dtype=np.int16)
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1 if samples.ndim == 1 else samples.shape[1])
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+
+
+def read_wav(path):
+    """Read a mono 16-bit WAV file into int16 samples and its sample rate"""
+    with wave.open(path, 'rb') as wav:
+        data = wav.readframes(wav.getnframes())
+        return np.frombuffer(data, dtype=np.int16), wav.getframerate()
@@ -0,0 +1,114 @@
+"""
+Voice Activity Detector Benchmark
+Runs the VAD over a labelled corpus of phrases that all passed the energy
+threshold and reports how many recognizer calls it saves, how much speech
+it loses, and what it costs per frame
+
+The synthetic corpus mixes spoken commands with fans, hiss, knocks and
+background music. A recorded corpus can be given instead as a directory
+with ``speech/`` and ``noise/`` subdirectories of mono 16 kHz WAV files.
+
+Usage: python benchmarks/vad_benchmark.py [--corpus DIR] [--per-class N]
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import speech_recognition as sr
+
+import synth
+from voice_assistant.intents import COMMANDS
+from voice_assistant.vad import VoiceActivityDetector
+
+
+def as_phrase(samples, seed):
+    """Pad like recognizer.listen does: pre-roll before, the pause threshold after"""
+    track = synth.room_noise(0.5 + len(samples) / synth.SAMPLE_RATE + 0.8, seed=seed)
+    return synth.mix(track, np.concatenate([np.zeros(int(0.5 * synth.SAMPLE_RATE), np.int16), samples]))
+
+
+def synthetic_corpus(per_class):
+    """(label, is_speech, samples) for every phrase"""
+    rng = np.random.default_rng(11)
+    phrases = [phrase.replace("{number}", "five") for command in COMMANDS for phrase in command.phrases]
+    corpus = []
+    for i in range(per_class):
+        seed = 100 + i
+        level = int(rng.integers(1500, 6000))
+        corpus += [
+            ("command", True, synth.spoken_phrase(rng.choice(phrases), level=level, seed=seed)),
+            ("wake word", True, synth.keyword(synth.WORDS['computer'], speed=rng.uniform(0.8, 1.2),
+                                              level=level, seed=seed)),
+            ("voiced", True, synth.speech_like(rng.uniform(0.6, 2.0), pitch=int(rng.integers(90, 220)),
+                                               level=level, seed=seed)),
+            ("command + music", True, synth.mix(
+                synth.spoken_phrase(rng.choice(phrases), level=level, seed=seed),
+                synth.music(3.0, level=level // 4, seed=seed))),
+            ("fan", False, synth.room_noise(rng.uniform(1.0, 3.0), level=int(rng.integers(400, 2000)),
+                                            hum_level=int(rng.integers(50, 400)), seed=seed)),
+            ("hiss", False, (rng.standard_normal(int(rng.uniform(0.5, 2.0) * synth.SAMPLE_RATE))
+                             * rng.integers(300, 1500)).astype(np.int16)),
+            ("knock", False, synth.noise_bursts(1.0, every=1.0, length=rng.uniform(0.1, 0.4),
+                                                level=level, seed=seed)),
+            ("music", False, synth.music(rng.uniform(2.0, 4.0), note_seconds=rng.uniform(0.3, 1.0),
+                                         level=level, seed=seed)),
+        ]
+    return [(label, speech, as_phrase(samples, seed=1000 + i)) for i, (label, speech, samples) in enumerate(corpus)]
+
+
+def recorded_corpus(directory):
+    corpus = []
+    for label, speech in (("speech", True), ("noise", False)):
+        for path in sorted(glob.glob(os.path.join(directory, label, "*.wav"))):
+            samples, sample_rate = synth.read_wav(path)
+            if sample_rate != synth.SAMPLE_RATE:
+                sys.exit(f"{path}: expected {synth.SAMPLE_RATE} Hz, got {sample_rate} Hz")
+            corpus.append((label, speech, samples))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', help="directory with speech/ and noise/ WAV files")
+    parser.add_argument('--per-class', type=int, default=25, help="synthetic phrases per class")
+    args = parser.parse_args()
+
+    corpus = recorded_corpus(args.corpus) if args.corpus else synthetic_corpus(args.per_class)
+    vad = VoiceActivityDetector()
+
+    results = {}
+    for label, speech, samples in corpus:
+        audio = sr.AudioData(samples.tobytes(), synth.SAMPLE_RATE, 2)
+        accepted = vad.accept(audio)
+        counts = results.setdefault(label, [speech, 0, 0])
+        counts[1 if accepted else 2] += 1
+
+    print("=" * 64)
+    print(f"{'class':18} {'label':>8} {'phrases':>8} {'accepted':>9} {'dropped':>8}")
+    print("-" * 64)
+    for label, (speech, accepted, dropped) in results.items():
+        print(f"{label:18} {'speech' if speech else 'noise':>8} {accepted + dropped:>8} {accepted:>9} {dropped:>8}")
+
+    speech_total = sum(a + d for s, a, d in results.values() if s)
+    speech_kept = sum(a for s, a, d in results.values() if s)
+    noise_total = sum(a + d for s, a, d in results.values() if not s)
+    noise_dropped = sum(d for s, a, d in results.values() if not s)
+    stats = vad.stats()
+
+    print("-" * 64)
+    print(f"recognizer calls: {len(corpus)} without VAD, {stats['accepted']} with VAD "
+          f"({stats['dropped']} saved, {100 * stats['dropped'] / len(corpus):.0f}%)")
+    print(f"speech kept:      {speech_kept}/{speech_total} ({100 * speech_kept / max(speech_total, 1):.1f}%)")
+    print(f"noise dropped:    {noise_dropped}/{noise_total} ({100 * noise_dropped / max(noise_total, 1):.1f}%)")
+    print(f"cost:             {stats['us_per_frame']:.1f} us per {vad.frame_seconds * 1000:.0f} ms frame "
+          f"({100 * stats['us_per_frame'] * 1e-6 / vad.frame_seconds:.2f}% of real time)")
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Wake Word Benchmark
+Streams audio through the offline WakeWordSpotter in capture-sized chunks
+and reports detections, detection latency and CPU per second of audio
+
+Usage: python benchmarks/wake_word_benchmark.py [--enroll a.wav b.wav c.wav] [stream.wav ...]
+Without arguments the spotter is enrolled on synthetic samples of
+'computer' and run over a synthetic room with the wake word, a
+similar-sounding word and unrelated words mixed in.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import synth
+from voice_assistant.wake_word import WakeWordSpotter
+
+CHUNK_SIZE = 1024
+
+
+def synthetic_corpus():
+    """Enrollment samples, a test stream and the end times of each wake word in it"""
+    enroll = [synth.keyword(synth.WORDS['computer'], speed, seed=i)
+              for i, speed in enumerate([1.0, 0.9, 1.1])]
+
+    track, wake_ends = [], []
+    plan = ['computer', 'banana', 'computer', 'commuter', 'weather', 'computer'] * 5
+    for i, word in enumerate(plan):
+        track.append(synth.room_noise(1.5, seed=100 + i))
+        speed = 0.85 + 0.3 * ((i * 7) % 10) / 10
+        spoken = synth.keyword(synth.WORDS[word], speed, seed=200 + i)
+        track.append(synth.mix(spoken, synth.room_noise(len(spoken) / synth.SAMPLE_RATE, seed=300 + i)))
+        if word == 'computer':
+            wake_ends.append(sum(len(part) for part in track) / synth.SAMPLE_RATE)
+    track.append(synth.room_noise(1.5, seed=999))
+    return enroll, np.concatenate(track), wake_ends
+
+
+def run(spotter, samples, wake_ends=None, tolerance=0.5):
+    """Feed ``samples`` chunk by chunk; match detections against ``wake_ends``"""
+    data = samples.astype(np.int16).tobytes()
+    step = CHUNK_SIZE * 2
+    detections, latencies = [], []
+
+    wall_start = time.perf_counter()
+    for offset in range(0, len(data), step):
+        if spotter.process(data[offset:offset + step]):
+            chunk_end = (offset + step) / 2 / spotter.sample_rate
+            detections.append(chunk_end)
+            latencies.append(spotter.last_latency)
+    wall = time.perf_counter() - wall_start
+
+    hits = false_accepts = 0
+    delays = []  # end of wake word to the chunk that triggered, including chunk buffering
+    if wake_ends is not None:
+        remaining = list(wake_ends)
+        for at in detections:
+            match = next((end for end in remaining if -tolerance <= at - end <= tolerance + 0.2), None)
+            if match is None:
+                false_accepts += 1
+            else:
+                hits += 1
+                delays.append(max(at - match, 0.0))
+                remaining.remove(match)
+
+    audio_seconds = len(samples) / spotter.sample_rate
+    return {
+        'audio_seconds': audio_seconds,
+        'detections': len(detections),
+        'hits': hits,
+        'misses': len(wake_ends) - hits if wake_ends is not None else None,
+        'false_accepts': false_accepts,
+        'latency_ms': 1000 * float(np.mean(latencies)) if latencies else None,
+        'end_to_end_ms': 1000 * float(np.mean(delays)) if delays else None,
+        'cpu_per_audio_second': spotter.stats()['cpu_per_audio_second'],
+        'realtime_factor': wall / audio_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--enroll', nargs='+', metavar='WAV', help="recordings of the wake word")
+    parser.add_argument('streams', nargs='*', metavar='WAV', help="recordings to scan")
+    args = parser.parse_args()
+
+    spotter = WakeWordSpotter()
+    wake_ends = None
+    if args.enroll:
+        for path in args.enroll:
+            spotter.enroll(synth.read_wav(path)[0])
+        streams = [(path, synth.read_wav(path)[0]) for path in args.streams]
+    else:
+        enroll, stream, wake_ends = synthetic_corpus()
+        for samples in enroll:
+            spotter.enroll(samples)
+        streams = [('synthetic', stream)]
+
+    print("=" * 60)
+    print(f"Templates: {len(spotter.templates)}  Threshold: {spotter.threshold:.3f}")
+    for name, samples in streams:
+        spotter.reset()
+        result = run(spotter, samples, wake_ends)
+        print("-" * 60)
+        print(f"Stream: {name} ({result['audio_seconds']:.1f}s)")
+        print(f"  Detections:       {result['detections']}")
+        if wake_ends is not None:
+            print(f"  Hits / misses:    {result['hits']} / {result['misses']}")
+            print(f"  False accepts:    {result['false_accepts']}")
+        if result['latency_ms'] is not None:
+            print(f"  Spotter latency:  {result['latency_ms']:.1f} ms (within the triggering chunk)")
+        if result['end_to_end_ms'] is not None:
+            print(f"  End-to-end:       {result['end_to_end_ms']:.1f} ms after end of wake word")
+        print(f"  CPU per audio sec: {result['cpu_per_audio_second'] * 1000:.1f} ms")
+        print(f"  Real-time factor: {result['realtime_factor']:.4f}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
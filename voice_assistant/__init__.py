@@ -0,0 +1,65 @@
+"""
+Voice Assistant
+Voice-controlled media keys: capture, endpointing, wake word, recognition
+backends and intent matching, shared by the basic, wake and secure modes
+Run it with ``python -m voice_assistant <mode>``. Public names are imported
+from their submodules on first access, so importing the package is cheap.
+"""
+
+import importlib
+
+# public name -> submodule
+_EXPORTS = {
+    'CaptureStream': 'audio_capture',
+    'CapturedPhrase': 'audio_capture',
+    'MicrophoneSource': 'audio_capture',
+    'MultiDeviceSource': 'audio_capture',
+    'WavFileSource': 'audio_capture',
+    'ChannelMixer': 'beamforming',
+    'MixedSource': 'beamforming',
+    'CredentialStore': 'credentials',
+    'Endpointer': 'endpointing',
+    'CredentialError': 'credentials',
+    'CtcGrammarBackend': 'grammar',
+    'GrammarResult': 'grammar',
+    'TemplateGrammarBackend': 'grammar',
+    'AudioFrontEnd': 'frontend',
+    'PhraseFeatures': 'frontend',
+    'IntentEngine': 'intents',
+    'IntentMatch': 'intents',
+    'Command': 'intents',
+    'CachedBackend': 'recognition_cache',
+    'Journal': 'journal',
+    'JournalReader': 'journal',
+    'JournalSource': 'journal',
+    'KeyDispatcher': 'keys',
+    'Metrics': 'metrics',
+    'NoiseFloorTracker': 'noise_floor',
+    'RecognitionPipeline': 'pipeline',
+    'Profile': 'profiles',
+    'ProfileIndex': 'profiles',
+    'ProfileStore': 'profiles',
+    'valid_name': 'profiles',
+    'RacingBackend': 'racing',
+    'Transcription': 'recognizer_backends',
+    'create_backend': 'recognizer_backends',
+    'Voiceprint': 'speaker',
+    'create_encoder': 'speaker',
+    'StreamingCommandListener': 'streaming',
+    'VoiceActivityDetector': 'vad',
+    'WakeWordSpotter': 'wake_word',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,618 @@
+"""
+Persistent Audio Capture
+Opens the input device once and keeps a ring buffer filled from a background thread
+Pluggable sources: live microphone, several microphones at once, or WAV file replay
+Multi-channel sources are mixed to mono by beamforming.MixedSource
+Phrases are handed over as views into the ring, with pre-roll from before they start
+"""
+
+import audioop
+import math
+import re
+import threading
+import time
+import wave
+import weakref
+
+import numpy as np
+import speech_recognition as sr
+
+DEFAULT_SAMPLE_RATE = 16000
+DEFAULT_CHUNK_SIZE = 1024
+DEFAULT_BUFFER_SECONDS = 10
+DEFAULT_PRE_ROLL = 0.5  # seconds kept from before the first loud chunk of a phrase
+COPY_MARGIN = 0.25  # share of the ring left before a phrase still in use is copied out
+
+
+def resolve_device(spec, names=None):
+    """
+    Device index for an index or a name pattern (case-insensitive regex)
+
+    None means the default device. A pattern matching several devices
+    picks the first; one matching none raises ValueError.
+    """
+    if spec is None or isinstance(spec, int):
+        return spec
+    if str(spec).isdigit():
+        return int(spec)
+
+    if names is None:
+        names = sr.Microphone.list_microphone_names()
+    pattern = re.compile(str(spec), re.IGNORECASE)
+    for index, name in enumerate(names):
+        if pattern.search(name):
+            return index
+    raise ValueError(f"No microphone matches {spec!r}")
+
+
+class MicrophoneSource:
+    """Live PyAudio input device, opened once and kept open"""
+
+    live = True
+
+    def __init__(self, device_index=None, sample_rate=DEFAULT_SAMPLE_RATE, chunk_size=DEFAULT_CHUNK_SIZE,
+                 channels=1):
+        self.device_index = device_index
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.channels = channels  # interleaved in each chunk when more than one
+        self.sample_width = 2  # paInt16
+        self._audio = None
+        self._stream = None
+
+    def open(self):
+        """Open the PyAudio input stream"""
+        pyaudio = sr.Microphone.get_pyaudio()
+        self._audio = pyaudio.PyAudio()
+        try:
+            self.sample_width = pyaudio.get_sample_size(pyaudio.paInt16)
+            self._stream = self._audio.open(
+                input_device_index=self.device_index,
+                channels=self.channels,
+                format=pyaudio.paInt16,
+                rate=self.sample_rate,
+                frames_per_buffer=self.chunk_size,
+                input=True,
+            )
+        except Exception:
+            self._audio.terminate()
+            self._audio = None
+            raise
+
+    def read(self):
+        """Read one chunk of raw PCM from the device"""
+        return self._stream.read(self.chunk_size, exception_on_overflow=False)
+
+    def close(self):
+        """Close the stream and release the device"""
+        try:
+            if self._stream is not None:
+                if not self._stream.is_stopped():
+                    self._stream.stop_stream()
+                self._stream.close()
+        finally:
+            self._stream = None
+            if self._audio is not None:
+                self._audio.terminate()
+                self._audio = None
+
+
+class MultiDeviceSource:
+    """
+    Several input devices read side by side as the channels of one source
+
+    Each read takes one chunk from every device and interleaves them.
+    Devices run on their own clocks, so over long sessions they drift
+    apart by a few samples; the beamformer's delay tracking absorbs that.
+    """
+
+    live = True
+
+    def __init__(self, sources):
+        self.sources = sources
+        self.sample_rate = sources[0].sample_rate
+        self.sample_width = sources[0].sample_width
+        self.chunk_size = sources[0].chunk_size
+        self.channels = sum(source.channels for source in sources)
+
+    def open(self):
+        opened = []
+        try:
+            for source in self.sources:
+                source.open()
+                opened.append(source)
+        except Exception:
+            for source in opened:
+                source.close()
+            raise
+        self.sample_width = self.sources[0].sample_width
+
+    def read(self):
+        """One chunk from every device, interleaved"""
+        blocks = [np.frombuffer(source.read(), dtype=np.int16).reshape(-1, source.channels)
+                  for source in self.sources]
+        if any(len(block) == 0 for block in blocks):
+            return b""
+        count = min(len(block) for block in blocks)
+        return np.hstack([block[:count] for block in blocks]).tobytes()
+
+    def close(self):
+        for source in self.sources:
+            source.close()
+
+
+class WavFileSource:
+    """
+    Replays a 16-bit WAV file as if it were an input device
+
+    With ``realtime`` the file is paced like a real device and, like one,
+    does not wait for a slow reader; otherwise it is read as fast as the
+    reader consumes it and nothing is dropped. ``speed`` scales the pacing,
+    so a long recording can be replayed several times faster than spoken.
+    Multi-channel files give interleaved chunks, like a multi-channel device.
+    """
+
+    def __init__(self, path, chunk_size=DEFAULT_CHUNK_SIZE, realtime=False, speed=1.0):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.realtime = realtime  # sleep between chunks like a real device
+        self.speed = speed
+        self.live = realtime
+
+        with wave.open(path, 'rb') as wav:
+            self.channels = wav.getnchannels()
+            self.sample_rate = wav.getframerate()
+            self.sample_width = wav.getsampwidth()
+
+        self._wav = None
+
+    def open(self):
+        """Open the WAV file for reading"""
+        self._wav = wave.open(self.path, 'rb')
+
+    def read(self):
+        """Read one chunk of raw PCM, or b'' at end of file"""
+        data = self._wav.readframes(self.chunk_size)
+        if self.realtime and data:
+            # A device delivers a chunk once all of it has been spoken
+            time.sleep(len(data) / (self.sample_width * self.channels * self.sample_rate * self.speed))
+        return data
+
+    def close(self):
+        """Close the WAV file"""
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+class _BufferReader:
+    """File-like view of the ring buffer, as expected by sr.Recognizer"""
+
+    def __init__(self, capture):
+        self._capture = capture
+
+    def read(self, size=None):
+        # The capture stream always hands out whole chunks of CHUNK frames
+        return self._capture.read_chunk()
+
+
+class CapturedPhrase(sr.AudioData):
+    """
+    AudioData whose frames are a view into a CaptureStream's ring
+
+    ``start`` and ``end`` are stream sample positions. The stream copies
+    the frames out before the ring wraps over them, so a phrase stays
+    valid however long it is kept; buffers taken from ``frame_data``
+    before that are only good for most of ``buffer_seconds``.
+    """
+
+    def __init__(self, frame_data, sample_rate, sample_width, start, end):
+        super().__init__(frame_data, sample_rate, sample_width)
+        self.start = start
+        self.end = end
+
+    @property
+    def seconds(self):
+        return (self.end - self.start) / self.sample_rate
+
+
+class CaptureStream(sr.AudioSource):
+    """
+    Long-lived capture stream usable anywhere an sr.Microphone is
+
+    The device is opened on first use and stays open. A background thread
+    keeps a preallocated ring of the last ``buffer_seconds`` of PCM filled,
+    so audio spoken while the caller is busy (recognizing, pressing keys)
+    is not lost. Entering the stream with ``with`` does not reopen the device.
+
+    The ring is stored twice over, so any span of it is one contiguous
+    slice: ``listen`` and ``phrase`` hand phrases over as memoryviews of
+    it instead of joining chunk copies. ``listen`` starts each phrase
+    ``pre_roll`` seconds before its first loud chunk, reaching back into
+    audio already read, but never past the end of the previous phrase or
+    the position given to ``seek``. With an ``endpointer``, phrases
+    listened for in a context end when it says so, and the ring grows to
+    hold the longest phrase it allows.
+    """
+
+    def __init__(self, source=None, buffer_seconds=DEFAULT_BUFFER_SECONDS, pre_roll=DEFAULT_PRE_ROLL,
+                 endpointer=None):
+        self.source = source if source is not None else MicrophoneSource()
+        if getattr(self.source, 'channels', 1) != 1:
+            raise ValueError("CaptureStream needs a mono source; wrap multi-channel sources in a MixedSource")
+
+        self.SAMPLE_RATE = self.source.sample_rate
+        self.SAMPLE_WIDTH = self.source.sample_width
+        self.CHUNK = self.source.chunk_size
+        if endpointer is not None:
+            # Room to keep capturing while the longest phrase is held for recognition
+            buffer_seconds = max(buffer_seconds, endpointer.longest_phrase + DEFAULT_BUFFER_SECONDS / 2)
+        self.buffer_seconds = buffer_seconds
+        self.pre_roll = DEFAULT_PRE_ROLL if pre_roll is None else pre_roll
+        self.endpointer = endpointer
+
+        self._chunk_count = max(2, math.ceil(buffer_seconds * self.SAMPLE_RATE / self.CHUNK))
+        self._allocate()
+        self._condition = threading.Condition()
+        self._written = 0  # bytes captured since start
+        self._read = 0  # next byte the reader will get
+        self._floor = 0  # pre-roll never reaches before this byte
+        self._hold = None  # start of the phrase being endpointed; replayed sources wait for it
+        self._phrases = []  # weak references to the phrases handed out that still view the ring
+        self._running = False
+        self._finished = False
+        self._thread = None
+        self._listeners = []
+        self._finish_listeners = []
+        self._phrase_listeners = []
+
+        self.overruns = 0  # chunks dropped because the reader fell behind
+        self.phrases = 0  # phrases handed over
+        self.copies = 0  # phrases copied out of the ring because they were kept past COPY_MARGIN
+        self.stream = None
+
+    def _allocate(self):
+        self._chunk_bytes = self.CHUNK * self.SAMPLE_WIDTH
+        self._capacity = self._chunk_count * self._chunk_bytes
+        self._ring = bytearray(2 * self._capacity)
+        self._view = memoryview(self._ring)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Keep the device open between listens
+        pass
+
+    @property
+    def running(self):
+        return self._running
+
+    @property
+    def finished(self):
+        """True once the source is exhausted and every chunk has been read"""
+        with self._condition:
+            return self._finished and self._read >= self._written
+
+    @property
+    def position(self):
+        """Stream sample the reader will get next"""
+        return self._read // self.SAMPLE_WIDTH
+
+    @property
+    def captured(self):
+        """Stream samples captured so far"""
+        return self._written // self.SAMPLE_WIDTH
+
+    def add_listener(self, callback):
+        """Call ``callback(chunk)`` on the capture thread for every chunk captured"""
+        self._listeners.append(callback)
+
+    def add_finish_listener(self, callback):
+        """Call ``callback()`` on the capture thread once the source is exhausted"""
+        self._finish_listeners.append(callback)
+
+    def add_phrase_listener(self, callback):
+        """Call ``callback(phrase)`` on the listening thread for every non-empty phrase handed over"""
+        self._phrase_listeners.append(callback)
+
+    def start(self):
+        """Open the source and start the capture thread (no-op if running)"""
+        if self._running:
+            return
+
+        self.source.open()
+        if self.source.sample_width != self.SAMPLE_WIDTH:
+            self.SAMPLE_WIDTH = self.source.sample_width
+            self._allocate()
+        self.stream = _BufferReader(self)
+        self._finished = False
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, name="audio-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop capturing and release the source"""
+        if not self._running:
+            return
+
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self._thread = None
+        self.source.close()
+        self.stream = None
+
+    def _capture_loop(self):
+        """Background thread: move chunks from the source into the ring buffer"""
+        try:
+            while self._running:
+                data = self.source.read()
+                if not data:
+                    break
+
+                for callback in self._listeners:
+                    callback(data)
+
+                with self._condition:
+                    # Replayed sources must not lose audio, so wait for the reader
+                    if not self.source.live:
+                        while self._running and self._written + len(data) - self._capacity > self._oldest_needed():
+                            self._condition.wait()
+
+                    self._write(data)
+                    self._condition.notify_all()
+        except Exception as e:
+            print(f"Audio capture error: {e}")
+        finally:
+            with self._condition:
+                self._finished = True
+                self._condition.notify_all()
+            for callback in self._finish_listeners:
+                callback()
+
+    def _oldest_needed(self):
+        return self._read if self._hold is None else min(self._read, self._hold)
+
+    def _write(self, data):
+        """Append one chunk at the write position and at its mirror"""
+        data = memoryview(data)
+        size, capacity = len(data), self._capacity
+        self._release(self._written + size)
+
+        offset = self._written % capacity
+        self._ring[offset:offset + size] = data
+        head = min(size, capacity - offset)
+        self._ring[offset + capacity:offset + capacity + head] = data[:head]
+        if size > head:
+            self._ring[:size - head] = data[head:]
+        self._written += size
+
+    def _release(self, written):
+        """Copy out handed-over phrases the ring is about to reach"""
+        limit = written - self._capacity + int(COPY_MARGIN * self._capacity)
+        kept = []
+        for reference in self._phrases:
+            phrase = reference()
+            if phrase is None:
+                continue
+            if phrase.start * self.SAMPLE_WIDTH < limit:
+                phrase.frame_data = bytes(phrase.frame_data)
+                self.copies += 1
+            else:
+                kept.append(reference)
+        self._phrases = kept
+
+    def _span(self, start, end):
+        """Bytes ``start`` to ``end`` of the stream as one slice of the ring"""
+        offset = start % self._capacity
+        return self._view[offset:offset + end - start]
+
+    def _next_span(self, timeout=None):
+        """(start, end) bytes of the next unread chunk, blocking; None at end of input"""
+        with self._condition:
+            while self._read >= self._written:
+                if self._finished or not self._running:
+                    return None
+                if not self._condition.wait(timeout):
+                    return None
+
+            oldest = max(0, self._written - self._capacity)
+            if self._read < oldest:
+                self.overruns += math.ceil((oldest - self._read) / self._chunk_bytes)
+                self._read = oldest
+
+            start = self._read
+            self._read = min(start + self._chunk_bytes, self._written)
+            self._condition.notify_all()
+            return start, self._read
+
+    def read_chunk(self, timeout=None):
+        """
+        Return the next unread chunk, blocking until one is available
+
+        Returns b'' once the source is exhausted or the stream is stopped.
+        """
+        span = self._next_span(timeout)
+        if span is None:
+            return b""
+        return bytes(self._span(*span))
+
+    def read_view(self, timeout=None):
+        """Like read_chunk, but a view into the ring, good for most of ``buffer_seconds``"""
+        span = self._next_span(timeout)
+        if span is None:
+            return b""
+        return self._span(*span)
+
+    def pending_seconds(self):
+        """Seconds of captured audio not yet read"""
+        with self._condition:
+            oldest = max(0, self._written - self._capacity)
+            unread = max(0, self._written - max(self._read, oldest))
+        return unread / self.SAMPLE_WIDTH / self.SAMPLE_RATE
+
+    def seek(self, position):
+        """Continue reading from stream sample ``position``; pre-roll stops there too"""
+        with self._condition:
+            oldest = max(0, self._written - self._capacity)
+            self._read = self._floor = max(oldest, position * self.SAMPLE_WIDTH)
+            self._condition.notify_all()
+
+    def discard_pending(self):
+        """Skip everything captured so far and continue from live audio"""
+        self.seek(self.captured)
+
+    def phrase(self, start, end):
+        """CapturedPhrase for stream samples ``start`` to ``end``, clipped to what the ring still holds"""
+        with self._condition:
+            return self._phrase(start * self.SAMPLE_WIDTH, end * self.SAMPLE_WIDTH)
+
+    def _phrase(self, start, end):
+        end = min(end, self._written)
+        start = min(max(start, self._written - self._capacity, 0), end)
+        phrase = CapturedPhrase(self._span(start, end), self.SAMPLE_RATE, self.SAMPLE_WIDTH,
+                                start // self.SAMPLE_WIDTH, end // self.SAMPLE_WIDTH)
+        self._phrases.append(weakref.ref(phrase))
+        return phrase
+
+    def wait_for_speech(self, recognizer, timeout=None):
+        """
+        Read until a chunk is louder than ``recognizer.energy_threshold``
+
+        Returns the stream sample where that chunk starts, or None at end
+        of input. Raises sr.WaitTimeoutError after ``timeout`` seconds of
+        audio without speech. Adjusts a dynamic energy threshold like
+        sr.Recognizer.listen.
+        """
+        seconds_per_buffer = self.CHUNK / self.SAMPLE_RATE
+        waited = 0.0
+        while True:
+            waited += seconds_per_buffer
+            if timeout and waited > timeout:
+                raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+
+            chunk = self.read_view()
+            if not chunk:
+                return None
+            energy = audioop.rms(chunk, self.SAMPLE_WIDTH)
+            if energy > recognizer.energy_threshold:
+                return self.position - len(chunk) // self.SAMPLE_WIDTH
+
+            if recognizer.dynamic_energy_threshold:
+                damping = recognizer.dynamic_energy_adjustment_damping ** seconds_per_buffer
+                target = energy * recognizer.dynamic_energy_ratio
+                recognizer.energy_threshold = recognizer.energy_threshold * damping + target * (1 - damping)
+
+    def phrase_start(self, onset, pre_roll=None):
+        """Where a phrase whose first loud chunk starts at ``onset`` begins, pre-roll included"""
+        pre_roll = self.pre_roll if pre_roll is None else pre_roll
+        start = onset - int(pre_roll * self.SAMPLE_RATE)
+        with self._condition:
+            start = max(start, self._floor // self.SAMPLE_WIDTH)
+            self._hold = start * self.SAMPLE_WIDTH  # replayed sources wait until it is handed over
+            return start
+
+    def release_hold(self):
+        """Drop the hold ``phrase_start`` put on the ring, for a phrase that will not be handed over"""
+        with self._condition:
+            self._hold = None
+            self._condition.notify_all()
+
+    def hand_over(self, start, end):
+        """The phrase from ``start`` to ``end``; the next phrase's pre-roll starts after it"""
+        with self._condition:
+            phrase = self._phrase(start * self.SAMPLE_WIDTH, end * self.SAMPLE_WIDTH)
+            self._floor = max(self._floor, phrase.end * self.SAMPLE_WIDTH)
+            self._hold = None
+            self.phrases += 1
+            self._condition.notify_all()
+        if phrase.end > phrase.start:
+            for callback in self._phrase_listeners:
+                callback(phrase)
+        return phrase
+
+    def listen(self, recognizer, timeout=None, phrase_time_limit=None, pre_roll=None, context=None):
+        """
+        Record one phrase like ``recognizer.listen(self)``, without copying it
+
+        Endpointing follows the recognizer's energy_threshold,
+        pause_threshold, phrase_threshold and non_speaking_duration, or,
+        given a ``context`` ('command', 'password' or 'dictation') and an
+        endpointer, the endpointer's pause and phrase limits; an explicit
+        ``phrase_time_limit`` still wins. The phrase starts ``pre_roll``
+        seconds (default ``self.pre_roll``) before its first loud chunk.
+        Returns a CapturedPhrase, empty at end of input; raises
+        sr.WaitTimeoutError if no phrase starts within ``timeout`` seconds.
+        """
+        assert self.stream is not None, "start the capture stream before listening"
+        endpointer = self.endpointer if context is not None else None
+        seconds_per_buffer = self.CHUNK / self.SAMPLE_RATE
+        pause_buffer_count = math.ceil(recognizer.pause_threshold / seconds_per_buffer)
+        phrase_buffer_count = math.ceil(recognizer.phrase_threshold / seconds_per_buffer)
+        non_speaking_buffer_count = math.ceil(recognizer.non_speaking_duration / seconds_per_buffer)
+        longest = self._capacity // self.SAMPLE_WIDTH - self.CHUNK  # a phrase must fit in the ring
+
+        try:
+            while True:
+                onset = self.wait_for_speech(recognizer, timeout)
+                if onset is None:
+                    return self.hand_over(self.position, self.position)
+                start = self.phrase_start(onset, pre_roll)
+
+                # Read until pause_threshold of quiet; ends[i] is where buffer i of the phrase ends
+                ends = [self.position]
+                pause_count = 0
+                gaps = []  # quiet runs between loud chunks, in buffers
+                exhausted = limited = False
+                while True:
+                    limit = phrase_time_limit
+                    if limit is None and endpointer is not None:
+                        limit = endpointer.phrase_limit(context, (len(ends) - 1 - pause_count) * seconds_per_buffer)
+                    if (limit and len(ends) * seconds_per_buffer > limit) or ends[-1] - start >= longest:
+                        limited = True
+                        break
+                    chunk = self.read_view()
+                    if not chunk:
+                        exhausted = True
+                        break
+                    ends.append(self.position)
+                    if audioop.rms(chunk, self.SAMPLE_WIDTH) > recognizer.energy_threshold:
+                        if pause_count:
+                            gaps.append(pause_count)
+                        pause_count = 0
+                    else:
+                        pause_count += 1
+                        if endpointer is not None:
+                            speech = (len(ends) - 1 - pause_count) * seconds_per_buffer
+                            pause = endpointer.pause_limit(context, speech)
+                            pause_buffer_count = math.ceil(pause / seconds_per_buffer)
+                    if pause_count > pause_buffer_count:
+                        break
+
+                if len(ends) - 1 - pause_count >= phrase_buffer_count or exhausted:
+                    break
+
+            if endpointer is not None:
+                speech_end = ends[len(ends) - 1 - pause_count] / self.SAMPLE_RATE
+                endpointer.observe(context, onset / self.SAMPLE_RATE, speech_end,
+                                   [gap * seconds_per_buffer for gap in gaps], limited)
+
+            # Keep non_speaking_duration of the trailing quiet, like sr.Recognizer.listen
+            dropped = max(0, pause_count - non_speaking_buffer_count)
+            return self.hand_over(start, ends[len(ends) - 1 - dropped])
+        finally:
+            self.release_hold()
+
+    def stats(self):
+        """Ring size, overruns and phrases handed over (and copied out)"""
+        return {
+            'buffer_seconds': self._capacity / self.SAMPLE_WIDTH / self.SAMPLE_RATE,
+            'overruns': self.overruns,
+            'phrases': self.phrases,
+            'copies': self.copies,
+        }
@@ -0,0 +1,139 @@
+"""
+Multi-Channel Mixing
+Several microphones (or channels of one device) combined into the mono
+stream the rest of the pipeline expects
+beam: delay-and-sum - each channel is aligned to the first by a GCC-PHAT
+delay estimate learned while someone is speaking, then averaged, so the
+voice adds up and uncorrelated noise partly cancels
+best: the channel with the highest SNR when a phrase starts, held until
+the phrase ends
+"""
+
+import numpy as np
+
+MIX_MODES = ("beam", "best")
+MAX_DELAY_SECONDS = 0.0015  # about 50 cm of microphone spacing
+SPEECH_RATIO = 2.0  # block RMS over the noise floor that counts as speech
+CROSS_SMOOTHING = 0.8  # weight of the previous cross-spectrum on each speech block
+NOISE_RISE = 1.002  # noise floor creeps up this much per block, drops at once
+
+
+class ChannelMixer:
+    """
+    Streaming mixer: feed (samples, channels) int16 blocks, get mono int16 back
+
+    The beam output lags the input by the largest steering delay
+    (MAX_DELAY_SECONDS) so that every channel can be aligned without
+    looking ahead. ``delays`` holds the current per-channel delays in
+    samples and ``selected`` the channel the best mode is using.
+    """
+
+    def __init__(self, channels, sample_rate, mode="beam", max_delay=MAX_DELAY_SECONDS):
+        if mode not in MIX_MODES:
+            raise ValueError(f"Unknown mix mode: {mode}")
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.max_lag = max(1, int(round(max_delay * sample_rate)))
+
+        self.delays = np.zeros(channels, dtype=int)
+        self.selected = 0
+        self.noise = None  # per-channel noise floor (block RMS)
+        self._history = np.zeros((2 * self.max_lag, channels), dtype=np.float32)
+        self._cross = None  # smoothed, whitened cross-spectra against channel 0
+        self._in_phrase = False
+        self._quiet_blocks = 0
+
+        self.blocks = 0
+        self.speech_blocks = 0
+
+    def process(self, block):
+        """Mix one block of int16 samples shaped (samples, channels)"""
+        block = np.asarray(block, dtype=np.float32)
+        rms = np.sqrt(np.mean(block ** 2, axis=0)) + 1e-3
+        if self.noise is None:
+            self.noise = rms.copy()
+        speech = bool(np.max(rms / self.noise) > SPEECH_RATIO)
+        if not speech:
+            self.noise = np.minimum(self.noise * NOISE_RISE, rms)
+        self.blocks += 1
+        self.speech_blocks += speech
+
+        if self.mode == "best":
+            mixed = block[:, self._select(rms, speech)]
+        else:
+            if speech:
+                self._steer(block)
+            mixed = self._delay_and_sum(block)
+        return np.clip(mixed, -32768, 32767).astype(np.int16)
+
+    def _select(self, rms, speech):
+        """Channel with the best SNR at the start of each phrase, held until it ends"""
+        if speech and not self._in_phrase:
+            self.selected = int(np.argmax(rms / self.noise))
+        if speech:
+            self._in_phrase = True
+            self._quiet_blocks = 0
+        elif self._in_phrase:
+            self._quiet_blocks += 1
+            if self._quiet_blocks > 4:  # a pause between words does not end the phrase
+                self._in_phrase = False
+        return self.selected
+
+    def _steer(self, block):
+        """Update the channel delays from a block of speech (GCC-PHAT against channel 0)"""
+        size = 2 * len(block)
+        spectra = np.fft.rfft(block, n=size, axis=0)
+        cross = spectra * np.conj(spectra[:, :1])
+        cross /= np.maximum(np.abs(cross), 1e-9)
+        if self._cross is None:
+            self._cross = cross
+        elif self._cross.shape == cross.shape:
+            self._cross = CROSS_SMOOTHING * self._cross + (1 - CROSS_SMOOTHING) * cross
+        else:
+            self._cross = cross  # block size changed
+
+        correlation = np.fft.irfft(self._cross, n=size, axis=0)
+        lags = np.concatenate((correlation[:self.max_lag + 1], correlation[-self.max_lag:]))
+        peak = np.argmax(lags, axis=0)
+        self.delays = np.where(peak <= self.max_lag, peak, peak - len(lags))
+
+    def _delay_and_sum(self, block):
+        buffer = np.concatenate((self._history, block))
+        self._history = buffer[-2 * self.max_lag:]
+        count = len(block)
+        aligned = [buffer[self.max_lag + delay:self.max_lag + delay + count, channel]
+                   for channel, delay in enumerate(self.delays)]
+        return np.mean(aligned, axis=0)
+
+
+class MixedSource:
+    """
+    Wraps a multi-channel source (a device opened with several channels, a
+    MultiDeviceSource or a multi-channel WAV) as a mono source
+    """
+
+    def __init__(self, source, mode="beam"):
+        self.source = source
+        self.live = source.live
+        self.sample_rate = source.sample_rate
+        self.sample_width = 2
+        self.chunk_size = source.chunk_size
+        self.channels = 1
+        self.mixer = ChannelMixer(source.channels, source.sample_rate, mode)
+
+    def open(self):
+        self.source.open()
+        if self.source.sample_width != 2:
+            raise ValueError("multi-channel mixing needs 16-bit audio")
+
+    def read(self):
+        """Read and mix one chunk; b'' at the end of the input"""
+        data = self.source.read()
+        if not data:
+            return data
+        block = np.frombuffer(data, dtype=np.int16).reshape(-1, self.source.channels)
+        return self.mixer.process(block).tobytes()
+
+    def close(self):
+        self.source.close()
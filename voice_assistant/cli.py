@@ -0,0 +1,116 @@
+"""
+Command-Line Entry Point
+python -m voice_assistant {basic,wake,secure,microphones,journal} [options]
+Each mode's module is imported only once it has been chosen
+"""
+
+import argparse
+import importlib
+import os
+
+# subcommand -> (module, class, help)
+MODES = {
+    'basic': ('.modes.basic', 'BasicMode', "every phrase is a media command"),
+    'wake': ('.modes.wake', 'WakeWordMode', "say the wake word, then commands for a minute"),
+    'secure': ('.modes.secure', 'SecureMode', "voice password unlock, then wake word sessions"),
+}
+
+
+def _env_int(name):
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="voice_assistant", description="Voice-controlled media keys")
+    subcommands = parser.add_subparsers(dest='mode', required=True)
+
+    for name, (_, _, help_text) in MODES.items():
+        mode = subcommands.add_parser(name, help=help_text)
+        mode.add_argument('--backend', default=os.environ.get("VOICE_RECOGNIZER", "google"),
+                          help="speech-to-text engine: google, local, replay:<dir>, grammar or grammar:<dir>; "
+                               "several joined by commas are raced (env VOICE_RECOGNIZER)")
+        mode.add_argument('--recognition-cache', type=int, metavar="ENTRIES",
+                          default=int(os.environ.get("VOICE_RECOGNITION_CACHE", 64)),
+                          help="transcripts remembered for repeated phrases, 0 to disable (env VOICE_RECOGNITION_CACHE)")
+        mode.add_argument('--device', action='append', metavar="INDEX|NAME",
+                          help="microphone index or name pattern (see the microphones command); "
+                               "repeat to capture from several microphones at once")
+        mode.add_argument('--channels', type=int, default=1,
+                          help="channels to capture from each microphone")
+        mode.add_argument('--mix', choices=["beam", "best"], default="beam",
+                          help="how several channels become one: delay-and-sum beam or the best-SNR channel per phrase")
+        mode.add_argument('--input', metavar="WAV|JOURNAL",
+                          help="replay a WAV file, or the phrases of a journal directory, instead of the microphone")
+        mode.add_argument('--conditioning', choices=["on", "off"], default=os.environ.get("VOICE_CONDITIONING", "on"),
+                          help="high-pass, noise suppression and gain control before recognition "
+                               "(env VOICE_CONDITIONING)")
+        mode.add_argument('--endpointing', choices=["adaptive", "fixed"],
+                          default=os.environ.get("VOICE_ENDPOINTING", "adaptive"),
+                          help="end phrases on a pause learned per context and speaker, or on each mode's "
+                               "fixed pause (env VOICE_ENDPOINTING)")
+        mode.add_argument('--pre-roll', type=float, metavar="SECONDS",
+                          help="audio kept from before the start of each phrase (default 0.5)")
+        mode.add_argument('--replay-speed', type=float, default=1.0, metavar="X",
+                          help="play --input X times faster than real time")
+        if name in ('wake', 'secure'):
+            mode.add_argument('--command-mode', choices=["pipeline", "streaming"],
+                              default=os.environ.get("VOICE_COMMAND_MODE", "pipeline"),
+                              help="streaming acts on partial results (env VOICE_COMMAND_MODE)")
+        if name == 'secure':
+            mode.add_argument('--speaker-encoder', choices=["auto", "wav2vec2", "mfcc"],
+                              default=os.environ.get("VOICE_SPEAKER_ENCODER", "auto"),
+                              help="voiceprint model (env VOICE_SPEAKER_ENCODER)")
+            mode.add_argument('--profiles', metavar="DIR", default=os.environ.get("VOICE_PROFILES"),
+                              help="several users, each with their own password, voiceprint, wake word and "
+                                   "commands, kept in DIR (env VOICE_PROFILES)")
+            mode.add_argument('--enroll', metavar="NAME", help="enroll a new voice profile by voice, then run")
+            mode.add_argument('--wake-word', default="computer", help="wake word of the profile being enrolled")
+            mode.add_argument('--commands', metavar="INTENT,...",
+                              help="intents the profile being enrolled may use (default: all)")
+        mode.add_argument('--metrics-file', metavar="JSONL", default=os.environ.get("VOICE_METRICS_FILE"),
+                          help="append stage latency summaries to this file (env VOICE_METRICS_FILE)")
+        mode.add_argument('--metrics-port', type=int, default=_env_int("VOICE_METRICS_PORT"),
+                          help="serve Prometheus metrics on 127.0.0.1:PORT (env VOICE_METRICS_PORT)")
+        mode.add_argument('--metrics-interval', type=float, default=10.0, metavar="SECONDS",
+                          help="seconds between metrics file snapshots")
+        mode.add_argument('--journal', metavar="DIR", default=os.environ.get("VOICE_JOURNAL"),
+                          help="record session events in a binary journal in DIR (env VOICE_JOURNAL)")
+        mode.add_argument('--journal-audio', action='store_true',
+                          help="also journal the audio of every phrase, passwords included, for replay with --input")
+
+    subcommands.add_parser('microphones', help="list the available microphones")
+    journal = subcommands.add_parser('journal', help="list the records of a session journal")
+    journal.add_argument('directory', metavar="DIR")
+    journal.add_argument('--audio', action='store_true', help="list the journaled phrases too")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    options = parser.parse_args(argv)
+
+    if options.mode == 'microphones':
+        from .common import test_microphone
+        return 0 if test_microphone() else 1
+    if options.mode == 'journal':
+        from .journal import print_journal
+        print_journal(options.directory, audio=options.audio)
+        return 0
+
+    if getattr(options, 'enroll', None):
+        from .profiles import valid_name
+        if not options.profiles:
+            parser.error("--enroll needs --profiles")
+        if not valid_name(options.enroll):
+            parser.error(f"profile names are 1-32 of a-z, 0-9, _ and -: {options.enroll!r}")
+    if getattr(options, 'commands', None):
+        from .intents import COMMANDS
+        unknown = set(options.commands.split(",")) - {command.intent for command in COMMANDS}
+        if unknown:
+            parser.error(f"unknown intents: {', '.join(sorted(unknown))}")
+
+    module_name, class_name, _ = MODES[options.mode]
+    mode_class = getattr(importlib.import_module(module_name, __package__), class_name)
+    mode_class(options).run()
+    return 0
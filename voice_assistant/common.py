@@ -0,0 +1,205 @@
+"""
+Shared Mode Setup
+Recognizer settings, the capture stream, noise tracking, the recognizer
+backend and media keys: what each script used to build for itself
+numpy loads with the capture stream every mode needs; heavier modules
+load only when used: scipy with the first audio, pynput on the first key
+press, pyaudio when the microphone opens, torch inside the local engines
+Journal replay, channel mixing, the recognition cache and recognizer
+racing are imported in the branches that build them
+"""
+
+import os
+import time
+
+import speech_recognition as sr
+
+from .audio_capture import CaptureStream, MicrophoneSource, MultiDeviceSource, WavFileSource, resolve_device
+from .endpointing import Endpointer
+from .frontend import AudioFrontEnd, ConditionedSource
+from .intents import IntentEngine
+from .journal import Journal
+from .keys import KeyDispatcher
+from .metrics import Metrics
+from .noise_floor import NoiseFloorTracker
+from .recognizer_backends import create_backend
+from .vad import VoiceActivityDetector
+
+
+def test_microphone():
+    """Test and display available microphones"""
+    print("\nDetecting available microphones...")
+
+    try:
+        mic_list = sr.Microphone.list_microphone_names()
+        print(f"\nFound {len(mic_list)} microphone(s):")
+        for i, name in enumerate(mic_list):
+            print(f"  [{i}] {name}")
+
+        return True
+    except Exception as e:
+        print(f"Error detecting microphones: {e}")
+        return False
+
+
+def display_commands():
+    """Display the media commands every mode understands"""
+    print("AVAILABLE COMMANDS:")
+    print("-" * 60)
+    print("Playback Control:")
+    print("  - pause, stop       : Pause media")
+    print("  - play, resume      : Play/resume media")
+    print("  - next, skip        : Next track")
+    print("  - previous, back    : Previous track")
+    print("\nVolume Control:")
+    print("  - volume up, louder      : Increase volume")
+    print("  - volume down, quieter   : Decrease volume")
+    print("  - mute, unmute           : Toggle mute")
+    print("-" * 60)
+
+
+class VoiceMode:
+    """
+    Base class for the CLI modes
+
+    Builds the pieces every mode shares from the parsed command-line
+    options. Subclasses override the tuning attributes that used to differ
+    between the scripts and implement ``run``.
+    """
+
+    energy_threshold = 300
+    pause_threshold = 1.0
+    warmup_seconds = 1.0
+    chunk_size = 1024
+    volume_steps = 1  # key presses per volume command unless a number is spoken
+    key_interval = 0.02  # minimum gap between key presses, so the OS keeps every one
+    timed_methods = ('listen', 'listen_for_wake_word', 'listen_for_command', 'unlock_program', 'control_media')
+
+    def __init__(self, options):
+        self.options = options
+        self.clock = time.monotonic  # session deadlines; a replay can run them on audio time instead
+
+        self.recognizer = sr.Recognizer()
+        self.recognizer.energy_threshold = self.energy_threshold
+        self.recognizer.dynamic_energy_threshold = False  # noise_tracker adapts continuously instead
+        self.recognizer.dynamic_energy_adjustment_damping = 0.15
+        self.recognizer.dynamic_energy_ratio = 1.5
+        self.recognizer.pause_threshold = self.pause_threshold
+
+        # Opened once and kept open; a WAV file can stand in for the microphone
+        source = self.open_source(options)
+
+        # Conditioning and the features the wake word spotter shares, on the capture thread
+        self.frontend = AudioFrontEnd(source.sample_rate, conditioning=options.conditioning == "on")
+        # Phrase ends adapt to the context and the speaker unless --endpointing fixed
+        self.endpointer = Endpointer(self.pause_threshold, adaptive=options.endpointing == "adaptive")
+        self.microphone = CaptureStream(ConditionedSource(source, self.frontend), pre_roll=options.pre_roll,
+                                        endpointer=self.endpointer)
+
+        # Background noise-floor estimate replaces calibrating before every listen
+        self.noise_tracker = NoiseFloorTracker(self.recognizer, time_constant=2.0,
+                                               warmup_seconds=self.warmup_seconds)
+        self.noise_tracker.attach(self.microphone)
+
+        self.backend = create_backend(options.backend, self.recognizer)
+        # Passwords always reach the recognizer itself: a cached transcript of a similar
+        # phrase would answer a confirmation or an unlock attempt without hearing it
+        self.password_backend = self.backend
+        self.recognition_cache = None
+        if options.recognition_cache:
+            # Near-identical repeats of a phrase reuse its transcript
+            from .recognition_cache import CachedBackend
+            self.recognition_cache = self.backend = CachedBackend(self.backend, capacity=options.recognition_cache)
+        self.vad = VoiceActivityDetector()  # non-speech phrases are dropped before recognition
+        self.intent_engine = IntentEngine()
+        self.keys = KeyDispatcher(min_interval=self.key_interval)  # presses run off the listening thread
+
+        # Stage timings; only wrapped in when --metrics-file or --metrics-port is given
+        self.metrics = Metrics.from_options(options)
+        self.metrics.instrument(self, self.timed_methods)
+
+        # Session events, and phrase audio with --journal-audio, for later replay; only with --journal
+        self.journal = Journal.from_options(options, source.sample_rate, position=lambda: self.microphone.position)
+        if self.journal.enabled:
+            self.microphone.add_phrase_listener(self.journal.record_phrase)
+
+    def open_source(self, options):
+        """Audio source for the options: one or more microphones, a WAV file or a journal, mixed to mono"""
+        if options.input and os.path.isdir(options.input):
+            from .journal import JournalSource
+            source = JournalSource(options.input, chunk_size=self.chunk_size, realtime=True,
+                                   speed=options.replay_speed)
+        elif options.input:
+            source = WavFileSource(options.input, chunk_size=self.chunk_size, realtime=True,
+                                   speed=options.replay_speed)
+        else:
+            devices = [resolve_device(spec) for spec in options.device or [None]]
+            sources = [MicrophoneSource(index, chunk_size=self.chunk_size, channels=options.channels)
+                       for index in devices]
+            source = sources[0] if len(sources) == 1 else MultiDeviceSource(sources)
+        if source.channels > 1:
+            print(f"Mixing {source.channels} channels ({options.mix})")
+            from .beamforming import MixedSource
+            source = MixedSource(source, options.mix)
+        return source
+
+    def calibrate(self):
+        """One-time calibration; the tracker keeps it current from then on"""
+        if not self.options.input:
+            test_microphone()
+        print("\nCalibrating microphone...")
+        self.microphone.start()
+        self.noise_tracker.wait_ready(timeout=self.warmup_seconds + 1)
+
+    def control_media(self, command, match=None):
+        """Send the media key for a command; False if it is not one"""
+        if match is None:
+            match = self.intent_engine.match(command)
+
+        # Locking only exists in the secure mode
+        if match is None or match.key is None:
+            print(f"Unknown command: {command}")
+            self.journal.record('command', f"unknown: {command}")
+            return False
+
+        if match.intent in ('volume_up', 'volume_down'):
+            steps = self.volume_steps if match.count is None else match.count
+            queued = self.keys.submit(match.key, steps)  # fewer than asked once a burst reaches max_steps
+            self.journal.record('command', f"{match.intent} x{queued}: {command}")
+            capped = f" of {steps} asked, {self.keys.max_steps} at most per burst" if queued < steps else ""
+            print(f"Executed: {match.label} ({queued} steps{capped})")
+            return True
+
+        self.journal.record('command', f"{match.intent}: {command}")
+        self.keys.submit(match.key)
+        print(f"Executed: {match.label}")
+        return True
+
+    def run(self):
+        raise NotImplementedError
+
+    def close(self):
+        """Release the microphone, finish queued key presses and report the speech gate counters"""
+        self.microphone.stop()
+        self.keys.close()
+        self.backend.close()
+        self.metrics.close()
+        self.journal.close()
+        print(f"Speech gate: {self.vad.accepted} phrases recognized, {self.vad.dropped} dropped as non-speech")
+        if self.endpointer.adaptive:
+            stats = self.endpointer.stats()
+            print(f"Endpointing: {stats['phrases']} phrases, {stats['resumes']} resumed after a pause, "
+                  f"command pause now {stats['command_pause']:.2f} s")
+        if self.journal.enabled:
+            stats = self.journal.stats()
+            print(f"Journal: {stats['records']} records ({stats['phrases']} phrases), {stats['bytes']} bytes "
+                  f"in {self.journal.directory}, {stats['dropped']} dropped")
+        if self.recognition_cache is not None:
+            print(f"Recognition cache: {self.recognition_cache.hits} hits, {self.recognition_cache.misses} misses")
+        from .racing import RacingBackend
+        race = getattr(self.backend, 'backend', self.backend)
+        if isinstance(race, RacingBackend):
+            stats = race.stats()
+            wins = ", ".join(f"{name} {count}" for name, count in stats['wins'].items())
+            print(f"Recognizer race: {stats['races']} phrases, wins {wins}, "
+                  f"{stats['fallbacks']} by fallback, {stats['failures']} failed")
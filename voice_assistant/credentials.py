@@ -0,0 +1,172 @@
+"""
+Credential Store
+The startup password record, loaded once and kept in memory; the file is
+read again only when its mtime, size or inode change, and replaced
+atomically on write
+Passwords are kept as salted scrypt hashes with their cost settings
+The caching and atomic writes are shared with the voice profile store
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import threading
+
+# Cost settings for new hashes; benchmarks/credential_benchmark.py picks them
+# against the unlock latency budget
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+class CredentialError(Exception):
+    """The password file exists but cannot be read or parsed"""
+
+
+def hash_password(password, salt=None, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+    """Salted scrypt hash of ``password`` as a record dict"""
+    salt = salt if salt is not None else os.urandom(SALT_BYTES)
+    return {
+        'kdf': 'scrypt',
+        'n': n,
+        'r': r,
+        'p': p,
+        'salt': salt.hex(),
+        'password_hash': _derive(password, salt, n, r, p).hex(),
+    }
+
+
+def _derive(password, salt, n, r, p):
+    # scrypt needs 128 * n * r bytes; the default 32 MB limit is too small for larger n
+    return hashlib.scrypt(password.lower().encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r + 1024 * 1024, dklen=KEY_BYTES)
+
+
+def check_password(record, password):
+    """True if ``password`` matches the hash in ``record``"""
+    stored = record.get('password_hash', '')
+    if record.get('kdf') == 'scrypt':
+        candidate = _derive(password, bytes.fromhex(record['salt']),
+                            record['n'], record['r'], record['p']).hex()
+    else:
+        # Records written before salting: a bare SHA-256 of the phrase
+        candidate = hashlib.sha256(password.lower().encode()).hexdigest()
+    return hmac.compare_digest(candidate, stored)
+
+
+def needs_rehash(record, cost):
+    """True if ``record`` is unsalted or hashed with other cost settings than ``cost``"""
+    return record.get('kdf') != 'scrypt' or any(record.get(key) != value for key, value in cost.items())
+
+
+class RecordFile:
+    """
+    Cached view of one JSON record file
+
+    ``record`` costs a single ``os.stat`` while the file is unchanged.
+    A missing file reads as no record. A file that cannot be parsed, or
+    fails ``validate``, raises CredentialError instead of being treated as
+    missing. Writes go to a temporary file renamed over the old one.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.loads = 0  # times the file was actually read
+        self._record = None
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def _stat_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    @property
+    def record(self):
+        """The current record, or None if the file is missing"""
+        with self._lock:
+            signature = self._stat_signature()
+            if signature != self._signature:
+                self._record = self._read() if signature is not None else None
+                self._signature = signature
+            return self._record
+
+    def _read(self):
+        self.loads += 1
+        try:
+            with open(self.path, 'r') as f:
+                record = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CredentialError(f"cannot read {self.path}: {e}") from e
+        if not isinstance(record, dict):
+            raise CredentialError(f"{self.path} does not hold a record")
+        self.validate(record)
+        return record
+
+    def validate(self, record):
+        """Raise CredentialError if ``record`` is not what the file should hold"""
+
+    def _write(self, record):
+        """Write to a temporary file in the same directory, then rename over the old one"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temporary = tempfile.mkstemp(prefix=".password-", dir=directory)
+        try:
+            with os.fdopen(descriptor, 'w') as f:
+                json.dump(record, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(temporary, 0o600)
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+        with self._lock:
+            self._record = record
+            self._signature = self._stat_signature()
+
+
+class CredentialStore(RecordFile):
+    """Cached view of one password file"""
+
+    def __init__(self, path, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+        super().__init__(path)
+        self.cost = {'n': n, 'r': r, 'p': p}
+
+    def validate(self, record):
+        if 'password_hash' not in record:
+            raise CredentialError(f"{self.path} has no password hash")
+
+    @property
+    def exists(self):
+        return self.record is not None
+
+    @property
+    def hint(self):
+        record = self.record
+        return record.get('password_hint', 'No hint') if record else None
+
+    def set_password(self, password, hint=None):
+        """Hash ``password`` with the current cost settings and save it"""
+        record = hash_password(password, **self.cost)
+        record['password_hint'] = hint if hint is not None else password[:3] + "..."
+        self._write(record)
+
+    def verify(self, password):
+        """
+        True if ``password`` matches the stored hash
+        A match against an unsalted or cheaper hash is re-saved with the current settings
+        """
+        record = self.record
+        if record is None or not check_password(record, password):
+            return False
+
+        if needs_rehash(record, self.cost):
+            self.set_password(password, record.get('password_hint'))
+        return True
@@ -0,0 +1,127 @@
+"""
+Adaptive Endpointing
+Decides when a phrase has ended from what is being said and who is
+saying it, in place of one fixed pause_threshold and phrase_time_limit
+per call site
+The trailing silence needed grows with the pauses this speaker leaves
+inside phrases, is short after a command-sized burst of speech in a
+session and long while a password is spoken. A speaker who carries on
+right after a phrase was cut stretches it further
+"""
+
+import collections
+import threading
+
+import numpy as np
+
+# context: (shortest and longest trailing silence in seconds, phrase time limit floor and cap)
+CONTEXTS = {
+    'command': (0.35, 0.9, 4.0, 10.0),
+    'password': (0.9, 1.6, 6.0, 12.0),
+    'dictation': (0.6, 1.4, 8.0, 20.0),
+}
+# The phrase time limits the call sites used before, for --endpointing fixed
+FIXED_PHRASE_LIMITS = {'command': 5.0, 'password': 5.0, 'dictation': 8.0}
+
+GAP_MARGIN = 1.8  # trailing silence over the longest usual pause inside a phrase
+PRIOR_GAP = 0.25  # seconds, until pauses have been observed
+PRIOR_COMMAND_SECONDS = 1.2  # speech in a typical command, until commands have been observed
+DURATION_MARGIN = 2.0  # phrase time limit over the longest usual phrase
+RESUME_WINDOW = 1.0  # speech this soon after a phrase ended by silence continues it
+STRETCH_STEP = 1.25
+MAX_STRETCH = 2.0
+STRETCH_DECAY = 0.9  # per phrase that was not resumed
+HISTORY = 200
+
+
+class Endpointer:
+    """
+    Trailing-silence timeout and phrase time limit per listening context
+
+    Both are asked as a phrase goes on, with the seconds of it heard so
+    far. A command phrase that has run longer than commands usually do is
+    treated like dictation: it is probably a sentence, which may pause
+    and should not be cut. ``observe`` is told how each phrase went, in
+    stream seconds. With ``adaptive`` off they are the fixed
+    ``pause_threshold`` and FIXED_PHRASE_LIMITS.
+    """
+
+    def __init__(self, pause_threshold=0.8, adaptive=True):
+        self.pause_threshold = pause_threshold
+        self.adaptive = adaptive
+        self._lock = threading.Lock()
+        self._gaps = collections.defaultdict(lambda: collections.deque(maxlen=HISTORY))  # pauses inside phrases
+        self._durations = collections.defaultdict(lambda: collections.deque(maxlen=HISTORY))
+        self._gap_limits = {context: PRIOR_GAP for context in CONTEXTS}
+        self._phrase_limits = {context: floor for context, (_, _, floor, _) in CONTEXTS.items()}
+        self._command_seconds = PRIOR_COMMAND_SECONDS
+        self._stretch = 1.0
+        self._last_end = None  # stream seconds where the last phrase ended, if by silence
+
+        self.phrases = 0
+        self.resumes = 0  # phrases that turned out to continue the one before
+        self.limited = 0  # phrases cut by the phrase time limit
+
+    @property
+    def longest_phrase(self):
+        """Seconds of the longest phrase any context allows"""
+        if not self.adaptive:
+            return max(FIXED_PHRASE_LIMITS.values())
+        return max(cap for _, _, _, cap in CONTEXTS.values())
+
+    def pause_limit(self, context, speech_seconds):
+        """Seconds of silence that end a phrase with ``speech_seconds`` of it heard so far"""
+        if not self.adaptive:
+            return self.pause_threshold
+        context = self._context(context, speech_seconds)
+        shortest, longest, _, _ = CONTEXTS[context]
+        with self._lock:
+            return float(np.clip(GAP_MARGIN * self._gap_limits[context] * self._stretch, shortest, longest))
+
+    def phrase_limit(self, context, speech_seconds=0.0):
+        """Longest a phrase in ``context`` may run, with ``speech_seconds`` of it heard so far"""
+        if not self.adaptive:
+            return FIXED_PHRASE_LIMITS[context]
+        return self._phrase_limits[self._context(context, speech_seconds)]
+
+    def _context(self, context, speech_seconds):
+        if context == 'command' and speech_seconds > self._command_seconds:
+            return 'dictation'
+        return context
+
+    def observe(self, context, onset, speech_end, gaps, limited):
+        """Learn from a phrase: its speech onset and end, the pauses inside it, and whether the limit cut it"""
+        context = self._context(context, speech_end - onset)
+        with self._lock:
+            self.phrases += 1
+            self.limited += limited
+            pauses = self._gaps[context]
+            resumed = self._last_end is not None and 0 <= onset - self._last_end < RESUME_WINDOW
+            if resumed:
+                # The last phrase ended on a pause inside it
+                self.resumes += 1
+                self._stretch = min(MAX_STRETCH, self._stretch * STRETCH_STEP)
+            else:
+                self._stretch = 1.0 + STRETCH_DECAY * (self._stretch - 1.0)
+            self._last_end = None if limited else speech_end
+
+            pauses.extend(gaps)
+            if pauses:
+                self._gap_limits[context] = max(PRIOR_GAP / 2, float(np.percentile(pauses, 90)))
+            durations = self._durations[context]
+            durations.append(speech_end - onset)
+            _, _, floor, cap = CONTEXTS[context]
+            self._phrase_limits[context] = float(np.clip(DURATION_MARGIN * np.percentile(durations, 95), floor, cap))
+            commands = self._durations['command']
+            if len(commands) >= 3:
+                self._command_seconds = float(np.percentile(commands, 75)) + self._gap_limits['command']
+
+    def stats(self):
+        """Phrases seen, how many were resumed or cut, and the current pause limits"""
+        return {
+            'phrases': self.phrases,
+            'resumes': self.resumes,
+            'limited': self.limited,
+            'command_pause': self.pause_limit('command', 0.0),
+            'password_pause': self.pause_limit('password', 0.0),
+        }
@@ -0,0 +1,497 @@
+"""
+Audio Front-End
+Conditions captured audio before anything else sees it - high-pass,
+spectral noise suppression, automatic gain control - and computes the
+spectral features every consumer shares
+Streaming work runs on buffers allocated once (grown only for a longer
+chunk), so steady capture allocates nothing per frame but the FFT output
+Phrase features: one power spectrogram per captured phrase, from which
+the VAD, the recognition cache, the voiceprint and wake word enrollment
+all take their frames
+scipy.fft is imported where the spectra are computed, so it loads on
+the capture thread with the first audio, during calibration, not on import
+"""
+
+import functools
+import threading
+import time
+import weakref
+
+import numpy as np
+
+DEFAULT_SAMPLE_RATE = 16000
+
+# Feature framing shared by every consumer
+FRAME_MS = 25
+HOP_MS = 10
+N_FFT = 512
+N_MELS = 26
+PREEMPHASIS = 0.97  # folded into the mel weights, so the power spectrum itself stays flat
+LOG_FLOOR = 1e-6
+
+# Conditioning
+CONDITION_FFT = 512  # 32 ms frames at 16 kHz, half overlapped
+HIGHPASS_HZ = 80  # rumble, hum and desk thumps sit below the voice
+WARMUP_SECONDS = 0.25  # averaged into the first noise estimate whatever they hold
+SPEECH_RATIO = 2.0  # voice-band power over the noise estimate that counts as speech
+MAX_SPEECH_SECONDS = 5.0  # "speech" this long is the room getting louder
+NOISE_SMOOTHING = 0.9  # weight of the old noise estimate on each noise frame
+NOISE_RISE = 1.001  # per frame, so the estimate can follow a room that gets louder during speech
+OVERSUBTRACTION = 2.0
+GAIN_FLOOR = 0.15  # at most about 16 dB of suppression
+GAIN_RELEASE = 0.5  # a bin's gain falls at most this much per frame (less musical noise)
+TARGET_RMS = 3000  # speech level the AGC aims for
+MIN_GAIN = 0.5
+MAX_GAIN = 8.0  # about 18 dB for far-field speech
+LEVEL_SMOOTHING = 0.1
+AGC_SMOOTHING = 0.2
+
+
+def mel_filterbank(sample_rate, n_fft, n_mels, low_hz=60, high_hz=None):
+    """Triangular mel filters as an (n_mels, n_fft // 2 + 1) matrix"""
+    high_hz = high_hz or sample_rate / 2
+
+    def hz_to_mel(hz):
+        return 2595 * np.log10(1 + hz / 700)
+
+    def mel_to_hz(mel):
+        return 700 * (10 ** (mel / 2595) - 1)
+
+    mel_points = np.linspace(hz_to_mel(low_hz), hz_to_mel(high_hz), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mel_points) / sample_rate).astype(int)
+
+    filters = np.zeros((n_mels, n_fft // 2 + 1))
+    for m in range(1, n_mels + 1):
+        left, centre, right = bins[m - 1], bins[m], bins[m + 1]
+        if centre > left:
+            filters[m - 1, left:centre] = (np.arange(left, centre) - left) / (centre - left)
+        if right > centre:
+            filters[m - 1, centre:right] = (right - np.arange(centre, right)) / (right - centre)
+    return filters
+
+
+def dct_matrix(n_out, n_in):
+    """Orthonormal DCT-II as a matrix, so cepstra are one matmul"""
+    k = np.arange(n_out)[:, None]
+    n = np.arange(n_in)[None, :]
+    matrix = np.cos(np.pi * k * (2 * n + 1) / (2 * n_in)) * np.sqrt(2 / n_in)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+@functools.lru_cache(maxsize=None)
+def mel_weights(sample_rate, n_fft, n_mels, preemphasis=PREEMPHASIS):
+    """(bins, n_mels) float32 mel matrix with the pre-emphasis response folded in"""
+    omega = 2 * np.pi * np.fft.rfftfreq(n_fft, 1 / sample_rate) / sample_rate
+    emphasis = 1 + preemphasis ** 2 - 2 * preemphasis * np.cos(omega)
+    weights = (mel_filterbank(sample_rate, n_fft, n_mels) * emphasis).T.astype(np.float32)
+    weights.flags.writeable = False
+    return weights
+
+
+@functools.lru_cache(maxsize=None)
+def cepstral_matrix(n_mels, n_mfcc):
+    """(n_mels, n_mfcc - 1) float32 DCT without c0 (loudness, not shape)"""
+    matrix = dct_matrix(n_mfcc, n_mels)[1:].T.astype(np.float32)
+    matrix.flags.writeable = False
+    return matrix
+
+
+def _reserve(array, rows):
+    """``array``, or a copy with room for at least ``rows`` rows; only ever grows"""
+    if len(array) >= rows:
+        return array
+    grown = np.zeros((max(rows, 2 * len(array)),) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def _power(spectrum, out, scratch):
+    """|spectrum|^2 into ``out`` without temporaries"""
+    np.square(spectrum.real, out=out)
+    np.square(spectrum.imag, out=scratch)
+    out += scratch
+    return out
+
+
+class FeatureExtractor:
+    """
+    Streaming log-mel front-end: feed samples, get whole frames back
+
+    The returned array is a view into buffers reused by the next call;
+    copy it to keep it. ``power`` holds the matching power spectra.
+    """
+
+    def __init__(self, sample_rate=DEFAULT_SAMPLE_RATE, frame_ms=FRAME_MS, hop_ms=HOP_MS,
+                 n_mels=N_MELS, n_fft=N_FFT, preemphasis=PREEMPHASIS):
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.hop_length = int(sample_rate * hop_ms / 1000)
+        self.n_fft = n_fft
+        self.n_mels = n_mels
+
+        self._window = np.hamming(self.frame_length).astype(np.float32)
+        self._mel = mel_weights(sample_rate, n_fft, n_mels, preemphasis)
+        bins = n_fft // 2 + 1
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._windowed = np.zeros((0, n_fft), dtype=np.float32)  # columns past the frame stay zero
+        self._power = np.zeros((0, bins), dtype=np.float32)
+        self._scratch = np.zeros((0, bins), dtype=np.float32)
+        self._log_mel = np.zeros((0, n_mels), dtype=np.float32)
+        self.power = self._power[:0]
+        self.reset()
+
+    def reset(self):
+        """Forget buffered samples"""
+        self._pending = 0
+
+    @property
+    def pending(self):
+        """Samples buffered towards the next frame"""
+        return self._pending
+
+    def process(self, samples):
+        """Append samples; return log-mel energies for every completed frame"""
+        total = self._pending + len(samples)
+        count = 1 + (total - self.frame_length) // self.hop_length if total >= self.frame_length else 0
+        self._buffer = _reserve(self._buffer, total)
+        self._buffer[self._pending:total] = samples
+
+        if count:
+            self._windowed = _reserve(self._windowed, count)
+            self._power = _reserve(self._power, count)
+            self._scratch = _reserve(self._scratch, count)
+            self._log_mel = _reserve(self._log_mel, count)
+
+            frames = np.lib.stride_tricks.sliding_window_view(
+                self._buffer[:total], self.frame_length)[::self.hop_length][:count]
+            windowed = self._windowed[:count]
+            np.multiply(frames, self._window, out=windowed[:, :self.frame_length])
+            import scipy.fft
+            self.power = _power(scipy.fft.rfft(windowed, axis=1), self._power[:count], self._scratch[:count])
+
+            log_mel = self._log_mel[:count]
+            np.matmul(self.power, self._mel, out=log_mel)
+            log_mel += LOG_FLOOR
+            np.log(log_mel, out=log_mel)
+        else:
+            self.power = self._power[:0]
+
+        consumed = count * self.hop_length
+        self._pending = total - consumed
+        self._buffer[:self._pending] = self._buffer[consumed:total]
+        return self._log_mel[:count]
+
+    def features(self, samples):
+        """Log-mel energies for a whole utterance, starting from a clean state"""
+        self.reset()
+        features = self.process(samples).copy()
+        self.reset()
+        return features
+
+
+class PhraseFeatures:
+    """
+    Spectral features of one captured phrase, computed once and shared
+
+    ``power`` is the power spectrogram on the shared framing and
+    ``energy`` the mean square of each frame; mel and cepstral views are
+    derived on demand and kept. ``trimmed`` gives the frames between the
+    first and last loud ones, in place of trimming and re-framing samples.
+    """
+
+    def __init__(self, samples, sample_rate=DEFAULT_SAMPLE_RATE):
+        self.samples = np.asarray(samples, dtype=np.int16)
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * FRAME_MS / 1000)
+        self.hop_length = int(sample_rate * HOP_MS / 1000)
+        self.hop_seconds = self.hop_length / sample_rate
+
+        count = max(0, 1 + (len(self.samples) - self.frame_length) // self.hop_length)
+        frames = np.lib.stride_tricks.sliding_window_view(
+            self.samples.astype(np.float32), self.frame_length)[::self.hop_length][:count] \
+            if count else np.zeros((0, self.frame_length), dtype=np.float32)
+        self.energy = np.einsum('ij,ij->i', frames, frames) / self.frame_length + 1e-3
+        window = np.hamming(self.frame_length).astype(np.float32)
+        import scipy.fft
+        spectrum = scipy.fft.rfft(frames * window, N_FFT, axis=1)
+        self.power = _power(spectrum, np.empty(spectrum.shape, dtype=np.float32),
+                            np.empty(spectrum.shape, dtype=np.float32))
+        self._log_mel = {}
+
+    def __len__(self):
+        return len(self.energy)
+
+    @property
+    def seconds(self):
+        return len(self.samples) / self.sample_rate
+
+    def trimmed(self, ratio=0.1):
+        """Slice of the frames from the first to the last with RMS at least ``ratio`` of the loudest"""
+        if not len(self):
+            return slice(0, 0)
+        rms = np.sqrt(self.energy)
+        loud = np.nonzero(rms >= ratio * rms.max())[0]
+        return slice(int(loud[0]), int(loud[-1]) + 1)
+
+    def log_mel(self, n_mels=N_MELS):
+        """Log-mel energies of every frame"""
+        if n_mels not in self._log_mel:
+            weights = mel_weights(self.sample_rate, N_FFT, n_mels)
+            self._log_mel[n_mels] = np.log(self.power @ weights + LOG_FLOOR)
+        return self._log_mel[n_mels]
+
+    def mfcc(self, n_mels=N_MELS, n_mfcc=13, frames=slice(None)):
+        """MFCCs without c0 for a slice of the frames"""
+        return self.log_mel(n_mels)[frames] @ cepstral_matrix(n_mels, n_mfcc)
+
+
+_phrases = weakref.WeakKeyDictionary()  # sr.AudioData -> PhraseFeatures
+_phrases_lock = threading.Lock()
+
+
+def phrase_features(audio, sample_rate=DEFAULT_SAMPLE_RATE):
+    """
+    PhraseFeatures of an sr.AudioData, int16 samples or PhraseFeatures
+
+    Features of an sr.AudioData are kept for as long as the phrase itself,
+    so every consumer of one phrase shares a single analysis.
+    """
+    if isinstance(audio, PhraseFeatures):
+        return audio
+    if isinstance(audio, np.ndarray):
+        return PhraseFeatures(audio, sample_rate)
+
+    with _phrases_lock:
+        features = _phrases.get(audio)
+    if features is None or features.sample_rate != sample_rate:
+        raw = audio.get_raw_data(convert_rate=sample_rate, convert_width=2)
+        features = PhraseFeatures(np.frombuffer(raw, dtype=np.int16), sample_rate)
+        with _phrases_lock:
+            _phrases[audio] = features
+    return features
+
+
+class AudioFrontEnd:
+    """
+    Streaming conditioner and shared feature source for the capture thread
+
+    Conditioning runs on half-overlapped sqrt-Hann frames: each frame's
+    spectrum is high-passed and scaled by a spectral-subtraction gain
+    against a noise estimate updated on non-speech frames, then the frames
+    are overlap-added back and an AGC brings speech towards TARGET_RMS,
+    holding its gain through pauses. Output lags input by half a frame.
+    With ``conditioning`` off samples pass through untouched.
+
+    Listeners registered with ``add_listener`` get the log-mel features of
+    the conditioned audio, so the wake word spotter does not frame and
+    transform the stream a second time. Features are only computed while
+    someone listens.
+    """
+
+    def __init__(self, sample_rate=DEFAULT_SAMPLE_RATE, conditioning=True, highpass_hz=HIGHPASS_HZ,
+                 target_rms=TARGET_RMS, max_gain=MAX_GAIN, n_fft=CONDITION_FFT):
+        self.sample_rate = sample_rate
+        self.conditioning = conditioning
+        self.target_rms = target_rms
+        self.max_gain = max_gain
+        self.n_fft = n_fft
+        self.hop = n_fft // 2
+        bins = n_fft // 2 + 1
+
+        # sqrt-Hann analysis and synthesis windows overlap-add to exactly one at 50% overlap
+        self._window = np.sqrt(np.hanning(n_fft + 1)[:-1]).astype(np.float32)
+        freqs = np.fft.rfftfreq(n_fft, 1 / sample_rate)
+        self._highpass = np.zeros(bins, dtype=np.float32)  # second-order Butterworth magnitude
+        self._highpass[1:] = 1 / np.sqrt(1 + (highpass_hz / freqs[1:]) ** 4)
+        self._band = slice(int(np.searchsorted(freqs, 200)), int(np.searchsorted(freqs, 4000)))
+        self._ramp = (np.arange(1, self.hop + 1) / self.hop).astype(np.float32)
+        self._max_speech_frames = int(MAX_SPEECH_SECONDS * sample_rate / self.hop)
+        self._warmup_frames = max(1, int(WARMUP_SECONDS * sample_rate / self.hop))
+
+        self._input = np.zeros(n_fft - self.hop, dtype=np.float32)  # starts with a frame of silence
+        self._filled = n_fft - self.hop
+        self._carry = np.zeros(self.hop, dtype=np.float32)  # second half of the last frame
+        self._output = np.zeros(0, dtype=np.float32)
+        self._queued = 0
+        self._result = np.zeros(0, dtype=np.int16)
+        self._windowed = np.zeros((0, n_fft), dtype=np.float32)
+        self._power = np.zeros((0, bins), dtype=np.float32)
+        self._gains = np.zeros((0, bins), dtype=np.float32)
+        self._hops = np.zeros((0, self.hop), dtype=np.float32)
+        self._speech = np.zeros(0, dtype=bool)
+        self._row = np.zeros(bins, dtype=np.float32)
+        self._last_gain = np.ones(bins, dtype=np.float32)
+        self._speech_run = 0
+
+        self.noise = None  # per-bin noise power
+        self.level = None  # speech RMS before the AGC
+        self.gain = 1.0
+
+        self.features = FeatureExtractor(sample_rate)
+        self._listeners = []
+
+        self.chunks = 0
+        self.frames = 0  # conditioning frames
+        self.speech_frames = 0
+        self.cpu_seconds = 0.0
+
+    def add_listener(self, callback):
+        """Call ``callback(log_mel)`` on the capture thread with the features of every chunk"""
+        self._listeners.append(callback)
+
+    def process(self, samples):
+        """Condition one chunk of int16 samples; returns as many, valid until the next call"""
+        start = time.process_time()
+        samples = np.asarray(samples)
+        output = self._condition(samples) if self.conditioning else samples
+        log_mel = self.features.process(output) if self._listeners else None
+        self.chunks += 1
+        self.cpu_seconds += time.process_time() - start
+
+        if log_mel is not None and len(log_mel):
+            for callback in self._listeners:
+                callback(log_mel)
+        return output
+
+    def stats(self):
+        """Chunks and frames processed, the share judged speech and the cost per chunk"""
+        return {
+            'chunks': self.chunks,
+            'frames': self.frames,
+            'speech_frames': self.speech_frames,
+            'gain_db': 20 * np.log10(self.gain),
+            'us_per_chunk': 1e6 * self.cpu_seconds / self.chunks if self.chunks else 0.0,
+        }
+
+    def _condition(self, samples):
+        hop = self.hop
+        total = self._filled + len(samples)
+        self._input = _reserve(self._input, total)
+        self._input[self._filled:total] = samples
+        count = (total - (self.n_fft - hop)) // hop
+
+        if count:
+            for name in ('_windowed', '_power', '_gains', '_hops', '_speech'):
+                setattr(self, name, _reserve(getattr(self, name), count))
+            frames = np.lib.stride_tricks.sliding_window_view(self._input[:total], self.n_fft)[::hop][:count]
+            windowed = self._windowed[:count]
+            np.multiply(frames, self._window, out=windowed)
+            import scipy.fft
+            spectrum = scipy.fft.rfft(windowed, axis=1)
+            spectrum *= self._suppression(spectrum, count)
+            shaped = scipy.fft.irfft(spectrum, self.n_fft, axis=1)
+            shaped *= self._window
+
+            hops = self._hops[:count]
+            np.add(shaped[0, :hop], self._carry, out=hops[0])
+            np.add(shaped[1:, :hop], shaped[:-1, hop:], out=hops[1:])
+            self._carry[:] = shaped[-1, hop:]
+            self._agc(hops)
+
+            self._output = _reserve(self._output, self._queued + count * hop)
+            self._output[self._queued:self._queued + count * hop] = hops.ravel()
+            self._queued += count * hop
+            self.frames += count
+
+        consumed = count * hop
+        self._filled = total - consumed
+        self._input[:self._filled] = self._input[consumed:total]
+
+        # Chunk sizes that are not a multiple of the hop start one hop late instead of running dry
+        need = len(samples)
+        if self._queued < need:
+            shortfall = need - self._queued
+            self._output = _reserve(self._output, need)
+            self._output[shortfall:need] = self._output[:self._queued]
+            self._output[:shortfall] = 0
+            self._queued = need
+
+        self._result = _reserve(self._result, need)
+        result = self._result[:need]
+        block = self._output[:need]
+        np.clip(block, -32768, 32767, out=block)
+        np.rint(block, out=block)
+        result[:] = block
+        self._queued -= need
+        self._output[:self._queued] = self._output[need:need + self._queued]
+        return result
+
+    def _suppression(self, spectrum, count):
+        """Per-frame, per-bin gains: spectral subtraction, smoothed release, high-pass"""
+        power = _power(spectrum, self._power[:count], self._gains[:count])
+        gains, row = self._gains[:count], self._row
+        if self.noise is None:
+            self.noise = np.full(len(row), LOG_FLOOR, dtype=np.float32)
+
+        for i in range(count):
+            frame = power[i]
+            warmup = self.frames + i < self._warmup_frames
+            speech = not warmup and frame[self._band].sum() > SPEECH_RATIO * self.noise[self._band].sum()
+            self._speech_run = self._speech_run + 1 if speech else 0
+            self._speech[i] = speech
+            if speech and self._speech_run <= self._max_speech_frames:
+                self.speech_frames += 1
+                self.noise *= NOISE_RISE
+            else:
+                np.subtract(frame, self.noise, out=row)
+                # The warm-up takes a plain average of its frames
+                row *= 1 / (self.frames + i + 1) if warmup else 1 - NOISE_SMOOTHING
+                self.noise += row
+                np.maximum(self.noise, LOG_FLOOR, out=self.noise)
+
+            gain = gains[i]
+            np.maximum(frame, LOG_FLOOR, out=row)
+            np.divide(self.noise, row, out=gain)
+            gain *= -OVERSUBTRACTION
+            gain += 1
+            np.maximum(gain, GAIN_FLOOR ** 2, out=gain)
+            np.sqrt(gain, out=gain)
+            np.multiply(self._last_gain, GAIN_RELEASE, out=row)
+            np.maximum(gain, row, out=gain)
+            self._last_gain[:] = gain
+            gain *= self._highpass
+        return gains
+
+    def _agc(self, hops):
+        """Move each hop's gain towards TARGET_RMS / speech level, ramped so it does not click"""
+        row = self._row[:self.hop]
+        for i, block in enumerate(hops):
+            target = self.gain
+            if self._speech[i]:
+                rms = np.sqrt(block @ block / len(block))
+                self.level = rms if self.level is None else self.level + LEVEL_SMOOTHING * (rms - self.level)
+                target = min(max(self.target_rms / max(self.level, 1.0), MIN_GAIN), self.max_gain)
+            gain = self.gain + AGC_SMOOTHING * (target - self.gain)
+            np.multiply(self._ramp, gain - self.gain, out=row)
+            row += self.gain
+            block *= row
+            self.gain = gain
+
+
+class ConditionedSource:
+    """Wraps a mono 16-bit source so everything read from it has passed through an AudioFrontEnd"""
+
+    def __init__(self, source, frontend):
+        self.source = source
+        self.frontend = frontend
+        self.live = source.live
+        self.sample_rate = source.sample_rate
+        self.sample_width = 2
+        self.chunk_size = source.chunk_size
+        self.channels = 1
+
+    def open(self):
+        self.source.open()
+        if self.source.sample_width != 2:
+            raise ValueError("the audio front-end needs 16-bit audio")
+
+    def read(self):
+        """Read and condition one chunk; b'' at the end of the input"""
+        data = self.source.read()
+        if not data:
+            return data
+        return self.frontend.process(np.frombuffer(data, dtype=np.int16)).tobytes()
+
+    def close(self):
+        self.source.close()
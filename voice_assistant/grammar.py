@@ -0,0 +1,261 @@
+"""
+Command Grammar Decoders
+Recognize only the phrases of the command table and return the intent
+directly, instead of transcribing free-form speech and matching it
+Two decoders share one interface: CTC scoring of every grammar phrase
+over the local wav2vec 2.0 model's output, and whole-phrase DTW against
+recorded examples of the commands on the shared MFCC features, which
+needs no torch at all
+"""
+
+import collections
+import os
+import threading
+
+import numpy as np
+import speech_recognition as sr
+
+from .frontend import DEFAULT_SAMPLE_RATE, phrase_features
+from .intents import COMMANDS, NUMBER_SLOT, SYNONYMS, UNITS, IntentEngine, tokenize
+from .recognizer_backends import LocalBackend, RecognizerBackend
+
+GrammarResult = collections.namedtuple('GrammarResult', ['intent', 'phrase', 'score'])
+
+NUMBER_WORDS = [word for word, value in UNITS.items() if 1 <= value <= 10]
+THRESHOLD_MARGIN = 2.0  # other voices and rooms than the recordings were made in
+DEFAULT_THRESHOLD = 0.35  # per-frame cosine distance, used with a single recording per phrase
+MIN_THRESHOLD = 0.3  # recordings of one session match each other far better than a new take
+MAX_THRESHOLD = 0.45
+TRIM_RATIO = 0.1  # edges quieter than this share of the loudest frame are room audio
+
+
+def command_phrases(commands=COMMANDS, numbers=NUMBER_WORDS):
+    """Every spoken form of the command table as (phrase, intent), number slots filled with ``numbers``"""
+    phrases = []
+    for command in commands:
+        for phrase in command.phrases:
+            forms = [phrase.replace(NUMBER_SLOT, number) for number in numbers] if NUMBER_SLOT in phrase else [phrase]
+            phrases.extend((form, command.intent) for form in forms)
+    return phrases
+
+
+class GrammarBackend(RecognizerBackend):
+    """
+    Base class: subclasses implement decode(audio) -> GrammarResult
+
+    As a recognizer backend the transcript is the decoded phrase itself,
+    which the intent engine matches exactly, and the confidence is its
+    score; ``decode`` gives the intent without going through text. The
+    decoder knows nothing outside the grammar, so passwords and other
+    free speech need a general backend raced alongside it.
+    """
+
+    name = "grammar"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.decodes = 0
+        self.rejections = 0  # phrases too far from every command
+
+    def decode(self, audio):
+        raise NotImplementedError
+
+    def _result(self, intent, phrase, score):
+        with self._lock:
+            self.decodes += 1
+            if intent is None:
+                self.rejections += 1
+        if intent is None:
+            raise sr.UnknownValueError()
+        return GrammarResult(intent, phrase, score)
+
+    def _recognize(self, audio):
+        result = self.decode(audio)
+        return result.phrase, result.score
+
+    def stats(self):
+        """Decode counters for reports"""
+        with self._lock:
+            return {'decodes': self.decodes, 'rejections': self.rejections}
+
+
+class CtcGrammarBackend(GrammarBackend):
+    """
+    Constrained decoding over the local model's character emissions
+
+    Every grammar phrase is scored by its CTC likelihood in one batched
+    call. The score is the posterior of the best intent among the grammar
+    phrases, times how close the best phrase comes to the unconstrained
+    best path per character: out-of-grammar speech fits no phrase well,
+    however the posterior is shared out.
+    """
+
+    name = "grammar-ctc"
+
+    def __init__(self, phrases=None, model=None):
+        super().__init__()
+        self.phrases = phrases if phrases is not None else command_phrases()
+        self.model = model if model is not None else LocalBackend()
+        self._targets = None
+
+    def load(self):
+        """Load the acoustic model and spell the grammar in its labels"""
+        if self._targets is not None:
+            return
+        index = {label: i for i, label in enumerate(self.model.labels)}  # RequestError without torch
+        import torch
+
+        spellings = [[index[c] for c in "|".join(phrase.upper().split()) if c in index]
+                     for phrase, _ in self.phrases]
+        self._targets = (torch.tensor([i for spelling in spellings for i in spelling], dtype=torch.long),
+                         torch.tensor([len(spelling) for spelling in spellings], dtype=torch.long))
+
+    def decode(self, audio):
+        """Best grammar phrase for ``audio`` and its intent"""
+        self.load()
+        import torch
+
+        log_probs = self.model.emissions(audio)
+        frames, count = len(log_probs), len(self.phrases)
+        targets, lengths = self._targets
+        with torch.inference_mode():
+            losses = torch.nn.functional.ctc_loss(
+                log_probs.unsqueeze(1).expand(frames, count, -1), targets,
+                torch.full((count,), frames, dtype=torch.long), lengths, blank=0, reduction='none')
+        likelihoods = -losses.numpy()
+        if not np.isfinite(likelihoods).any():
+            return self._result(None, None, 0.0)  # too short for any phrase
+
+        best = int(np.argmax(likelihoods))
+        posteriors = np.exp(likelihoods - likelihoods.max())
+        posteriors /= posteriors.sum()
+        phrase, intent = self.phrases[best]
+        posterior = sum(p for p, (_, other) in zip(posteriors, self.phrases) if other == intent)
+
+        free = float(log_probs.max(dim=-1).values.sum())
+        fit = float(np.exp(min(0.0, (likelihoods[best] - free) / max(1, int(lengths[best])))))
+        return self._result(intent, phrase, float(posterior) * fit)
+
+
+def align_scores(templates, features):
+    """
+    Per-frame cosine distance of the best whole-phrase alignment of ``features`` with each template
+
+    Both ends are anchored, so "next" does not match inside "next track".
+    Steps as in the wake word spotter's DTW: stay on a template frame,
+    advance one or skip one (paid twice). All templates run at once.
+    """
+    lengths = np.array([len(template) for template in templates])
+    stacked = np.zeros((len(templates), lengths.max(), features.shape[1]), dtype=np.float32)
+    for row, template in zip(stacked, templates):
+        row[:len(template)] = template
+    distances = 1.0 - np.einsum('kld,fd->fkl', stacked, features)
+
+    cost = np.full(stacked.shape[:2], np.inf, dtype=np.float32)
+    terms = np.zeros(stacked.shape[:2], dtype=np.float32)
+    edge = np.full((len(templates), 2), np.inf, dtype=np.float32)
+    edge[:, 1] = 0.0  # free start before template frame 0
+    for distance in distances:
+        padded = np.concatenate((edge, cost), axis=1)
+        padded_terms = np.concatenate((np.zeros_like(edge), terms), axis=1)
+        stay, advance, skip = padded[:, 2:], padded[:, 1:-1], padded[:, :-2] + distance
+
+        best = np.minimum(np.minimum(stay, advance), skip)
+        from_skip = (skip <= stay) & (skip <= advance)
+        from_advance = ~from_skip & (advance <= stay)
+        prior_terms = np.where(from_skip, padded_terms[:, :-2] + 1,
+                               np.where(from_advance, padded_terms[:, 1:-1], padded_terms[:, 2:]))
+        cost = best + distance
+        terms = prior_terms + 1
+        edge[:, 1] = np.inf  # only the first frame may start the alignment
+    ends = np.arange(len(templates)), lengths - 1
+    return cost[ends] / terms[ends]
+
+
+class TemplateGrammarBackend(GrammarBackend):
+    """
+    Whole-phrase DTW against recorded commands, with no acoustic model
+
+    Enroll one or more recordings of each command phrase, for example the
+    replay fixtures. A phrase is rejected when no recording aligns within
+    the threshold, derived like the wake word spotter's from how well
+    recordings of the same phrase match each other. The score is how much
+    closer the best intent is than the nearest other one.
+    """
+
+    name = "grammar-templates"
+
+    def __init__(self, sample_rate=DEFAULT_SAMPLE_RATE, threshold=None, engine=None):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.engine = engine if engine is not None else IntentEngine()
+        self.templates = []  # (phrase, intent, unit-length MFCC frames)
+        self._fixed_threshold = threshold is not None
+
+    def features(self, audio):
+        """Trimmed, unit-length MFCC frames of a phrase, as the wake word spotter uses"""
+        phrase = phrase_features(audio, self.sample_rate)
+        features = phrase.mfcc(frames=phrase.trimmed(TRIM_RATIO))
+        return (features / np.maximum(np.linalg.norm(features, axis=1, keepdims=True), 1e-9)).astype(np.float32)
+
+    def enroll(self, samples, phrase):
+        """Add a recording (int16 samples or sr.AudioData) of a command phrase"""
+        match = self.engine.match(phrase)
+        if match is None:
+            raise ValueError(f"Not a command: {phrase}")
+        features = self.features(samples)
+        if len(features) < 2:
+            raise ValueError(f"Recording of '{phrase}' holds no speech")
+        self.templates.append((" ".join(tokenize(phrase, SYNONYMS)), match.intent, features))
+        self._calibrate()
+
+    def _calibrate(self):
+        """Threshold from recordings of one phrase matched against each other"""
+        if self._fixed_threshold:
+            return
+        by_phrase = collections.defaultdict(list)
+        for phrase, _, features in self.templates:
+            by_phrase[phrase].append(features)
+        scores = [float(align_scores([a], b)[0]) for group in by_phrase.values()
+                  for i, a in enumerate(group) for j, b in enumerate(group) if i != j]
+        if not scores:
+            self.threshold = DEFAULT_THRESHOLD
+            return
+        self.threshold = float(np.clip(np.max(scores) * THRESHOLD_MARGIN, MIN_THRESHOLD, MAX_THRESHOLD))
+
+    @classmethod
+    def from_fixtures(cls, directory, sample_rate=DEFAULT_SAMPLE_RATE, engine=None):
+        """Enroll every ``<name>.wav`` in ``directory`` whose ``<name>.txt`` is a command"""
+        decoder = cls(sample_rate, engine=engine)
+        for filename in sorted(os.listdir(directory)):
+            name, extension = os.path.splitext(filename)
+            transcript_path = os.path.join(directory, name + ".txt")
+            if extension.lower() != ".wav" or not os.path.exists(transcript_path):
+                continue
+            with open(transcript_path, 'r') as f:
+                transcript = f.read().strip()
+            if decoder.engine.match(transcript) is None:
+                continue
+            with sr.AudioFile(os.path.join(directory, filename)) as source:
+                audio = sr.Recognizer().record(source)
+            decoder.enroll(audio, transcript)
+        return decoder
+
+    def decode(self, audio):
+        """Intent of the closest recorded command, or UnknownValueError beyond the threshold"""
+        if not self.templates:
+            raise sr.RequestError("no command recordings enrolled for the grammar decoder")
+        features = self.features(audio)
+        if len(features) < 2:
+            return self._result(None, None, 0.0)
+
+        scores = align_scores([template for _, _, template in self.templates], features)
+        best = int(np.argmin(scores))
+        phrase, intent, _ = self.templates[best]
+        if scores[best] > self.threshold:
+            return self._result(None, None, 0.0)
+
+        others = [score for score, (_, other, _) in zip(scores, self.templates) if other != intent]
+        runner_up = max(min(others, default=2 * self.threshold), self.threshold)
+        return self._result(intent, phrase, float(np.clip(1.0 - scores[best] / runner_up, 0.0, 1.0)))
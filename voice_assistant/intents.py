@@ -0,0 +1,220 @@
+"""
+Command Intent Matching
+One declarative command table, compiled into a token trie and matched
+on whole words in a single pass over the utterance
+"playback" no longer triggers "play", and "unmute" is its own phrase
+"""
+
+import collections
+import re
+
+Command = collections.namedtuple('Command', ['intent', 'label', 'key', 'priority', 'phrases'])
+IntentMatch = collections.namedtuple('IntentMatch', ['intent', 'label', 'key', 'priority', 'count', 'span'])
+
+NUMBER_SLOT = "{number}"
+
+# key is a pynput Key attribute name; None means the caller handles the intent itself
+COMMANDS = [
+    Command('lock', "lock program", None, 100, [
+        "lock program", "lock system", "lock the program", "lock the system",
+    ]),
+    Command('volume_up', "volume up", 'media_volume_up', 50, [
+        "volume up", "volume up {number}", "volume up by {number}",
+        "increase volume", "increase volume by {number}", "increase the volume", "increase the volume by {number}",
+        "louder", "louder by {number}", "turn up", "turn up by {number}", "turn it up", "turn it up by {number}",
+        "turn the volume up", "turn the volume up by {number}", "turn up the volume", "turn up the volume by {number}",
+    ]),
+    Command('volume_down', "volume down", 'media_volume_down', 50, [
+        "volume down", "volume down {number}", "volume down by {number}",
+        "decrease volume", "decrease volume by {number}", "decrease the volume", "decrease the volume by {number}",
+        "quieter", "quieter by {number}", "turn down", "turn down by {number}", "turn it down",
+        "turn it down by {number}", "turn the volume down", "turn the volume down by {number}", "turn down the volume",
+        "turn down the volume by {number}", "lower volume", "lower volume by {number}", "lower the volume",
+        "lower the volume by {number}",
+    ]),
+    Command('mute', "mute/unmute", 'media_volume_mute', 40, [
+        "mute", "unmute", "silence",
+    ]),
+    Command('play_pause', "play/pause", 'media_play_pause', 30, [
+        "play", "pause", "stop", "resume", "play music", "pause music",
+    ]),
+    Command('next', "next", 'media_next', 30, [
+        "next", "skip", "next track", "skip track",
+    ]),
+    Command('previous', "previous", 'media_previous', 30, [
+        "previous", "back", "go back", "previous track", "last track",
+    ]),
+]
+
+# Spoken variants normalized before matching, on both the table and the utterance
+SYNONYMS = {
+    'song': 'track',
+    'sound': 'volume',
+    'audio': 'volume',
+    'un-mute': 'unmute',
+}
+
+UNITS = {
+    'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7,
+    'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12, 'thirteen': 13,
+    'fourteen': 14, 'fifteen': 15, 'sixteen': 16, 'seventeen': 17, 'eighteen': 18, 'nineteen': 19,
+}
+TENS = {
+    'twenty': 20, 'thirty': 30, 'forty': 40, 'fifty': 50,
+    'sixty': 60, 'seventy': 70, 'eighty': 80, 'ninety': 90,
+}
+
+_TOKEN = re.compile(r"[a-z0-9'-]+")
+
+
+def tokenize(text, synonyms=SYNONYMS):
+    """Lower-case words with synonyms applied"""
+    return [synonyms.get(token, token) for token in _TOKEN.findall(text.lower())]
+
+
+def parse_number(token):
+    """Value of a single number word or digit string, or None"""
+    if token.isdigit():
+        return int(token)
+    if token in UNITS:
+        return UNITS[token]
+    return TENS.get(token)
+
+
+class _Node:
+    __slots__ = ('children', 'slot', 'commands', 'below')
+
+    def __init__(self):
+        self.children = {}
+        self.slot = None  # child reached by consuming a number
+        self.commands = []  # commands whose phrase ends here
+        self.below = None  # (intents, has_slot, top priority) of strictly longer phrases
+
+
+class IntentEngine:
+    """
+    Compiled matcher for a command table
+
+    Every phrase is inserted into a trie keyed by word. Matching walks the
+    utterance once, advancing every partial match by one word and starting
+    a new one at each word, so the cost depends on the utterance length and
+    the trie depth, not on how many commands there are. The best match is
+    the highest priority, then the longest, then the earliest.
+    """
+
+    def __init__(self, commands=COMMANDS, synonyms=SYNONYMS):
+        self.synonyms = synonyms
+        self.commands = list(commands)
+        self._root = _Node()
+        for command in self.commands:
+            for phrase in command.phrases:
+                self._insert(phrase, command)
+        self._summarize(self._root)
+
+    def _summarize(self, node):
+        """Record what longer phrases can still be reached from each node"""
+        intents, has_slot, priority = set(), node.slot is not None, 0
+        children = list(node.children.values()) + ([node.slot] if node.slot is not None else [])
+        for child in children:
+            child_intents, child_slot, child_priority = self._summarize(child)
+            intents |= child_intents | {command.intent for command in child.commands}
+            has_slot = has_slot or child_slot
+            priority = max([priority, child_priority] + [command.priority for command in child.commands])
+        node.below = (intents, has_slot, priority)
+        return node.below
+
+    def _insert(self, phrase, command):
+        node = self._root
+        for token in self._phrase_tokens(phrase):
+            if token == NUMBER_SLOT:
+                if node.slot is None:
+                    node.slot = _Node()
+                node = node.slot
+            else:
+                node = node.children.setdefault(token, _Node())
+        if command not in node.commands:
+            node.commands.append(command)
+
+    def _phrase_tokens(self, phrase):
+        tokens = []
+        for part in phrase.lower().split():
+            tokens.extend([NUMBER_SLOT] if part == NUMBER_SLOT else tokenize(part, self.synonyms))
+        return tokens
+
+    def match_all(self, text):
+        """Every command phrase found in ``text``, as IntentMatch tuples"""
+        return [match for match, _ in self._scan(tokenize(text, self.synonyms))[0]]
+
+    def _scan(self, tokens):
+        """(match, trie node) pairs for every phrase found, and the partial matches left open"""
+        matches = []
+        # Partial matches: (node, start index, number so far, number can take a units word)
+        active = []
+
+        for index, token in enumerate(tokens):
+            active.append((self._root, index, None, False))
+            advanced = []
+            number = parse_number(token)
+
+            for node, start, value, extendable in active:
+                # "twenty" + "five" stays on the slot node as 25
+                if extendable and number is not None and number < 10:
+                    advanced.append((node, start, value + number, False))
+
+                child = node.children.get(token)
+                if child is not None:
+                    advanced.append((child, start, value, False))
+                if node.slot is not None and number is not None:
+                    advanced.append((node.slot, start, number, token in TENS))
+
+            for node, start, value, _ in advanced:
+                for command in node.commands:
+                    matches.append((IntentMatch(command.intent, command.label, command.key,
+                                                command.priority, value, (start, index + 1)), node))
+            active = advanced
+
+        return matches, active
+
+    def match(self, text):
+        """Best IntentMatch in ``text``, or None"""
+        best = None
+        for match in self.match_all(text):
+            if best is None or self._rank(match) > self._rank(best):
+                best = match
+        return best
+
+    def decide(self, text, final=False):
+        """
+        Best match in a partial transcript, once more words cannot change it
+
+        A match is settled when words have already followed it, or when no
+        longer phrase starting the same way leads to another intent or a
+        number, and no phrase still in progress could take a number or
+        outrank it. With
+        ``final`` the transcript is complete and the best match is returned.
+        Returns None while undecided.
+        """
+        tokens = tokenize(text, self.synonyms)
+        matches, active = self._scan(tokens)
+        if not matches:
+            return None
+
+        best, node = max(matches, key=lambda pair: self._rank(pair[0]))
+        if final:
+            return best
+
+        if best.span[1] == len(tokens):
+            intents, has_slot, _ = node.below
+            if has_slot or intents - {best.intent}:
+                return None
+
+        for partial, _, _, extendable in active:
+            intents, has_slot, priority = partial.below
+            if extendable or has_slot or (intents - {best.intent} and priority >= best.priority):
+                return None
+        return best
+
+    @staticmethod
+    def _rank(match):
+        start, end = match.span
+        return match.priority, end - start, -start
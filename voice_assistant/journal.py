@@ -0,0 +1,381 @@
+"""
+Session Journal
+Append-only binary record of what a session did: unlock, wake, command,
+expiry and lock, and with the audio flag the PCM of every phrase heard
+Records have a fixed-size header and go into rotating segment files,
+written by a background thread so the listening thread only queues them
+Segments are read back through mmap, and a journal with audio can be
+replayed as an input source to reproduce what happened in the field
+"""
+
+import collections
+import glob
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+from .session import ACTIVE, IDLE, LOCKED
+
+MAGIC = b"VAJ1"
+VERSION = 1
+# Segment header: magic, version, record header size, sample rate
+SEGMENT_HEADER = struct.Struct('<4sHHI')
+# Record header: type, flags, detail bytes, audio bytes, stream sample position, wall time
+RECORD_HEADER = struct.Struct('<BBHIqd')
+# start: a run of the program began; its stream positions count from 0 again
+RECORD_TYPES = {'unlock': 1, 'wake': 2, 'command': 3, 'expiry': 4, 'lock': 5, 'phrase': 6, 'start': 7}
+EVENT_NAMES = {code: event for event, code in RECORD_TYPES.items()}
+SEGMENT_PATTERN = "journal-{:06d}.vaj"
+
+DEFAULT_SEGMENT_BYTES = 8 * 1024 * 1024
+DEFAULT_MAX_SEGMENTS = 8  # oldest segments are deleted beyond this
+MAX_PENDING = 1024  # records queued for the writer before new ones are dropped
+
+JournalRecord = collections.namedtuple('JournalRecord', ['event', 'time', 'position', 'detail', 'audio'])
+
+
+class Journal:
+    """
+    Journal writer; with ``enabled`` false every call returns at once
+
+    ``record`` and ``record_phrase`` only stamp the record and queue it;
+    the writer thread packs it, appends it to the current segment, starts
+    a new segment past ``segment_bytes`` and flushes whenever the queue
+    runs dry. A phrase's audio is copied out of the capture ring when it
+    is queued, as the ring may wrap over it before the writer gets there.
+    Records beyond MAX_PENDING unwritten ones are dropped and counted.
+    ``position`` returns the current stream sample, stored with each event.
+    Each Journal opened on a directory first records a ``start``, as the
+    stream positions of a new run begin at 0 again.
+    """
+
+    def __init__(self, directory=None, sample_rate=16000, audio=False, enabled=True, position=None,
+                 segment_bytes=DEFAULT_SEGMENT_BYTES, max_segments=DEFAULT_MAX_SEGMENTS):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.audio = audio
+        self.enabled = enabled and directory is not None
+        self.position = position
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+
+        self._pending = collections.deque()
+        self._lock = threading.Lock()  # the queue bound and the counters, for every thread that records
+        self._wake = threading.Event()
+        self._closed = False
+        self._file = None
+        self._segment = 0
+        self._segment_size = 0
+        self._thread = None
+
+        self.records = 0  # records written
+        self.phrases = 0  # of them with audio
+        self.bytes = 0
+        self.segments = 0  # segment files started
+        self.dropped = 0
+        self.errors = 0
+
+        if self.enabled:
+            os.makedirs(directory, exist_ok=True)
+            existing = segment_paths(directory)
+            if existing:
+                self._segment = int(os.path.basename(existing[-1])[8:14])
+            self._thread = threading.Thread(target=self._write_loop, name="journal-writer", daemon=True)
+            self._thread.start()
+            self._queue((RECORD_TYPES['start'], time.time(), 0, "", None))
+
+    @classmethod
+    def from_options(cls, options, sample_rate, position=None):
+        """Enabled when the command line names a journal directory"""
+        directory = getattr(options, 'journal', None)
+        return cls(directory, sample_rate, audio=getattr(options, 'journal_audio', False),
+                   enabled=bool(directory), position=position)
+
+    def record(self, event, detail=""):
+        """Queue a state transition or command; ``event`` is a key of RECORD_TYPES"""
+        if not self.enabled:
+            return
+        position = self.position() if self.position is not None else -1
+        self._queue((RECORD_TYPES[event], time.time(), position, detail, None))
+
+    def record_phrase(self, phrase):
+        """Queue a phrase handed over by the capture stream; only with ``audio``"""
+        if not self.enabled or not self.audio or phrase.end <= phrase.start:
+            return
+        self._queue((RECORD_TYPES['phrase'], time.time(), phrase.start, "", bytes(phrase.frame_data)))
+
+    def on_session_change(self, old, new):
+        """Session listener: journal each transition as the event that caused it"""
+        if new == LOCKED:
+            self.record('lock')
+        elif old == LOCKED:
+            self.record('unlock')
+        elif new == ACTIVE:
+            self.record('wake')
+        elif old == ACTIVE and new == IDLE:
+            self.record('expiry')
+
+    def _queue(self, item):
+        with self._lock:
+            if len(self._pending) >= MAX_PENDING:
+                self.dropped += 1
+                return
+            self._pending.append(item)
+        self._wake.set()
+
+    def close(self):
+        """Write what is queued, close the segment and stop the writer"""
+        if not self.enabled or self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5.0)
+
+    def stats(self):
+        """Records and bytes written, segments started and records dropped"""
+        with self._lock:
+            return {'records': self.records, 'phrases': self.phrases, 'bytes': self.bytes,
+                    'segments': self.segments, 'dropped': self.dropped, 'errors': self.errors}
+
+    def _write_loop(self):
+        try:
+            while True:
+                self._wake.wait()
+                self._wake.clear()
+                while self._pending:
+                    try:
+                        self._write(*self._pending.popleft())
+                    except OSError as e:
+                        with self._lock:
+                            self.errors += 1
+                        print(f"Journal write error: {e}")
+                if self._file is not None:
+                    self._file.flush()
+                if self._closed and not self._pending:
+                    break
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _write(self, code, wall_time, position, detail, audio):
+        detail = detail.encode('utf-8')[:0xFFFF]
+        audio = audio if audio is not None else b""
+        size = RECORD_HEADER.size + len(detail) + len(audio)
+        if self._file is None or self._segment_size + size > self.segment_bytes:
+            self._rotate()
+        self._file.write(RECORD_HEADER.pack(code, 0, len(detail), len(audio), position, wall_time))
+        self._file.write(detail)
+        self._file.write(audio)
+        self._segment_size += size
+        with self._lock:
+            self.records += 1
+            self.phrases += code == RECORD_TYPES['phrase']
+            self.bytes += size
+
+    def _rotate(self):
+        """Close the current segment, start the next and delete the oldest beyond max_segments"""
+        if self._file is not None:
+            self._file.close()
+        self._segment += 1
+        path = os.path.join(self.directory, SEGMENT_PATTERN.format(self._segment))
+        self._file = open(path, 'wb')
+        self._file.write(SEGMENT_HEADER.pack(MAGIC, VERSION, RECORD_HEADER.size, self.sample_rate))
+        self._segment_size = SEGMENT_HEADER.size
+        with self._lock:
+            self.segments += 1
+            self.bytes += SEGMENT_HEADER.size
+        for old in segment_paths(self.directory)[:-self.max_segments]:
+            os.remove(old)
+
+
+def segment_paths(directory):
+    """Segment files of a journal, oldest first"""
+    return sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN.replace("{:06d}", "[0-9]" * 6))))
+
+
+class JournalReader:
+    """
+    Reads a journal directory through mmap, one segment at a time
+
+    Iterating gives JournalRecords in the order written; ``audio`` is a
+    memoryview into the mapped segment, valid until ``close``, and None on
+    events. A record cut short (the writer was killed mid-record) ends its
+    segment. Nothing is read into memory beyond the headers touched.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.paths = segment_paths(directory)
+        if not self.paths:
+            raise FileNotFoundError(f"No journal segments in {directory}")
+        self.sample_rate = None
+        self._maps = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        for path in self.paths:
+            yield from self._segment(path)
+
+    def events(self):
+        """Records without audio"""
+        return (record for record in self if record.audio is None)
+
+    def phrases(self):
+        """Records with phrase audio"""
+        return (record for record in self if record.audio is not None)
+
+    def _segment(self, path):
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < SEGMENT_HEADER.size:
+                return
+            view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(view)
+
+        magic, version, header_size, sample_rate = SEGMENT_HEADER.unpack_from(view, 0)
+        if magic != MAGIC or version != VERSION or header_size != RECORD_HEADER.size:
+            raise ValueError(f"{path} is not a version {VERSION} journal segment")
+        self.sample_rate = sample_rate
+
+        data = memoryview(view)
+        offset = SEGMENT_HEADER.size
+        while offset + RECORD_HEADER.size <= len(view):
+            code, _, detail_size, audio_size, position, wall_time = RECORD_HEADER.unpack_from(view, offset)
+            offset += RECORD_HEADER.size
+            if offset + detail_size + audio_size > len(view):
+                break
+            detail = bytes(data[offset:offset + detail_size]).decode('utf-8', 'replace')
+            offset += detail_size
+            audio = data[offset:offset + audio_size] if audio_size else None
+            offset += audio_size
+            yield JournalRecord(EVENT_NAMES.get(code, f"type {code}"), wall_time, position, detail, audio)
+
+    def close(self):
+        """Unmap the segments; views still held elsewhere keep theirs mapped"""
+        for view in self._maps:
+            try:
+                view.close()
+            except BufferError:
+                pass
+        self._maps = []
+
+
+class JournalSource:
+    """
+    Replays the phrases of a journal as if they came from the microphone
+
+    Each phrase is played at its original stream position, so session
+    timers and wake word seeks line up as they did. The gaps between
+    phrases were not journaled; they are filled with room tone, the
+    quietest chunk of the phrase that follows repeated, so the noise floor
+    stays where it was. ``max_gap`` caps a gap in seconds. The journal
+    must have been written with audio; pacing works like WavFileSource's.
+    Runs journaled into the same directory play one after another: the
+    positions after a ``start`` record follow on from where the audio of
+    the run before ended.
+    """
+
+    sample_width = 2
+    channels = 1
+
+    def __init__(self, directory, chunk_size=1024, realtime=False, speed=1.0, max_gap=None):
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.realtime = realtime
+        self.speed = speed
+        self.live = realtime
+        self.max_gap = max_gap
+
+        self._reader = JournalReader(directory)
+        self._phrases = self._runs_in_sequence()
+        if not self._phrases:
+            raise ValueError(f"The journal in {directory} holds no audio; record it with --journal-audio")
+        self.sample_rate = self._reader.sample_rate
+        self._chunks = None
+
+    def _runs_in_sequence(self):
+        """(stream position, audio) of every phrase, each run's positions moved past the run before"""
+        phrases = []
+        base = reached = 0
+        for record in self._reader:
+            if record.event == 'start':
+                base = reached
+            elif record.audio is not None:
+                phrases.append((base + record.position, record.audio))
+                reached = max(reached, base + record.position + len(record.audio) // self.sample_width)
+        return phrases
+
+    def open(self):
+        """Start from the beginning of the journal"""
+        self._chunks = self._generate()
+
+    def read(self):
+        """One chunk of PCM, or b'' after the last phrase"""
+        data = next(self._chunks, b"")
+        if self.realtime and data:
+            time.sleep(len(data) / (self.sample_width * self.sample_rate * self.speed))
+        return data
+
+    def close(self):
+        """Stop the replay and unmap the journal"""
+        self._chunks = None
+        self._phrases = []
+        self._reader.close()
+
+    def _generate(self):
+        chunk_bytes = self.chunk_size * self.sample_width
+        pending = bytearray()
+        position = 0  # stream sample reached
+        for start, audio in self._phrases:
+            gap = start - position
+            if gap < 0:
+                audio = audio[-gap * self.sample_width:]  # overlaps the phrase before
+                start = position
+                gap = 0
+            if self.max_gap is not None:
+                gap = min(gap, int(self.max_gap * self.sample_rate))
+            pending += room_tone(audio, gap, self.chunk_size)
+            pending += audio
+            position = start + len(audio) // self.sample_width
+            while len(pending) >= chunk_bytes:
+                yield bytes(pending[:chunk_bytes])
+                del pending[:chunk_bytes]
+        if pending:
+            yield bytes(pending) + bytes(chunk_bytes - len(pending))
+
+
+def room_tone(audio, samples, chunk_size):
+    """``samples`` of the quietest ``chunk_size`` samples of 16-bit ``audio``, repeated"""
+    pcm = np.frombuffer(audio, dtype=np.int16)
+    chunks = pcm[:len(pcm) // chunk_size * chunk_size].reshape(-1, chunk_size).astype(np.float32)
+    if not samples or not len(chunks):
+        return bytes(samples * 2)
+    quietest = chunks[np.argmin(np.mean(chunks ** 2, axis=1))].astype(np.int16)
+    return np.resize(quietest, samples).tobytes()
+
+
+def print_journal(directory, audio=False):
+    """List a journal's records; phrases only with ``audio``"""
+    with JournalReader(directory) as reader:
+        count = 0
+        for record in reader:
+            if record.audio is not None and not audio:
+                continue
+            count += 1
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.time))
+            at = f"{record.position / reader.sample_rate:9.2f}s" if record.position >= 0 else f"{'-':>10}"
+            if record.audio is not None:
+                detail = f"{len(record.audio) / 2 / reader.sample_rate:.2f} s of audio"
+            else:
+                detail = record.detail
+            print(f"{stamp}.{int(record.time * 1000) % 1000:03d} {at} {record.event:<8} {detail}")
+        print(f"{count} records in {len(reader.paths)} segments")
@@ -0,0 +1,166 @@
+"""
+Media Key Dispatch
+Key presses run on their own thread from a queue of actions, so a
+volume burst never holds up listening
+Adjacent actions on the same key merge into one burst, opposite volume
+steps cancel out, and presses are spaced so the OS does not drop them
+"""
+
+import collections
+import threading
+import time
+
+# Pending steps on one of these keys cancel steps on the other
+OPPOSITES = {
+    'media_volume_up': 'media_volume_down',
+    'media_volume_down': 'media_volume_up',
+}
+
+DispatchStats = collections.namedtuple('DispatchStats', ['submitted', 'coalesced', 'cancelled', 'emitted', 'failed'])
+
+
+class KeyDispatcher:
+    """
+    Queue of (key, count) actions played back by one background thread
+
+    ``submit`` only appends to the queue and returns. If the newest queued
+    action is on the same key its count grows instead ("volume up" three
+    times queues one burst of three), and if it is on the opposite volume
+    key the two are netted. Each burst is capped at ``max_steps``.
+    Consecutive presses are at least ``min_interval`` seconds apart.
+
+    ``controller`` is anything with ``press(key)`` and ``release(key)``;
+    by default a pynput Controller is created on the dispatch thread on
+    first use. With an injected controller and no ``keys`` the key names
+    themselves are passed to it, so no display or pynput is needed.
+
+    ``on_dispatch(key_name, count, seconds)``, if set, is called on the
+    dispatch thread after each burst with the time since it was queued.
+    """
+
+    def __init__(self, controller=None, keys=None, min_interval=0.02, max_steps=25):
+        self.min_interval = min_interval
+        self.max_steps = max_steps
+        self._controller = controller
+        self._keys = keys
+
+        self._pending = collections.deque()  # [key name, count, queued at]
+        self._condition = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._next_press = 0.0
+        self._thread = None
+
+        self.submitted = 0
+        self.coalesced = 0  # actions merged into an already queued burst
+        self.cancelled = 0  # steps removed by an opposite action
+        self.emitted = 0  # press/release pairs sent
+        self.failed = 0
+        self.on_dispatch = None
+
+    @property
+    def stats(self):
+        with self._condition:
+            return DispatchStats(self.submitted, self.coalesced, self.cancelled, self.emitted, self.failed)
+
+    def submit(self, key_name, count=1):
+        """
+        Queue ``count`` presses of a pynput Key name; never blocks on the presses
+
+        Returns how many of them were queued, fewer than ``count`` when the
+        burst they join reaches ``max_steps``.
+        """
+        if count <= 0:
+            return 0
+
+        with self._condition:
+            if self._closed:
+                return 0
+            self.submitted += 1
+            last = self._pending[-1] if self._pending else None
+
+            if last is not None and last[0] == key_name:
+                self.coalesced += 1
+                queued = min(last[1] + count, self.max_steps) - last[1]
+                last[1] += queued
+            elif last is not None and OPPOSITES.get(last[0]) == key_name:
+                self.coalesced += 1
+                cancelled = min(last[1], count)
+                self.cancelled += 2 * cancelled
+                last[1] -= cancelled
+                if last[1] == 0:
+                    self._pending.pop()
+                queued = cancelled + min(count - cancelled, self.max_steps)
+                if count > cancelled:
+                    self._pending.append([key_name, queued - cancelled, time.monotonic()])
+            else:
+                queued = min(count, self.max_steps)
+                self._pending.append([key_name, queued, time.monotonic()])
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="key-dispatcher", daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+            return queued
+
+    def flush(self, timeout=None):
+        """Block until every queued press has been sent; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._pending or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self, flush=True):
+        """Stop the dispatch thread, by default after sending what is queued"""
+        if flush:
+            self.flush(timeout=self.min_interval * self.max_steps + 1.0)
+        with self._condition:
+            self._closed = True
+            self._pending.clear()
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                key_name, count, queued_at = self._pending.popleft()
+                self._busy = True
+
+            try:
+                self._send(key_name, count)
+                if self.on_dispatch is not None:
+                    self.on_dispatch(key_name, count, time.monotonic() - queued_at)
+            except Exception as e:
+                with self._condition:
+                    self.failed += 1
+                print(f"Key dispatch error: {e}")
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _send(self, key_name, count):
+        if self._controller is None:
+            from pynput.keyboard import Controller, Key
+            self._controller = Controller()
+            self._keys = Key
+        key = getattr(self._keys, key_name) if self._keys is not None else key_name
+
+        for _ in range(count):
+            delay = self._next_press - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._controller.press(key)
+            self._controller.release(key)
+            self._next_press = time.monotonic() + self.min_interval
+            with self._condition:
+                self.emitted += 1
@@ -0,0 +1,234 @@
+"""
+Stage Latency Metrics
+Monotonic timings around each stage of the voice loop: device open,
+conditioning, calibration, capture/endpointing, recognition, intent match and key
+dispatch, plus the mode methods that string them together
+Timings go into fixed-bucket histograms (p50/p95/p99), a JSON-lines file
+written periodically and a Prometheus text endpoint on localhost
+Nothing is wrapped unless metrics are enabled, so the off state costs nothing
+"""
+
+import bisect
+import functools
+import json
+import threading
+import time
+
+# Histogram upper bounds in seconds: 1 ms to about 57 s, each 1.5x the last
+BUCKETS = tuple(round(0.001 * 1.5 ** i, 6) for i in range(28))
+QUANTILES = (0.5, 0.95, 0.99)
+
+# (attribute path on the mode, method) -> stage
+COMPONENT_STAGES = {
+    ('microphone.source', 'open'): 'device_open',
+    ('frontend', 'process'): 'conditioning',
+    ('noise_tracker', 'wait_ready'): 'calibration',
+    ('microphone', 'listen'): 'capture',
+    ('backend', 'transcribe'): 'recognition',
+    ('intent_engine', 'match'): 'intent_match',
+}
+
+
+class LatencyHistogram:
+    """Cumulative-style latency histogram with quantiles interpolated inside buckets"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.errors = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Estimated q-quantile in seconds; None before the first observation"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def summary(self):
+        """Counts and quantiles in milliseconds, as written to the JSON-lines file"""
+        result = {'count': self.count, 'errors': self.errors, 'sum_ms': round(1000 * self.sum, 3),
+                  'max_ms': round(1000 * self.max, 3)}
+        for q in QUANTILES:
+            value = self.quantile(q)
+            result[f"p{int(q * 100)}_ms"] = None if value is None else round(1000 * value, 3)
+        return result
+
+
+class Metrics:
+    """
+    Stage histograms with optional JSON-lines and Prometheus exports
+
+    ``instrument`` replaces methods on a mode and its components with
+    timed wrappers; calls that raise are counted as errors rather than
+    timed, so listen timeouts do not pass for capture latency. With
+    ``enabled`` false nothing is replaced and ``observe`` returns at once.
+    """
+
+    def __init__(self, enabled=True, path=None, port=None, interval=10.0):
+        self.enabled = enabled
+        self.path = path
+        self.interval = interval
+        self.started = time.monotonic()
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._writer = None
+        self._server = None
+
+        if enabled and path:
+            self._writer = threading.Thread(target=self._write_loop, name="metrics-writer", daemon=True)
+            self._writer.start()
+        if enabled and port is not None:
+            from http.server import ThreadingHTTPServer
+            self._server = ThreadingHTTPServer(("127.0.0.1", port), _handler(self))
+            threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+            print(f"Metrics at http://127.0.0.1:{self.port}/metrics")
+
+    @classmethod
+    def from_options(cls, options):
+        """Enabled when the command line asks for a metrics file or port"""
+        path = getattr(options, 'metrics_file', None)
+        port = getattr(options, 'metrics_port', None)
+        return cls(enabled=bool(path) or port is not None, path=path, port=port,
+                   interval=getattr(options, 'metrics_interval', 10.0))
+
+    @property
+    def port(self):
+        return self._server.server_address[1] if self._server else None
+
+    def observe(self, stage, seconds, error=False):
+        """Record one timing for a stage"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = LatencyHistogram()
+            if error:
+                histogram.errors += 1
+            else:
+                histogram.observe(seconds)
+
+    def timed(self, stage, function):
+        """Wrap a callable so each call is timed under ``stage``"""
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.monotonic()
+            try:
+                result = function(*args, **kwargs)
+            except BaseException:
+                self.observe(stage, time.monotonic() - started, error=True)
+                raise
+            self.observe(stage, time.monotonic() - started)
+            return result
+        return wrapper
+
+    def instrument(self, mode, methods=()):
+        """Time the mode's ``methods`` and its shared components in place"""
+        if not self.enabled:
+            return
+        for name in methods:
+            if hasattr(mode, name):
+                setattr(mode, name, self.timed(name, getattr(mode, name)))
+        for (component, name), stage in COMPONENT_STAGES.items():
+            target = mode
+            for attribute in component.split('.'):
+                target = getattr(target, attribute, None)
+            if target is not None:
+                setattr(target, name, self.timed(stage, getattr(target, name)))
+
+        # Presses run on the dispatcher thread; it reports submit-to-last-press time
+        keys = getattr(mode, 'keys', None)
+        if keys is not None:
+            keys.on_dispatch = lambda key_name, count, seconds: self.observe('key_dispatch', seconds)
+
+    def snapshot(self):
+        """Per-stage summaries, keyed by stage name"""
+        with self._lock:
+            return {stage: histogram.summary() for stage, histogram in sorted(self.histograms.items())}
+
+    def write(self):
+        """Append one snapshot line to the JSON-lines file"""
+        if not self.path:
+            return
+        line = {'time': time.time(), 'uptime_s': round(time.monotonic() - self.started, 3),
+                'stages': self.snapshot()}
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(line) + "\n")
+
+    def prometheus_text(self):
+        """Histograms in the Prometheus text exposition format"""
+        name = "voice_assistant_stage_seconds"
+        lines = [f"# HELP {name} Latency of each voice loop stage",
+                 f"# TYPE {name} histogram"]
+        errors = []
+        with self._lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, n in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+                errors.append(f'voice_assistant_stage_errors_total{{stage="{stage}"}} {histogram.errors}')
+        if errors:
+            lines += ["# HELP voice_assistant_stage_errors_total Stage calls that raised",
+                      "# TYPE voice_assistant_stage_errors_total counter"] + errors
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        """Write a final snapshot and stop the writer and endpoint"""
+        if not self.enabled:
+            return
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join(timeout=1.0)
+            self.write()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                print(f"Metrics write error: {e}")
+
+
+def _handler(metrics):
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # keep request logs out of the console UI
+
+    return MetricsHandler
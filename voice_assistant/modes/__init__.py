@@ -0,0 +1,6 @@
+"""
+CLI Modes
+basic: every phrase is a command
+wake: a wake word opens a one-minute command session
+secure: voice password and voiceprint unlock, then wake word sessions
+"""
@@ -0,0 +1,70 @@
+"""
+Voice-Controlled Media Player - Phase 1 Enhanced
+Optimized for built-in microphones (no headset required)
+Includes: play, pause, next, previous, volume control, and mute
+"""
+
+import speech_recognition as sr
+
+from ..common import VoiceMode, display_commands
+
+
+class BasicMode(VoiceMode):
+    """Every phrase heard is treated as a command"""
+
+    energy_threshold = 300  # Lower threshold for quieter mics
+    pause_threshold = 1.0  # Slightly longer pause detection
+    warmup_seconds = 1.0
+
+    def listen(self):
+        """Listen and convert speech to text"""
+        with self.microphone as source:
+            print("\nListening...")
+
+            try:
+                # Longer timeout; the endpointer decides when the command has ended
+                audio = source.listen(self.recognizer, timeout=10, context='command')
+                if not self.vad.accept(audio):
+                    print("Not speech - ignored")
+                    return None
+
+                print("Processing...")
+                text = self.backend.transcribe(audio).text
+                print(f"You said: {text}")
+                return text
+
+            except sr.WaitTimeoutError:
+                print("Timeout - no speech detected")
+            except sr.UnknownValueError:
+                print("Could not understand")
+            except sr.RequestError:
+                print("Network error - check internet connection")
+
+            return None
+
+    def run(self):
+        """Main program"""
+        print("=" * 60)
+        print("Voice Media Control - Enhanced Version")
+        print("=" * 60)
+
+        self.calibrate()
+
+        print("\n" + "=" * 60)
+        print()
+        display_commands()
+
+        print("\nPress Ctrl+C to exit")
+        print("\nTIP: Speak clearly and wait for 'Listening...' prompt")
+        print("=" * 60)
+
+        try:
+            while not self.microphone.finished:
+                text = self.listen()
+                if text:
+                    self.control_media(text)
+
+        except KeyboardInterrupt:
+            print("\n\nExiting program. Goodbye!")
+        finally:
+            self.close()
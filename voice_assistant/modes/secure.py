@@ -0,0 +1,508 @@
+"""
+Secure Voice Media Controller - IMPROVED VERSION
+Enhanced microphone sensitivity for better distance detection
+Two-layer security: Startup password + Wake word
+"""
+
+import speech_recognition as sr
+
+from ..common import VoiceMode
+from ..credentials import CredentialError, CredentialStore
+from ..frontend import phrase_features
+from ..pipeline import RecognitionPipeline
+from ..profiles import ProfileStore, allowed
+from ..session import ACTIVE, IDLE, LOCKED, SessionStateMachine
+from ..speaker import Voiceprint, create_encoder
+from ..streaming import StreamingCommandListener
+from ..wake_word import WakeWordSpotter, record_enrollment, strip_wake_word
+
+WAKE_WORD = "computer"
+ACTIVE_SESSION_DURATION = 60
+PASSWORD_FILE = "voice_password.json"
+VOICEPRINT_FILE = "voice_password_voiceprint.npz"
+WAKE_WORD_FILE = "wake_word_templates.npz"
+MAX_PASSWORD_ATTEMPTS = 3
+WAKE_CHECK_SECONDS = 1.5  # audio up to a detection compared with the wake word owner's voiceprint
+
+
+class SecureMode(VoiceMode):
+    """Password and voiceprint unlock, then wake word sessions of pipelined commands"""
+
+    # IMPROVED MICROPHONE SETTINGS FOR DISTANCE
+    energy_threshold = 200  # Lower = more sensitive (was 400)
+    pause_threshold = 0.8  # How long to wait for speech
+    warmup_seconds = 1.5
+    chunk_size = 2048  # larger chunks for better capture at distance
+    volume_steps = 2
+    key_interval = 0.05
+
+    def __init__(self, options):
+        super().__init__(options)
+        # pipeline: recognize whole phrases in the background; streaming: act on partial results
+        self.command_mode = options.command_mode
+
+        # Locked until the password, then wake word sessions that expire on their own timer
+        self.session = SessionStateMachine(ACTIVE_SESSION_DURATION, locked=True, clock=self.clock)
+        self.session.add_listener(self.on_session_change)
+        self.session.add_listener(self.journal.on_session_change)
+        self.microphone.add_finish_listener(self.session.close)
+
+        # With --profiles, each enrolled user has their own password, voiceprint, wake word and commands
+        self.profiles = ProfileStore(options.profiles) if options.profiles else None
+        self.profile_index = None  # every profile's voiceprint, matched in one pass (see load_password)
+        self.profile = None  # whose commands the session runs: who unlocked, or whose voice a wake word matched
+        self.unlocked_by = None  # profile whose password unlocked the program
+
+        # Offline wake word spotting on the capture thread - no cloud round trip per phrase
+        # Once enrolled it opens sessions directly (see run); with profiles it holds all of theirs
+        self.wake_spotter = WakeWordSpotter() if self.profiles else WakeWordSpotter.load(WAKE_WORD_FILE)
+        self.wake_spotter.attach(self.frontend)
+
+        # Password record, cached in memory and re-read only when the file changes
+        self.credentials = CredentialStore(PASSWORD_FILE)
+
+        # Who said the password: embeddings enrolled once, compared locally on unlock
+        self.voiceprint = Voiceprint.load(VOICEPRINT_FILE, create_encoder(options.speaker_encoder))
+
+        # Session commands are listened for, recognized and dispatched on their own threads
+        self.command_pipeline = RecognitionPipeline(self.microphone, self.recognizer, self.backend,
+                                                    self.handle_command, workers=2, queue_size=4, vad=self.vad)
+        self.streaming_listener = StreamingCommandListener(self.microphone, self.recognizer, self.backend,
+                                                           self.intent_engine, self.handle_streamed_command,
+                                                           vad=self.vad)
+
+    def calibrate(self):
+        """
+        Enhanced microphone adjustment for better distance detection
+        Only blocks once; afterwards the noise tracker runs in the background
+        """
+        if self.noise_tracker.ready:
+            return
+
+        print("Calibrating microphone for room acoustics...")
+        self.microphone.start()
+        self.noise_tracker.wait_ready(timeout=self.warmup_seconds + 1)
+
+    @property
+    def wake_word(self):
+        """The wake word of the current profile, or the shared one"""
+        if self.profile is None:
+            return WAKE_WORD
+        return self.profiles.profile(self.profile).wake_word
+
+    def setup_password(self, name=None):
+        """Set up the startup voice password, or with profiles the password, voiceprint and wake word of ``name``"""
+        recognizer, vad, backend = self.recognizer, self.vad, self.password_backend
+
+        print("=" * 60)
+        print("STARTUP PASSWORD SETUP" if name is None else f"VOICE PROFILE SETUP: {name}")
+        print("=" * 60)
+        print("Choose a secret password phrase.")
+        print("Example: 'open sesame', 'alpha gamma', 'my secret code'")
+        print("Use 2-3 words that are easy to remember.")
+        print("=" * 60)
+
+        while not self.microphone.finished:
+            with self.microphone as source:
+                print("\nSay your new password...")
+
+                try:
+                    # Longer timeout for distance speaking
+                    audio = source.listen(recognizer, timeout=10, context='password')
+                    if not vad.accept(audio):
+                        print("That was not speech. Try again.")
+                        continue
+                    password_text = backend.transcribe(audio).text.lower()
+
+                    print(f"You said: '{password_text}'")
+                    print("\nSay it again to confirm...")
+
+                    confirm_audio = source.listen(recognizer, timeout=10, context='password')
+                    confirm_text = backend.transcribe(confirm_audio).text.lower()
+
+                    if password_text == confirm_text:
+                        print("\nOnce more, to record your voiceprint...")
+                        voice_audio = source.listen(recognizer, timeout=10, context='password')
+                        recordings = [phrase_features(recording) for recording in (audio, confirm_audio, voice_audio)]
+                        if name is None:
+                            self.voiceprint.enroll(recordings)
+                            self.voiceprint.save(VOICEPRINT_FILE)
+                            self.credentials.set_password(password_text)
+                        elif not self.enroll_profile(name, password_text, recordings, source):
+                            return None
+
+                        print("\n" + "=" * 60)
+                        print("PASSWORD SET SUCCESSFULLY")
+                        print("=" * 60)
+                        print(f"Hint: {password_text[:3]}...")
+                        print(f"Voiceprint enrolled ({self.voiceprint.encoder.name}).")
+                        if name is not None:
+                            print(f"Wake word: '{self.options.wake_word}'")
+                        print("Remember this password.")
+                        print("=" * 60)
+
+                        return password_text
+                    else:
+                        print("Passwords do not match. Try again.")
+                        print(f"First: '{password_text}'")
+                        print(f"Second: '{confirm_text}'")
+
+                except sr.WaitTimeoutError:
+                    print("Timeout - no speech detected. Speak louder or move closer.")
+                except sr.UnknownValueError:
+                    print("Could not understand. Speak more clearly.")
+                except sr.RequestError:
+                    print("Network error. Check internet connection.")
+                except ValueError as e:
+                    if name is not None:
+                        raise  # the profile cannot be saved; asking again would not help
+                    print(f"Error: {e}")
+                except Exception as e:
+                    print(f"Error: {e}")
+        return None
+
+    def enroll_profile(self, name, password_text, recordings, source):
+        """Record the wake word of a new profile and save it with its password and voiceprint; False if input ends"""
+        voiceprint = Voiceprint(self.voiceprint.encoder)
+        voiceprint.enroll(recordings)
+        spotter = WakeWordSpotter()
+        if not record_enrollment(spotter, self.recognizer, source, self.options.wake_word):
+            return False
+        commands = self.options.commands.split(",") if self.options.commands else None
+        self.profiles.add(name, password_text, voiceprint, spotter, wake_word=self.options.wake_word,
+                          commands=commands)
+        return True
+
+    def load_profiles(self):
+        """Load every voice profile into one index and the wake word spotter, enrolling one if asked or if none exist"""
+        try:
+            names = self.profiles.names
+        except CredentialError as e:
+            print(f"Error loading voice profiles ({e}).")
+            return False
+
+        if self.options.enroll or not names:
+            name = self.options.enroll or "owner"
+            print(f"Enrolling voice profile '{name}'.")
+            try:
+                if self.setup_password(name) is None:
+                    return False
+            except ValueError as e:
+                print(f"Cannot enroll voice profile: {e}")
+                return False
+            names = self.profiles.names
+
+        self.profile_index = self.profiles.index(self.voiceprint.encoder)
+        self.profile_index.attach_wake_words(self.wake_spotter)
+        print(f"{len(names)} voice profile(s); {len(self.profile_index.unverified)} without a voiceprint")
+        self.profile_index.encoder.load()  # model load is slow; do it before the first unlock
+        return True
+
+    def load_password(self):
+        """Load the saved password configuration, or the voice profiles"""
+        if self.profiles is not None:
+            return self.load_profiles()
+
+        try:
+            if not self.credentials.exists:
+                print("No password found. First-time setup.")
+                return self.setup_password() is not None
+        except CredentialError as e:
+            print(f"Error loading password file ({e}). Recreating...")
+            return self.setup_password() is not None
+
+        print(f"Password hint: {self.credentials.hint}")
+
+        if self.voiceprint.enrolled:
+            self.voiceprint.encoder.load()  # model load is slow; do it before the first unlock
+        else:
+            print(f"No voiceprint enrolled - delete {PASSWORD_FILE} to set one up.")
+        return True
+
+    def load_wake_word(self):
+        """Load the enrolled wake word, enrolling it on first run; profiles bring their own. False if input ends"""
+        if self.wake_spotter.enrolled or self.profiles is not None:
+            return True
+
+        print("No wake word samples found. First-time enrollment.")
+        with self.microphone as source:
+            if not record_enrollment(self.wake_spotter, self.recognizer, source, WAKE_WORD):
+                return False
+        self.wake_spotter.save(WAKE_WORD_FILE)
+        return True
+
+    def verify_password(self, spoken_text, candidates=None):
+        """
+        Verify the spoken password against stored hash
+        With profiles, against each candidate profile's (all by default); returns the matching profile name
+        """
+        try:
+            if self.profiles is None:
+                return self.credentials.verify(spoken_text)
+            for name in candidates if candidates is not None else self.profiles.names:
+                if self.profiles.verify(name, spoken_text):
+                    return name
+            return None
+        except CredentialError as e:
+            print(f"Password file unreadable: {e}")
+            return False
+
+    def unlock_program(self):
+        """Unlock the program with voice password"""
+        if self.session.unlocked:
+            return True
+
+        print("\n" + "=" * 60)
+        print("PROGRAM LOCKED")
+        print("=" * 60)
+        print("Say the startup password to unlock.")
+
+        attempts = MAX_PASSWORD_ATTEMPTS
+
+        while attempts > 0 and not self.microphone.finished:
+            with self.microphone as source:
+                print(f"\nAttempts remaining: {attempts}")
+                print("Say password...")
+
+                try:
+                    # Longer listening time for distance
+                    audio = source.listen(self.recognizer, timeout=10, context='password')
+                    if not self.vad.accept(audio):
+                        # Background noise does not cost an attempt
+                        print("That was not speech. Try again.")
+                        continue
+
+                    # Checked locally first, so another voice never costs a transcription
+                    candidates = None
+                    if self.profile_index is not None:
+                        # Every profile's voiceprint in one pass; only the ones it accepts are tried
+                        candidates = self.profile_index.identify(phrase_features(audio))
+                        if not candidates:
+                            attempts -= 1
+                            print("Voice not recognized.")
+                            continue
+                    elif self.voiceprint.enrolled:
+                        accepted, distance = self.voiceprint.verify(phrase_features(audio))
+                        if not accepted:
+                            attempts -= 1
+                            print(f"Voice not recognized (distance {distance:.3f}).")
+                            continue
+
+                    spoken_text = self.password_backend.transcribe(audio).text
+
+                    print(f"You said: '{spoken_text}'")
+
+                    unlocked = self.verify_password(spoken_text, candidates)
+                    if unlocked:
+                        self.profile = self.unlocked_by = unlocked if self.profiles is not None else None
+                        self.session.unlock()
+                        print("\n" + "=" * 60)
+                        print("ACCESS GRANTED")
+                        print("=" * 60)
+                        print("Program unlocked." if self.profile is None else f"Program unlocked by {self.profile}.")
+                        print(f"Wake word: '{self.wake_word}'")
+                        print("=" * 60)
+                        return True
+                    else:
+                        attempts -= 1
+                        if attempts > 0:
+                            print("Incorrect password. Try again.")
+                        else:
+                            print("Too many failed attempts.")
+                            return False
+
+                except sr.WaitTimeoutError:
+                    attempts -= 1
+                    print("Timeout. Speak louder or move closer.")
+                except sr.UnknownValueError:
+                    attempts -= 1
+                    print("Could not understand. Speak more clearly.")
+                except sr.RequestError:
+                    print("Network error.")
+                except Exception as e:
+                    attempts -= 1
+                    print(f"Error: {e}")
+
+        return False
+
+    def lock_program(self):
+        """Lock the program"""
+        self.session.lock()
+        print("\n" + "=" * 60)
+        print("PROGRAM LOCKED")
+        print("=" * 60)
+
+    def control_media(self, command, match=None):
+        """Execute media control commands, including locking"""
+        if match is None:
+            match = self.intent_engine.match(command)
+
+        if match is not None and self.profile is not None and not allowed(self.profiles.profile(self.profile),
+                                                                          match.intent):
+            print(f"Not allowed for {self.profile}: {match.label}")
+            return False
+
+        if match is not None and match.intent == 'lock':
+            self.lock_program()
+            print("Command: Lock program")
+            return True
+        return super().control_media(command, match)
+
+    def handle_command(self, command, transcription=None, phrase=None):
+        """Pipeline dispatcher: run one recognized command, in spoken order"""
+        # Heard before a lock or session expiry took effect
+        if not self.session.active:
+            return
+
+        # Said in one breath with the wake word: the rest of the phrase is the command
+        command = strip_wake_word(command, self.wake_word)
+        if not command:
+            return
+
+        print(f"Command: {command}")
+        if self.control_media(command):
+            self.session.touch()
+
+    def handle_streamed_command(self, match, command, partial):
+        """Streaming listener: run a command as soon as a partial transcript settles on it"""
+        if not self.session.active:
+            return False
+
+        print(f"Command: {strip_wake_word(command, self.wake_word)}{' (partial)' if partial else ''}")
+        if self.control_media(command, match):
+            self.session.touch()
+            return True
+        return False
+
+    def on_wake(self, score):
+        """
+        Wake spotter callback, on the capture thread: open a session
+
+        Anyone may say the wake word of whoever unlocked. Another profile's
+        wake word only opens the session as them, with their commands, if
+        the audio before the detection matches their voiceprint; otherwise
+        it is ignored.
+        """
+        if self.session.state != IDLE:
+            return
+        owner = self.wake_spotter.detection_owner
+        if self.profiles is not None and owner != self.unlocked_by:
+            end = self.wake_spotter.detection_sample
+            audio = self.microphone.phrase(end - int(WAKE_CHECK_SECONDS * self.microphone.SAMPLE_RATE), end)
+            heard = self.profile_index.identify(phrase_features(audio))
+            if owner in self.profile_index.unverified or owner not in heard:
+                print(f"\nWake word of {owner} ignored: their voice was not recognized "
+                      f"(unlocked by {self.unlocked_by})")
+                return
+        self.profile = owner if self.profiles is not None else None
+        self.session.wake()
+
+    def on_session_change(self, old, new):
+        """Session events, on the thread that caused them: capture, dispatcher or timer"""
+        if new == ACTIVE:
+            print(f"\nWake word detected (score {self.wake_spotter.detection_score:.2f})")
+            self.microphone.seek(self.wake_spotter.detection_sample)  # commands start after the wake word
+            if self.profiles is not None:
+                print(f"Session activated for {self.profile}, {ACTIVE_SESSION_DURATION} seconds")
+            else:
+                print(f"Session activated for {ACTIVE_SESSION_DURATION} seconds")
+        elif old == ACTIVE and new == IDLE:
+            print("\nSession expired")
+
+    def display_status(self):
+        """Display current program status"""
+        print("\n" + "=" * 60)
+        print("VOICE MEDIA CONTROLLER - IMPROVED")
+        print("=" * 60)
+
+        if self.session.unlocked:
+            print("Status: UNLOCKED")
+            if self.session.active:
+                print(f"Session: ACTIVE ({int(self.session.remaining())} seconds remaining)")
+            else:
+                print(f"Session: INACTIVE (say '{self.wake_word}' to activate)")
+        else:
+            print("Status: LOCKED")
+            print("Say startup password to unlock")
+
+        print("\nAvailable Commands:")
+        print("-" * 60)
+        print("Media: play, pause, next, previous, volume up/down, mute")
+        print("System: lock program")
+        print("-" * 60)
+        print("\nMicrophone Settings:")
+        print(f"  Sensitivity: HIGH (optimized for distance)")
+        print(f"  Energy Threshold: {self.recognizer.energy_threshold}")
+        print(f"  Dynamic Adjustment: Enabled")
+        print("-" * 60)
+        print("Press Ctrl+C to exit")
+        print("=" * 60)
+
+    def run(self):
+        """Main program loop"""
+        print("=" * 60)
+        print("SECURE VOICE MEDIA CONTROLLER - IMPROVED")
+        print("=" * 60)
+        print("Enhanced for better distance detection")
+        print("\nSecurity layers:")
+        print("1. Startup password (phrase + voiceprint)")
+        print(f"2. Wake word: '{WAKE_WORD}'" if self.profiles is None else "2. The wake word of whoever unlocked")
+        print("=" * 60)
+
+        self.calibrate()
+
+        if not self.load_password():
+            print("Failed to setup password system.")
+            self.close()
+            return
+
+        if not self.load_wake_word():
+            print("Wake word enrollment did not finish.")
+            self.close()
+            return
+        self.wake_spotter.on_detect = self.on_wake  # not during enrollment
+        if self.command_mode != "streaming":
+            self.command_pipeline.start(paused=True)
+
+        try:
+            while not self.session.closed:
+                state = self.session.state
+
+                if state == LOCKED:
+                    # Unlocking reads the microphone itself
+                    self.command_pipeline.pause()
+                    if not self.unlock_program():
+                        print("Failed to unlock. Exiting.")
+                        break
+                    self.display_status()
+
+                elif state == ACTIVE and self.command_mode == "streaming":
+                    remaining = self.session.remaining()
+                    print(f"\nListening for command... ({int(remaining)} seconds)")
+                    try:
+                        with self.microphone:
+                            self.streaming_listener.listen(timeout=min(remaining, 5))
+                    except sr.WaitTimeoutError:
+                        pass  # Timeout is normal, just continue
+
+                elif state == ACTIVE:
+                    print(f"\nListening for commands... ({int(self.session.remaining())} seconds)")
+                    self.command_pipeline.resume()
+
+                    # Listening and recognition run on the pipeline threads until expiry or a lock
+                    if self.session.wait_change(ACTIVE) == IDLE:
+                        self.command_pipeline.pause()
+                        self.display_status()
+
+                else:
+                    # Waiting for wake word - the spotter listens on the capture thread
+                    self.session.wait_change(IDLE)
+
+        except KeyboardInterrupt:
+            print("\nProgram terminated.")
+            self.lock_program()
+        finally:
+            self.command_pipeline.stop(drain=False)
+            self.streaming_listener.close()
+            self.session.close()
+            self.close()
@@ -0,0 +1,165 @@
+"""
+Voice-Controlled Media Player - Phase 2
+Wake Word Detection: "Computer"
+Multi-Command Mode: Stays active for 1 minute
+"""
+
+import speech_recognition as sr
+
+from ..common import VoiceMode, display_commands
+from ..session import ACTIVE, IDLE, SessionStateMachine
+from ..streaming import StreamingCommandListener
+from ..wake_word import WakeWordSpotter, record_enrollment, strip_wake_word
+
+WAKE_WORD = "computer"
+WAKE_WORD_FILE = "wake_word_templates.npz"
+ACTIVE_SESSION_DURATION = 60  # seconds (1 minute)
+
+
+class WakeWordMode(VoiceMode):
+    """Commands are accepted for a minute after the wake word"""
+
+    energy_threshold = 300
+    pause_threshold = 1.0
+    warmup_seconds = 0.5
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.streaming_commands = options.command_mode == "streaming"  # act on partial results
+
+        # Idle until the wake word, active until a minute passes without a command
+        self.session = SessionStateMachine(ACTIVE_SESSION_DURATION, locked=False, clock=self.clock)
+        self.session.add_listener(self.on_session_change)
+        self.session.add_listener(self.journal.on_session_change)
+        self.microphone.add_finish_listener(self.session.close)
+
+        # Offline wake word spotting on the capture thread; opens the session once enrolled (see run)
+        self.wake_spotter = WakeWordSpotter.load(WAKE_WORD_FILE)
+        self.wake_spotter.attach(self.frontend)
+
+        # Acts on partial transcripts; only used in streaming command mode
+        self.streaming_listener = StreamingCommandListener(self.microphone, self.recognizer, self.backend,
+                                                           self.intent_engine, self.run_streamed_command,
+                                                           vad=self.vad)
+
+    def on_session_change(self, old, new):
+        """Session events, on the thread that caused them: the capture thread or the timer"""
+        if new == ACTIVE:
+            print(f"Wake word detected (score {self.wake_spotter.detection_score:.2f})")
+            self.microphone.seek(self.wake_spotter.detection_sample)  # commands start after the wake word
+            print("\nSession activated! You have 1 minute to give commands.")
+        elif old == ACTIVE:
+            print("\nSession expired. Waiting for wake word...")
+
+    def listen_for_wake_word(self):
+        """Wait for the wake word 'Computer'; False if the input ended first"""
+        print("\nWaiting for wake word...")
+        self.session.wait_change(IDLE)
+        return self.session.active
+
+    def enroll_wake_word(self):
+        """Load the enrolled wake word, enrolling it on first run; False if the input ended first"""
+        if self.wake_spotter.enrolled:
+            return True
+
+        print("\nNo wake word samples found. First-time enrollment.")
+        with self.microphone as source:
+            if not record_enrollment(self.wake_spotter, self.recognizer, source, WAKE_WORD):
+                return False
+        self.wake_spotter.save(WAKE_WORD_FILE)
+        return True
+
+    def run_streamed_command(self, match, text, partial):
+        """Streaming mode: execute a command as soon as a partial transcript settles on it"""
+        print(f"Command: {strip_wake_word(text, WAKE_WORD)}{' (partial)' if partial else ''}")
+        if self.session.active and self.control_media(text, match):
+            self.session.touch()
+            return True
+        return False
+
+    def listen_for_command(self):
+        """Listen for voice command during active session"""
+        with self.microphone as source:
+            remaining = self.session.remaining()
+            print(f"\nListening for command... ({int(remaining)}s remaining)")
+
+            try:
+                # Use remaining time as timeout
+                timeout = min(remaining + 1, 6)
+
+                if self.streaming_commands:
+                    # The command runs inside the listener, before the phrase has ended
+                    self.streaming_listener.listen(timeout=timeout)
+                    return None
+
+                audio = source.listen(self.recognizer, timeout=timeout, context='command')
+                if not self.vad.accept(audio):
+                    return None
+
+                print("Processing...")
+                # Said in one breath with the wake word: the rest of the phrase is the command
+                text = strip_wake_word(self.backend.transcribe(audio).text, WAKE_WORD)
+                if text:
+                    print(f"Command: {text}")
+                return text
+
+            except sr.WaitTimeoutError:
+                return None
+            except sr.UnknownValueError:
+                print("Could not understand")
+                return None
+            except sr.RequestError:
+                print("Network error")
+                return None
+            except Exception:
+                return None
+
+    def display_info(self):
+        """Display program information and commands"""
+        print("\n" + "=" * 60)
+        print("WAKE WORD: 'Computer'")
+        print("MODE: Multi-Command (1 minute active window)")
+        print("=" * 60)
+        print("\nHow to use:")
+        print("  1. Say 'Computer'")
+        print("  2. System stays active for 1 minute")
+        print("  3. Give multiple commands within that time")
+        print("  4. Each command resets the 1 minute timer")
+        print("  5. After 1 minute of no commands, returns to wake word")
+        print("\n" + "=" * 60)
+        display_commands()
+
+    def run(self):
+        """Main program"""
+        print("=" * 60)
+        print("Voice Media Control - Phase 2: Multi-Command Mode")
+        print("=" * 60)
+
+        self.calibrate()
+        if not self.enroll_wake_word():
+            self.close()
+            return
+        self.wake_spotter.on_detect = lambda score: self.session.wake()  # not during enrollment
+        self.display_info()
+
+        print("\nPress Ctrl+C to exit")
+        print("=" * 60)
+
+        try:
+            while not self.session.closed:
+                if self.session.active:
+                    command = self.listen_for_command()
+
+                    # The session may have expired while the command was being captured
+                    if command and self.session.active:
+                        self.control_media(command)
+                        self.session.touch()
+                else:
+                    self.listen_for_wake_word()
+
+        except KeyboardInterrupt:
+            print("\n\nExiting program. Goodbye!")
+        finally:
+            self.streaming_listener.close()
+            self.session.close()
+            self.close()
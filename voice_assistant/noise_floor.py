@@ -0,0 +1,92 @@
+"""
+Background Noise-Floor Tracking
+Continuously estimates room noise from the capture stream and keeps
+recognizer.energy_threshold up to date, so no listen has to calibrate first
+"""
+
+import audioop
+import math
+import threading
+
+
+class NoiseFloorTracker:
+    """
+    Exponential moving RMS over non-speech chunks
+
+    Chunks louder than the current threshold are treated as speech and do
+    not move the floor, unless they go on for longer than
+    ``max_speech_seconds`` - then the room itself has got louder (a fan
+    switched on, music started) and the floor follows it.
+    """
+
+    def __init__(self, recognizer, time_constant=2.0, warmup_seconds=0.5,
+                 min_threshold=50, max_speech_seconds=5.0):
+        self.recognizer = recognizer
+        self.time_constant = time_constant  # seconds for the floor to settle
+        self.warmup_seconds = warmup_seconds
+        self.min_threshold = min_threshold
+        self.max_speech_seconds = max_speech_seconds
+
+        self.noise_floor = None
+        self.speech_chunks = 0
+        self.noise_chunks = 0
+
+        self._sample_width = 2
+        self._sample_rate = 16000
+        self._warmup_elapsed = 0.0
+        self._speech_run = 0.0
+        self._ready = threading.Event()
+
+    @property
+    def ready(self):
+        """True once the warm-up period has been observed"""
+        return self._ready.is_set()
+
+    def attach(self, capture):
+        """Track every chunk captured by ``capture``"""
+        self._sample_width = capture.SAMPLE_WIDTH
+        self._sample_rate = capture.SAMPLE_RATE
+        # The recognizer's own adjustment only runs while listening; ours replaces it
+        self.recognizer.dynamic_energy_threshold = False
+        capture.add_listener(self.update)
+
+    def wait_ready(self, timeout=None):
+        """Block until the warm-up period has been observed"""
+        return self._ready.wait(timeout)
+
+    def update(self, chunk):
+        """Feed one chunk of raw PCM and update the energy threshold"""
+        seconds = len(chunk) / (self._sample_width * self._sample_rate)
+        energy = audioop.rms(chunk, self._sample_width)
+
+        if self.noise_floor is None:
+            self.noise_floor = float(energy)
+
+        if not self._ready.is_set():
+            # Warm-up behaves like adjust_for_ambient_noise: take everything, settle fast
+            alpha = 1 - math.exp(-seconds / max(self.warmup_seconds / 4, seconds))
+            self.noise_floor += alpha * (energy - self.noise_floor)
+            self._warmup_elapsed += seconds
+            if self._warmup_elapsed >= self.warmup_seconds:
+                self._ready.set()
+        elif energy > self.threshold():
+            self.speech_chunks += 1
+            self._speech_run += seconds
+            if self._speech_run > self.max_speech_seconds:
+                self._adapt(energy, seconds)
+        else:
+            self.noise_chunks += 1
+            self._speech_run = 0.0
+            self._adapt(energy, seconds)
+
+        self.recognizer.energy_threshold = self.threshold()
+
+    def threshold(self):
+        """Energy above which a chunk counts as speech"""
+        if self.noise_floor is None:
+            return self.recognizer.energy_threshold
+        return max(self.min_threshold, self.noise_floor * self.recognizer.dynamic_energy_ratio)
+
+    def _adapt(self, energy, seconds):
+        alpha = 1 - math.exp(-seconds / self.time_constant)
+        self.noise_floor += alpha * (energy - self.noise_floor)
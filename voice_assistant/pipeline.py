@@ -0,0 +1,233 @@
+"""
+Asynchronous Recognition Pipeline
+capture thread -> endpointer -> bounded recognition queue -> worker pool -> dispatcher
+Capture never stalls while a phrase is being recognized
+
+Back-pressure: at most ``queue_size`` phrases are queued or being
+recognized at once. When the queue is full the endpointer either blocks (the capture ring buffer
+keeps recording meanwhile) or, with ``drop_when_full``, drops the new
+phrase and counts it.
+Ordering: phrases are dispatched strictly in the order they were spoken,
+even when a later phrase finishes recognizing first.
+Gating: with a ``vad``, phrases that are not speech never take a slot.
+"""
+
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+import speech_recognition as sr
+
+Phrase = collections.namedtuple('Phrase', ['sequence', 'audio', 'captured_at'])
+
+
+class PipelineStats:
+    """Counters for each stage; read them from any thread"""
+
+    def __init__(self):
+        self.endpointed = 0
+        self.dropped = 0
+        self.recognized = 0
+        self.failed = 0
+        self.dispatched = 0
+        self.queue_high_water = 0
+
+
+class RecognitionPipeline:
+    """
+    Staged, multi-threaded listen/recognize/dispatch loop
+
+    ``dispatch(text, transcription, phrase)`` runs on a single dispatcher
+    thread, one phrase at a time, in spoken order. Phrases that could not
+    be recognized are skipped without holding up later ones.
+    """
+
+    def __init__(self, source, recognizer, backend, dispatch, workers=2, queue_size=4,
+                 drop_when_full=False, listen_timeout=1.0, phrase_time_limit=None, vad=None,
+                 context='command'):
+        self.source = source
+        self.recognizer = recognizer
+        self.backend = backend
+        self.dispatch = dispatch
+        self.workers = workers
+        self.drop_when_full = drop_when_full
+        self.listen_timeout = listen_timeout
+        self.phrase_time_limit = phrase_time_limit  # None leaves it to the source's endpointer
+        self.context = context
+        self.vad = vad
+        self.stats = PipelineStats()
+
+        # Slots bound the phrases in flight (queued or recognizing): the back-pressure point
+        self._slots = threading.Semaphore(queue_size)
+        self._in_flight = 0
+        self._pending = queue.Queue()  # futures in spoken order
+        self._executor = None
+        self._threads = []
+        self._sequence = 0
+
+        self._condition = threading.Condition()
+        self._running = False
+        self._paused = True
+        self._listening = False  # endpointer is reading from the source
+        self._discard = False  # stopped without draining: queued phrases are dropped, not dispatched
+
+    @property
+    def paused(self):
+        return self._paused
+
+    def start(self, paused=False):
+        """Start the endpointer, workers and dispatcher threads"""
+        if self._running:
+            return
+
+        self.source.start()
+        self._running = True
+        self._paused = paused
+        self._discard = False
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="recognizer")
+        self._threads = [
+            threading.Thread(target=self._endpoint_loop, name="endpointer", daemon=True),
+            threading.Thread(target=self._dispatch_loop, name="dispatcher", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, drain=True):
+        """
+        Stop listening; with ``drain`` finish dispatching what was already heard
+
+        Without it, phrases still queued are dropped: nothing is dispatched
+        once ``stop`` returns, and recognitions still running are not waited for.
+        """
+        if not self._threads:
+            return
+
+        with self._condition:
+            self._running = False
+            self._discard = not drain
+            self._condition.notify_all()
+
+        endpointer, dispatcher = self._threads
+        self._threads = []
+        endpointer.join()
+        if not drain:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._pending.put(None)  # tells the dispatcher nothing more is coming
+        dispatcher.join()
+        if drain:
+            self._executor.shutdown(wait=True)
+
+    def pause(self):
+        """Stop reading the source; returns once the endpointer has let go of it"""
+        with self._condition:
+            self._paused = True
+            while self._listening:
+                self._condition.wait()
+
+    def resume(self):
+        """Start reading the source again"""
+        with self._condition:
+            self._paused = False
+            self._condition.notify_all()
+
+    def _endpoint_loop(self):
+        """Cut the captured audio into phrases and queue them for recognition"""
+        while True:
+            with self._condition:
+                while self._running and self._paused:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                self._listening = True
+
+            try:
+                audio = self.source.listen(self.recognizer, timeout=self.listen_timeout,
+                                           phrase_time_limit=self.phrase_time_limit, context=self.context)
+            except sr.WaitTimeoutError:
+                continue
+            finally:
+                with self._condition:
+                    self._listening = False
+                    self._condition.notify_all()
+
+            if not audio.frame_data:
+                if getattr(self.source, 'finished', False):
+                    with self._condition:
+                        self._running = False
+                    return
+                continue
+
+            if self.vad is not None and not self.vad.accept(audio):
+                continue
+            self._submit(audio)
+
+    def _submit(self, audio):
+        phrase = Phrase(self._sequence, audio, time.monotonic())
+        self._sequence += 1
+        self.stats.endpointed += 1
+
+        # Blocks while the queue is full, unless dropping was asked for
+        if not self._slots.acquire(blocking=not self.drop_when_full):
+            self.stats.dropped += 1
+            return
+
+        with self._condition:
+            self._in_flight += 1
+            self.stats.queue_high_water = max(self.stats.queue_high_water, self._in_flight)
+
+        future = self._executor.submit(self.backend.transcribe, audio)
+        self._pending.put((phrase, future))
+
+    def _dispatch_loop(self):
+        """Hand recognized phrases to ``dispatch`` in spoken order"""
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+
+            phrase, future = item
+            try:
+                if self._discard:
+                    future.cancel()
+                    self.stats.dropped += 1
+                    continue
+                self._handle(phrase, future)
+            finally:
+                with self._condition:
+                    self._in_flight -= 1
+                self._slots.release()
+
+    def _handle(self, phrase, future):
+        try:
+            transcription = future.result()
+        except CancelledError:
+            self.stats.dropped += 1
+            return
+        except (sr.UnknownValueError, sr.RequestError):
+            self.stats.failed += 1
+            return
+        except Exception as e:
+            self.stats.failed += 1
+            print(f"Recognition error: {e}")
+            return
+
+        self.stats.recognized += 1
+        if self._discard:  # finished recognizing after a stop without draining
+            self.stats.dropped += 1
+            return
+        try:
+            self.dispatch(transcription.text, transcription, phrase)
+        except Exception as e:
+            print(f"Dispatch error: {e}")
+        self.stats.dispatched += 1
+
+    def wait_finished(self, timeout=None):
+        """Block until the source is exhausted, then drain; False on timeout"""
+        if self._threads:
+            self._threads[0].join(timeout)
+            if self._threads[0].is_alive():
+                return False
+        self.stop(drain=True)
+        return True
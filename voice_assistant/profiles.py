@@ -0,0 +1,189 @@
+"""
+Voice Profiles
+Several enrolled users sharing one controller, each with their own
+password, voiceprint, wake word and allowed commands
+An unlock attempt's voice is matched against every profile with one
+matrix product, and one wake word spotter holds every profile's
+templates, so neither takes a pass per user
+"""
+
+import collections
+import os
+import re
+
+import numpy as np
+
+from .credentials import (SCRYPT_N, SCRYPT_P, SCRYPT_R, CredentialError, RecordFile, check_password,
+                          hash_password, needs_rehash)
+from .speaker import Voiceprint
+from .wake_word import WakeWordSpotter
+
+PROFILES_FILE = "profiles.json"
+DEFAULT_WAKE_WORD = "computer"
+ALWAYS_ALLOWED = {'lock'}  # anyone in the room may lock the controller
+_NAME = re.compile(r"[a-z0-9_-]{1,32}")
+
+# commands: frozenset of intents the profile may run, or None for all of them
+Profile = collections.namedtuple('Profile', ['name', 'wake_word', 'commands', 'hint'])
+
+
+class ProfileStore(RecordFile):
+    """
+    Profiles kept in one directory
+
+    profiles.json holds each profile's password hash and hint, wake word
+    and allowed commands, cached like the single password file;
+    <name>.voice.npz and <name>.wake.npz hold its voiceprint and wake word
+    templates. ``index`` loads those once into a ProfileIndex and builds
+    it again only after profiles.json changes.
+    """
+
+    def __init__(self, directory, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+        super().__init__(os.path.join(directory, PROFILES_FILE))
+        self.directory = directory
+        self.cost = {'n': n, 'r': r, 'p': p}
+        self._index = None  # (record it was built from, ProfileIndex)
+
+    def validate(self, record):
+        if not isinstance(record.get('profiles'), dict):
+            raise CredentialError(f"{self.path} has no profiles")
+
+    @property
+    def names(self):
+        record = self.record
+        return sorted(record['profiles']) if record else []
+
+    def profile(self, name):
+        """The Profile called ``name``; KeyError if there is none"""
+        entry = self.record['profiles'][name]
+        commands = entry.get('commands')
+        return Profile(name, entry['wake_word'], frozenset(commands) if commands is not None else None,
+                       entry.get('password_hint', 'No hint'))
+
+    def add(self, name, password, voiceprint=None, wake_spotter=None, wake_word=DEFAULT_WAKE_WORD,
+            commands=None, hint=None):
+        """Save a new profile, or replace the one called ``name``"""
+        if not valid_name(name):
+            raise ValueError(f"Profile names are 1-32 of a-z, 0-9, _ and -: {name!r}")
+        os.makedirs(self.directory, exist_ok=True)
+        if voiceprint is not None and voiceprint.enrolled:
+            voiceprint.save(self._file(name, 'voice'))
+        if wake_spotter is not None and wake_spotter.enrolled:
+            wake_spotter.save(self._file(name, 'wake'))
+
+        entry = hash_password(password, **self.cost)
+        entry['password_hint'] = hint if hint is not None else password[:3] + "..."
+        entry['wake_word'] = wake_word.lower()
+        entry['commands'] = sorted(commands) if commands is not None else None
+        self._update(name, entry)
+
+    def remove(self, name):
+        """Delete a profile and its voiceprint and wake word files"""
+        self._update(name, None)
+        for kind in ('voice', 'wake'):
+            if os.path.exists(self._file(name, kind)):
+                os.remove(self._file(name, kind))
+
+    def verify(self, name, password):
+        """
+        True if ``password`` is the password of profile ``name``
+        A match against an unsalted or cheaper hash is re-saved with the current settings
+        """
+        entry = (self.record or {'profiles': {}})['profiles'].get(name)
+        if entry is None or not check_password(entry, password):
+            return False
+
+        if needs_rehash(entry, self.cost):
+            rehashed = hash_password(password, **self.cost)
+            self._update(name, {**entry, **rehashed})
+        return True
+
+    def index(self, encoder=None):
+        """ProfileIndex of the current profiles, voiceprints compared with ``encoder``"""
+        record = self.record
+        if self._index is not None and self._index[0] is record:
+            return self._index[1]
+
+        index = ProfileIndex(encoder)
+        for name in self.names:
+            voiceprint = Voiceprint.load(self._file(name, 'voice'), encoder)
+            spotter = WakeWordSpotter.load(self._file(name, 'wake'))
+            index.add(name, voiceprint, spotter)
+        self._index = (record, index)
+        return index
+
+    def _file(self, name, kind):
+        return os.path.join(self.directory, f"{name}.{kind}.npz")
+
+    def _update(self, name, entry):
+        record = self.record or {'profiles': {}}
+        profiles = dict(record['profiles'])
+        if entry is None:
+            profiles.pop(name, None)
+        else:
+            profiles[name] = entry
+        self._write({**record, 'profiles': profiles})
+
+
+class ProfileIndex:
+    """
+    Every profile's voiceprint and wake word, for matching in one pass
+
+    ``identify`` embeds an utterance once and compares it with all the
+    voiceprint centroids in a single matrix product. Profiles without a
+    voiceprint, or enrolled with another encoder, cannot be told by voice
+    and are always candidates, so their passwords alone decide.
+    ``attach_wake_words`` loads every profile's wake word templates into
+    one spotter, which names the profile it heard.
+    """
+
+    def __init__(self, encoder=None):
+        self.encoder = encoder
+        self.names = []  # one per row of centroids
+        self.centroids = None  # stacked on first use
+        self.thresholds = None
+        self._rows = []  # (centroid, threshold) per name
+        self.unverified = []  # profiles the voice check cannot rule out
+        self.wake_words = []  # (name, templates, threshold)
+
+    def __len__(self):
+        return len(self.names) + len(self.unverified)
+
+    def add(self, name, voiceprint=None, wake_spotter=None):
+        """Index one profile's enrolled voiceprint and wake word spotter"""
+        if self.encoder is None and voiceprint is not None and voiceprint.enrolled:
+            self.encoder = voiceprint.encoder
+        if voiceprint is not None and voiceprint.enrolled and voiceprint.encoder.name == self.encoder.name:
+            self._rows.append((voiceprint.centroid, voiceprint.threshold))
+            self.centroids = self.thresholds = None
+            self.names.append(name)
+        else:
+            self.unverified.append(name)
+        if wake_spotter is not None and wake_spotter.enrolled:
+            self.wake_words.append((name, wake_spotter.templates, wake_spotter.threshold))
+
+    def identify(self, samples):
+        """Profiles whose voiceprint accepts an utterance (int16 samples or PhraseFeatures), nearest first"""
+        if not self.names:
+            return list(self.unverified)
+        if self.centroids is None:
+            self.centroids = np.stack([centroid for centroid, _ in self._rows]).astype(np.float32)
+            self.thresholds = np.array([threshold for _, threshold in self._rows], dtype=np.float32)
+        distances = 1.0 - self.centroids @ self.encoder.embed(samples).astype(np.float32)
+        accepted = np.flatnonzero(distances <= self.thresholds)
+        return [self.names[i] for i in accepted[np.argsort(distances[accepted])]] + self.unverified
+
+    def attach_wake_words(self, spotter):
+        """Add every profile's wake word templates to ``spotter``, each owned by its profile"""
+        for name, templates, threshold in self.wake_words:
+            spotter.add(templates, threshold, owner=name)
+
+
+def valid_name(name):
+    """True if ``name`` can name a profile: 1-32 of a-z, 0-9, _ and -"""
+    return bool(_NAME.fullmatch(name))
+
+
+def allowed(profile, intent):
+    """True if ``profile`` may run ``intent``"""
+    return profile.commands is None or intent in profile.commands or intent in ALWAYS_ALLOWED
@@ -0,0 +1,137 @@
+"""
+Racing Recognition
+Sends each phrase to several backends at once and keeps the first
+confident transcript, so one slow or failing engine no longer costs the
+command
+A result at or above ``min_confidence`` wins as soon as it arrives; the
+others are cancelled if they have not started and ignored if they have.
+Without a confident result the race waits for the rest, up to
+``timeout``, and falls back in the fixed order the backends were given
+"""
+
+import concurrent.futures
+import threading
+import time
+
+import speech_recognition as sr
+
+from .recognizer_backends import RecognizerBackend, Transcription
+
+DEFAULT_MIN_CONFIDENCE = 0.7
+DEFAULT_TIMEOUT = 8.0  # seconds before a race gives up on backends still running
+
+
+class RacingBackend(RecognizerBackend):
+    """
+    Several backends raced in a thread pool, with fixed-order fallback
+
+    ``backends`` is the fallback order: when no result reaches
+    ``min_confidence``, the earliest backend in it that returned a
+    transcript is used. A phrase fails only if every backend does -
+    with RequestError if any of them could not be reached, so the modes
+    still tell a network problem from an unintelligible phrase. Any other
+    exception from one backend (a local model failing to load) counts as
+    its error and only surfaces if no backend returned a transcript.
+    Partial results go to the backend that won the last race alone.
+    """
+
+    def __init__(self, backends, min_confidence=DEFAULT_MIN_CONFIDENCE, timeout=DEFAULT_TIMEOUT, workers=None):
+        if not backends:
+            raise ValueError("RacingBackend needs at least one backend")
+        self.backends = list(backends)
+        self.name = "|".join(backend.name for backend in self.backends)
+        self.min_confidence = min_confidence
+        self.timeout = timeout
+        # Room for the pipeline's workers to race overlapping phrases
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers or 2 * len(self.backends), thread_name_prefix="race")
+        self._lock = threading.Lock()
+        self._leader = self.backends[0]
+
+        self.races = 0
+        self.fallbacks = 0  # decided by fallback order, not confidence
+        self.failures = 0
+        self.wins = {backend.name: 0 for backend in self.backends}
+        self.errors = {backend.name: 0 for backend in self.backends}
+        self.cancelled = 0  # calls that never started
+
+    def transcribe(self, audio):
+        """First confident transcript among the backends, otherwise the fixed-order fallback"""
+        start = time.perf_counter()
+        futures = {self._executor.submit(backend.transcribe, audio): backend for backend in self.backends}
+        results, errors = {}, []
+        winner = None
+
+        pending = set(futures)
+        deadline = start + self.timeout
+        while pending and winner is None:
+            done, pending = concurrent.futures.wait(pending, timeout=max(0.0, deadline - time.perf_counter()),
+                                                    return_when=concurrent.futures.FIRST_COMPLETED)
+            if not done:
+                break  # timed out
+            for future in done:
+                backend = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if not isinstance(e, (sr.UnknownValueError, sr.RequestError)):
+                        print(f"Recognizer {backend.name} error: {e}")
+                    errors.append(e)
+                    with self._lock:
+                        self.errors[backend.name] += 1
+                    continue
+                results[backend] = result
+                if winner is None and (result.confidence or 0.0) >= self.min_confidence:
+                    winner = backend
+
+        cancelled = sum(future.cancel() for future in pending)
+        fallback = winner is None
+        if fallback:
+            winner = next((backend for backend in self.backends if backend in results), None)
+
+        with self._lock:
+            self.races += 1
+            self.cancelled += cancelled
+            if winner is None:
+                self.failures += 1
+            else:
+                self.wins[winner.name] += 1
+                self.fallbacks += fallback
+                self._leader = winner
+
+        if winner is None:
+            if pending:
+                raise sr.RequestError(f"no recognizer answered within {self.timeout:g} s")
+            if any(isinstance(e, sr.RequestError) for e in errors):
+                raise sr.RequestError("; ".join(str(e) for e in errors if isinstance(e, sr.RequestError)))
+            crashed = [e for e in errors if not isinstance(e, sr.UnknownValueError)]
+            if crashed:
+                raise crashed[0]
+            raise sr.UnknownValueError()
+
+        result = results[winner]
+        return Transcription(result.text, result.confidence, time.perf_counter() - start)
+
+    def transcribe_partial(self, audio):
+        """Partials arrive several times a phrase; racing each one would multiply the calls"""
+        with self._lock:
+            leader = self._leader
+        return leader.transcribe_partial(audio)
+
+    def stats(self):
+        """Race counters for reports"""
+        with self._lock:
+            return {
+                'races': self.races,
+                'fallbacks': self.fallbacks,
+                'failures': self.failures,
+                'cancelled': self.cancelled,
+                'wins': dict(self.wins),
+                'errors': dict(self.errors),
+            }
+
+    def close(self):
+        """Stop the pool without waiting for calls nobody is waiting on"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for backend in self.backends:
+            backend.close()
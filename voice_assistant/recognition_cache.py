@@ -0,0 +1,158 @@
+"""
+Recognition Result Cache
+Remembers transcripts by an acoustic fingerprint of the phrase, so a
+near-identical repeat ("computer", "next", the unlock phrase) skips the
+network or model call
+Fingerprint: MFCCs of the trimmed phrase averaged over a fixed number of
+time slices; random-hyperplane hashes find candidates and a distance
+threshold decides; least recently used entries are evicted
+"""
+
+import collections
+import threading
+import time
+
+import numpy as np
+
+from .frontend import DEFAULT_SAMPLE_RATE, phrase_features
+from .recognizer_backends import RecognizerBackend, Transcription
+
+DEFAULT_CAPACITY = 64
+DEFAULT_THRESHOLD = 0.2  # Euclidean distance between unit-length fingerprints
+DURATION_TOLERANCE = 0.15  # repeats differ in length by at most 15%
+SEGMENTS = 8  # time slices per fingerprint
+TRIM_RATIO = 0.3  # edges quieter than this share of the loudest frame are room audio
+HASH_TABLES = 4
+HASH_BITS = 10
+
+
+class AudioFingerprint:
+    """Fixed-length, unit-length summary of an utterance's MFCCs over time"""
+
+    def __init__(self, sample_rate=DEFAULT_SAMPLE_RATE, segments=SEGMENTS, n_mfcc=13):
+        self.sample_rate = sample_rate
+        self.segments = segments
+        self.n_mfcc = n_mfcc
+        self.dimensions = segments * (n_mfcc - 1)  # c0 is dropped
+
+    def __call__(self, samples):
+        """(vector, seconds) for int16 samples or PhraseFeatures, or None if there is too little audio"""
+        phrase = phrase_features(samples, self.sample_rate)
+        speech = phrase.trimmed(TRIM_RATIO)
+        features = phrase.mfcc(n_mfcc=self.n_mfcc, frames=speech)
+        if len(features) < self.segments:
+            return None
+
+        features = features - features.mean(axis=0)  # channel and level do not matter, the sequence does
+        vector = np.concatenate([part.mean(axis=0) for part in np.array_split(features, self.segments)])
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        return (vector / norm).astype(np.float32), len(features) * phrase.hop_seconds
+
+
+class CachedBackend(RecognizerBackend):
+    """
+    Any backend with a fingerprint cache in front of it
+
+    A phrase whose fingerprint lies within ``threshold`` of a cached one,
+    and whose length is within DURATION_TOLERANCE of it, gets the cached
+    transcript. Hash tables only narrow the search; the distance decides.
+    Failed recognitions are not cached, so a phrase that could not be
+    understood is always tried again.
+    """
+
+    def __init__(self, backend, capacity=DEFAULT_CAPACITY, threshold=DEFAULT_THRESHOLD, seed=0):
+        self.backend = backend
+        self.name = f"{backend.name}+cache"
+        self.capacity = capacity
+        self.threshold = threshold
+        self.fingerprint = AudioFingerprint()
+
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((HASH_TABLES, HASH_BITS, self.fingerprint.dimensions)).astype(np.float32)
+        self._weights = 1 << np.arange(HASH_BITS)
+
+        self._entries = collections.OrderedDict()  # id -> (vector, seconds, text, confidence, keys)
+        self._buckets = [collections.defaultdict(set) for _ in range(HASH_TABLES)]
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def transcribe(self, audio):
+        """Cached transcript for a repeat, otherwise the wrapped backend's"""
+        start = time.perf_counter()
+        fingerprint = self.fingerprint(phrase_features(audio, self.fingerprint.sample_rate))
+
+        if fingerprint is not None:
+            cached = self.lookup(*fingerprint)
+            if cached is not None:
+                text, confidence = cached
+                return Transcription(text, confidence, time.perf_counter() - start)
+
+        with self._lock:
+            self.misses += 1
+        result = self.backend.transcribe(audio)  # raises like any backend; nothing is cached then
+        if fingerprint is not None:
+            self.store(*fingerprint, result.text, result.confidence)
+        return Transcription(result.text, result.confidence, time.perf_counter() - start)
+
+    def transcribe_partial(self, audio):
+        """Partial phrases bypass the cache: a prefix sounds like the whole phrase but lacks its last words"""
+        return self.backend.transcribe_partial(audio)
+
+    def close(self):
+        """Close the wrapped backend"""
+        self.backend.close()
+
+    def lookup(self, vector, seconds):
+        """(text, confidence) of the closest cached phrase within the threshold, or None"""
+        keys = self._keys(vector)
+        with self._lock:
+            candidates = set()
+            for table, key in zip(self._buckets, keys):
+                candidates |= table.get(key, set())
+
+            best, best_distance = None, self.threshold
+            for entry_id in candidates:
+                cached_vector, cached_seconds, _, _, _ = self._entries[entry_id]
+                if abs(seconds - cached_seconds) > DURATION_TOLERANCE * max(seconds, cached_seconds):
+                    continue
+                distance = float(np.linalg.norm(vector - cached_vector))
+                if distance <= best_distance:
+                    best, best_distance = entry_id, distance
+
+            if best is None:
+                return None
+            self._entries.move_to_end(best)
+            self.hits += 1
+            _, _, text, confidence, _ = self._entries[best]
+            return text, confidence
+
+    def store(self, vector, seconds, text, confidence):
+        """Add a recognized phrase, evicting the least recently used beyond capacity"""
+        keys = self._keys(vector)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (vector, seconds, text, confidence, keys)
+            for table, key in zip(self._buckets, keys):
+                table[key].add(entry_id)
+
+            while len(self._entries) > self.capacity:
+                old_id, (_, _, _, _, old_keys) = self._entries.popitem(last=False)
+                for table, key in zip(self._buckets, old_keys):
+                    table[key].discard(old_id)
+                    if not table[key]:
+                        del table[key]
+                self.evictions += 1
+
+    def _keys(self, vector):
+        bits = (self._planes @ vector) > 0  # (tables, bits)
+        return tuple(int(key) for key in bits @ self._weights)
+
+    def __len__(self):
+        return len(self._entries)
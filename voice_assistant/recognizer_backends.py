@@ -0,0 +1,236 @@
+"""
+Recognizer Backends
+One small interface in front of every speech-to-text engine:
+    transcribe(audio) -> Transcription(text, confidence, latency)
+Backends raise sr.UnknownValueError / sr.RequestError like sr.Recognizer,
+so existing error handling keeps working
+"""
+
+import collections
+import os
+import time
+import wave
+
+import speech_recognition as sr
+
+Transcription = collections.namedtuple('Transcription', ['text', 'confidence', 'latency'])
+
+
+class RecognizerBackend:
+    """Base class: subclasses implement _recognize(audio) -> (text, confidence)"""
+
+    name = "base"
+
+    def transcribe(self, audio):
+        """Transcribe an sr.AudioData; latency is wall-clock seconds spent"""
+        start = time.perf_counter()
+        text, confidence = self._recognize(audio)
+        return Transcription(text, confidence, time.perf_counter() - start)
+
+    def transcribe_partial(self, audio):
+        """Transcribe the first part of a phrase that is still being spoken"""
+        return self.transcribe(audio)
+
+    def close(self):
+        """Release threads or models the backend holds"""
+
+    def _recognize(self, audio):
+        raise NotImplementedError
+
+
+class GoogleBackend(RecognizerBackend):
+    """Google Web Speech API through SpeechRecognition (needs network)"""
+
+    name = "google"
+
+    def __init__(self, recognizer=None, language="en-US"):
+        self.recognizer = recognizer if recognizer is not None else sr.Recognizer()
+        self.language = language
+
+    def _recognize(self, audio):
+        return self.recognizer.recognize_google(audio, language=self.language, with_confidence=True)
+
+
+class LocalBackend(RecognizerBackend):
+    """
+    Offline wav2vec 2.0 model from torchaudio, run on the CPU
+
+    The model is downloaded once and cached by torch; after that no
+    network is needed. It loads on first use, or call ``load`` at startup.
+    """
+
+    name = "local"
+
+    def __init__(self, num_threads=None):
+        self.num_threads = num_threads
+        self._torch = None
+        self._model = None
+        self._labels = None
+        self.sample_rate = 16000
+
+    def load(self):
+        """Load the acoustic model (no-op if already loaded)"""
+        if self._model is not None:
+            return
+
+        try:
+            import torch
+            import torchaudio
+        except ImportError:
+            raise sr.RequestError("missing torchaudio module: ensure that torch and torchaudio are installed")
+
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+
+        bundle = torchaudio.pipelines.WAV2VEC2_ASR_BASE_960H
+        self._torch = torch
+        self._model = bundle.get_model().eval()
+        self._labels = bundle.get_labels()
+        self.sample_rate = bundle.sample_rate
+
+    @property
+    def labels(self):
+        """Output characters of the acoustic model: index 0 is the CTC blank, '|' separates words"""
+        self.load()
+        return self._labels
+
+    def emissions(self, audio):
+        """Log-probabilities of every label in every output frame of ``audio``, shape (frames, labels)"""
+        self.load()
+        torch = self._torch
+
+        raw = audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2)
+        waveform = torch.frombuffer(bytearray(raw), dtype=torch.int16).float() / 32768.0
+
+        with torch.inference_mode():
+            emissions, _ = self._model(waveform.unsqueeze(0))
+        return emissions[0].log_softmax(dim=-1)
+
+    def _recognize(self, audio):
+        best_log_probability, best_index = self.emissions(audio).max(dim=-1)
+        best_probability = best_log_probability.exp()
+
+        # Greedy CTC decoding: collapse repeats, drop blanks, '|' separates words
+        characters, scores = [], []
+        previous = None
+        for index, probability in zip(best_index.tolist(), best_probability.tolist()):
+            if index != previous and index != 0:
+                characters.append(self._labels[index])
+                scores.append(probability)
+            previous = index
+
+        text = "".join(characters).replace("|", " ").strip().lower()
+        if not text:
+            raise sr.UnknownValueError()
+        return text, sum(scores) / len(scores)
+
+
+class ReplayBackend(RecognizerBackend):
+    """
+    Deterministic stub fed by fixture WAV/transcript pairs
+
+    ``directory`` holds ``<name>.wav`` files with a ``<name>.txt`` next to
+    each. A phrase whose middle part comes from a fixture - the fixture itself,
+    or the fixture captured from a longer replayed recording - is answered
+    with that fixture's transcript; anything else raises UnknownValueError.
+    ``delay`` adds a fixed simulated latency.
+    """
+
+    name = "replay"
+
+    def __init__(self, directory, sample_rate=16000, delay=0.0):
+        self.sample_rate = sample_rate
+        self.delay = delay
+        self.fixtures = []  # (name, pcm, transcript)
+
+        for filename in sorted(os.listdir(directory)):
+            name, extension = os.path.splitext(filename)
+            transcript_path = os.path.join(directory, name + ".txt")
+            if extension.lower() != ".wav" or not os.path.exists(transcript_path):
+                continue
+            with open(transcript_path, 'r') as f:
+                transcript = f.read().strip()
+            self.add(name, self._read_pcm(os.path.join(directory, filename)), transcript)
+
+    def add(self, name, pcm, transcript):
+        """Register raw 16-bit mono PCM at ``sample_rate`` and its transcript"""
+        self.fixtures.append((name, bytes(pcm), transcript))
+
+    def _read_pcm(self, path):
+        with wave.open(path, 'rb') as wav:
+            audio = sr.AudioData(wav.readframes(wav.getnframes()), wav.getframerate(), wav.getsampwidth())
+        return audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2)
+
+    def lookup(self, audio):
+        """
+        Fixture name and transcript for ``audio``, or None
+
+        Audio that stops part-way through a fixture gets the words heard so
+        far, assuming they are spread evenly over the recording - enough to
+        drive partial results like an incremental recognizer would.
+        """
+        pcm = audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2)
+
+        # Probe around the middle: captured phrases carry room audio on either side
+        for position in (0.5, 0.4, 0.6, 0.3, 0.7):
+            start = int(len(pcm) * position) & ~1
+            probe = pcm[start:start + 1024]
+            if not probe:
+                return None
+
+            for name, fixture, transcript in self.fixtures:
+                if _find_samples(fixture, probe) == -1:
+                    continue
+
+                tail = pcm[-1024:] if len(pcm) >= 1024 else pcm
+                end = _find_samples(fixture, tail)
+                if end == -1:
+                    return name, transcript  # the audio runs past the end of the fixture
+
+                words = transcript.split()
+                heard = int(len(words) * (end + len(tail)) / len(fixture))
+                return name, " ".join(words[:heard])
+        return None
+
+    def _recognize(self, audio):
+        if self.delay:
+            time.sleep(self.delay)
+
+        match = self.lookup(audio)
+        if match is None or not match[1]:
+            raise sr.UnknownValueError()
+        return match[1], 1.0
+
+
+def _find_samples(haystack, needle):
+    """Byte offset of ``needle`` in 16-bit PCM, on a sample boundary, or -1"""
+    offset = haystack.find(needle)
+    while offset != -1 and offset % 2:
+        offset = haystack.find(needle, offset + 1)
+    return offset
+
+
+def create_backend(spec, recognizer=None):
+    """
+    Build a backend from a short spec string
+
+    "google", "local", "replay:<fixture directory>", "grammar" (the
+    command grammar over the local model) or "grammar:<fixture directory>"
+    (the command grammar matched against recordings); several joined
+    by commas ("local,google") are raced, in that fallback order
+    """
+    if "," in spec:
+        from .racing import RacingBackend
+        return RacingBackend([create_backend(part.strip(), recognizer) for part in spec.split(",")])
+
+    name, _, argument = spec.partition(":")
+    if name == "google":
+        return GoogleBackend(recognizer)
+    if name == "local":
+        return LocalBackend()
+    if name == "replay":
+        return ReplayBackend(argument or "fixtures")
+    if name == "grammar":
+        from .grammar import CtcGrammarBackend, TemplateGrammarBackend
+        return TemplateGrammarBackend.from_fixtures(argument) if argument else CtcGrammarBackend()
+    raise ValueError(f"Unknown recognizer backend: {spec}")
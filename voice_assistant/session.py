@@ -0,0 +1,150 @@
+"""
+Session State Machine
+LOCKED -> UNLOCKED_IDLE -> SESSION_ACTIVE, moved by events (unlock, wake
+word, command, lock) and by the session deadline
+A timer thread sleeps until the deadline and expires the session on
+time, even while the main loop is blocked in a capture; nothing polls
+"""
+
+import threading
+import time
+
+LOCKED = "locked"
+IDLE = "unlocked_idle"
+ACTIVE = "session_active"
+
+
+class SessionStateMachine:
+    """
+    Thread-safe session state shared by the capture, dispatch and main threads
+
+    Events return True when they changed something, so callers can tell a
+    wake word heard while locked (ignored) from one that opened a session.
+    Listeners registered with ``add_listener`` are called as
+    ``callback(old, new)`` after each transition, outside the lock, on the
+    thread that caused it - the timer thread for expiry - and before
+    ``wait_change`` callers are woken, so their side effects come first.
+    ``clock`` supplies the deadlines; a clock that is not wall time (a
+    replay's audio clock) should call ``check`` as it advances.
+    """
+
+    def __init__(self, duration, locked=True, clock=time.monotonic):
+        self.duration = duration
+        self.clock = clock
+        self._state = LOCKED if locked else IDLE
+        self._deadline = None
+        self._condition = threading.Condition()
+        self._listeners = []
+        self._closed = False
+        self._timer = None
+
+        self.sessions = 0
+        self.expirations = 0
+
+    @property
+    def state(self):
+        return self._state
+
+    @property
+    def active(self):
+        return self._state == ACTIVE
+
+    @property
+    def unlocked(self):
+        return self._state != LOCKED
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def remaining(self):
+        """Seconds left in the active session, 0 when there is none"""
+        with self._condition:
+            if self._state != ACTIVE:
+                return 0.0
+            return max(0.0, self._deadline - self.clock())
+
+    def add_listener(self, callback):
+        """Call ``callback(old, new)`` after every transition"""
+        self._listeners.append(callback)
+
+    def unlock(self):
+        """Password accepted: LOCKED -> UNLOCKED_IDLE"""
+        return self._move({LOCKED}, IDLE)
+
+    def lock(self):
+        """Any state -> LOCKED"""
+        return self._move({IDLE, ACTIVE}, LOCKED)
+
+    def wake(self):
+        """Wake word heard: UNLOCKED_IDLE -> SESSION_ACTIVE; ignored otherwise"""
+        return self._move({IDLE}, ACTIVE)
+
+    def touch(self):
+        """A command ran: restart the session deadline; False if no session is active"""
+        with self._condition:
+            if self._state != ACTIVE:
+                return False
+            self._deadline = self.clock() + self.duration
+            self._condition.notify_all()
+            return True
+
+    def check(self):
+        """Expire the session if its deadline has passed"""
+        with self._condition:
+            expired = self._state == ACTIVE and self.clock() >= self._deadline
+        if expired:
+            return self._move({ACTIVE}, IDLE, expiry=True)
+        return False
+
+    def wait_change(self, state, timeout=None):
+        """Block until the state is no longer ``state`` (or the machine closes); returns the new state"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._state != state or self._closed, timeout)
+            return self._state
+
+    def close(self):
+        """Stop the timer and release every waiter"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._timer is not None and self._timer is not threading.current_thread():
+            self._timer.join(timeout=1.0)
+
+    def _move(self, sources, target, expiry=False):
+        with self._condition:
+            old = self._state
+            if old not in sources:
+                return False
+            if expiry and self.clock() < self._deadline:
+                return False  # touched again since the caller looked
+            self._state = target
+            if target == ACTIVE:
+                self._deadline = self.clock() + self.duration
+                self.sessions += 1
+                if self._timer is None:
+                    self._timer = threading.Thread(target=self._timer_loop, name="session-timer", daemon=True)
+                    self._timer.start()
+            elif expiry:
+                self.expirations += 1
+
+        for callback in self._listeners:
+            callback(old, target)
+        with self._condition:
+            self._condition.notify_all()
+        return True
+
+    def _timer_loop(self):
+        """Sleep until the deadline; a touch, lock or close wakes it early to re-plan"""
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                if self._state != ACTIVE:
+                    self._condition.wait()
+                    continue
+                remaining = self._deadline - self.clock()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+            self.check()
@@ -0,0 +1,199 @@
+"""
+Speaker Verification
+Voiceprints for the startup password: each enrolled utterance becomes a
+fixed-length speaker embedding, stored once in a small binary file, and
+an unlock attempt is compared with them by cosine similarity
+"""
+
+import importlib.util
+import os
+
+import numpy as np
+
+from .frontend import PhraseFeatures, phrase_features
+from .wake_word import trim_silence
+
+DEFAULT_SAMPLE_RATE = 16000
+ENROLLMENT_SAMPLES = 3
+THRESHOLD_MARGIN = 3.0  # three samples understate the spread of later attempts
+DEFAULT_THRESHOLD = 0.1  # cosine distance, used with a single enrolled sample
+MIN_THRESHOLD = 0.05  # very consistent enrollments would otherwise reject their own speaker
+MAX_THRESHOLD = 0.3
+VOICED_ENERGY_RATIO = 0.05  # frames quieter than this share of the loudest are left out
+
+
+class MfccEncoder:
+    """
+    Long-term average of the MFCCs over an utterance, liftered
+
+    Averaging over the whole password leaves mostly the shape of the vocal
+    tract rather than the words - the words are checked separately against
+    the password hash. Each coefficient is weighted by its index so the
+    fine spectral detail that tells voices apart is not drowned out by the
+    overall tilt that every voice shares. Cheap and dependency-free.
+    """
+
+    name = "mfcc"
+
+    def __init__(self, sample_rate=DEFAULT_SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self._lifter = np.arange(1, 20, dtype=np.float32)  # c1..c19
+
+    def load(self):
+        """Nothing to load; present so both encoders can be warmed up alike"""
+
+    def embed(self, samples):
+        """Unit-length embedding of int16 ``samples`` or their PhraseFeatures"""
+        phrase = phrase_features(samples, self.sample_rate)
+        frames = phrase.trimmed()
+        features = phrase.mfcc(n_mels=40, n_mfcc=20, frames=frames)
+        if len(features) == 0:
+            raise ValueError("utterance too short for a voiceprint")
+
+        # Only frames with voice in them; pauses between words are room noise
+        energy = phrase.energy[frames]
+        vector = features[energy >= VOICED_ENERGY_RATIO * energy.max()].mean(axis=0) * self._lifter
+        return (vector / np.linalg.norm(vector)).astype(np.float32)
+
+
+class Wav2Vec2Encoder:
+    """
+    Pooled hidden states of torchaudio's wav2vec 2.0 base model, on the CPU
+
+    Middle transformer layers carry most of the speaker identity; their
+    frames are averaged, with the spread, into one vector. The model is
+    downloaded once and cached by torch, and loads on first use or ``load``.
+    """
+
+    name = "wav2vec2"
+
+    def __init__(self, layer=6, num_threads=None):
+        self.layer = layer
+        self.num_threads = num_threads
+        self.sample_rate = DEFAULT_SAMPLE_RATE
+        self._torch = None
+        self._model = None
+
+    def load(self):
+        """Load the model (no-op if already loaded)"""
+        if self._model is not None:
+            return
+
+        try:
+            import torch
+            import torchaudio
+        except ImportError:
+            raise RuntimeError("missing torchaudio module: ensure that torch and torchaudio are installed")
+
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+
+        bundle = torchaudio.pipelines.WAV2VEC2_BASE
+        self._torch = torch
+        self._model = bundle.get_model().eval()
+        self.sample_rate = bundle.sample_rate
+
+    def embed(self, samples):
+        """Unit-length embedding of int16 ``samples`` or their PhraseFeatures"""
+        self.load()
+        torch = self._torch
+        if isinstance(samples, PhraseFeatures):
+            samples = samples.samples
+
+        trimmed = trim_silence(samples, self.sample_rate)
+        waveform = torch.from_numpy(np.ascontiguousarray(trimmed, dtype=np.float32) / 32768.0)
+        with torch.inference_mode():
+            layers, _ = self._model.extract_features(waveform.unsqueeze(0), num_layers=self.layer)
+        hidden = layers[-1][0]
+        vector = torch.cat((hidden.mean(dim=0), hidden.std(dim=0))).numpy()
+        return (vector / np.linalg.norm(vector)).astype(np.float32)
+
+
+ENCODERS = {encoder.name: encoder for encoder in (MfccEncoder, Wav2Vec2Encoder)}
+
+
+def create_encoder(name="auto"):
+    """Encoder by name; "auto" picks wav2vec2 when torchaudio is installed, else mfcc"""
+    if name == "auto":
+        # Only look for torchaudio; importing it costs seconds of startup
+        name = Wav2Vec2Encoder.name if importlib.util.find_spec("torchaudio") else MfccEncoder.name
+
+    if name not in ENCODERS:
+        raise ValueError(f"Unknown speaker encoder '{name}' (expected one of: {', '.join(ENCODERS)})")
+    return ENCODERS[name]()
+
+
+class Voiceprint:
+    """
+    Enrolled speaker embeddings and the distance threshold derived from them
+
+    ``verify`` embeds one utterance and compares it with the centroid of
+    the enrolled embeddings; everything else was computed at enrollment.
+    """
+
+    def __init__(self, encoder=None, threshold=None):
+        self.encoder = encoder if encoder is not None else create_encoder()
+        self.embeddings = np.zeros((0, 0), dtype=np.float32)
+        self.threshold = threshold
+        self._centroid = None
+
+    @property
+    def enrolled(self):
+        return len(self.embeddings) > 0
+
+    @property
+    def centroid(self):
+        """Unit-length mean of the enrolled embeddings, what ``verify`` compares with"""
+        return self._centroid
+
+    def enroll(self, samples_list):
+        """Replace the voiceprint with embeddings of the given recordings (int16 samples or PhraseFeatures)"""
+        self.embeddings = np.stack([self.encoder.embed(samples) for samples in samples_list])
+        self._update()
+        self._calibrate()
+
+    def _update(self):
+        centroid = self.embeddings.astype(np.float32).mean(axis=0)
+        self._centroid = centroid / np.linalg.norm(centroid)
+
+    def _calibrate(self):
+        """Threshold from how far each sample is from the centroid of the others"""
+        if len(self.embeddings) < 2:
+            self.threshold = DEFAULT_THRESHOLD
+            return
+
+        distances = []
+        for i in range(len(self.embeddings)):
+            others = np.delete(self.embeddings, i, axis=0).mean(axis=0)
+            distances.append(1.0 - float(self.embeddings[i] @ others / np.linalg.norm(others)))
+        self.threshold = float(np.clip(max(distances) * THRESHOLD_MARGIN, MIN_THRESHOLD, MAX_THRESHOLD))
+
+    def distance(self, samples):
+        """Cosine distance between an utterance and the voiceprint"""
+        return 1.0 - float(self.encoder.embed(samples) @ self._centroid)
+
+    def verify(self, samples):
+        """(accepted, distance) for one utterance (int16 samples or PhraseFeatures)"""
+        distance = self.distance(samples)
+        return distance <= self.threshold, distance
+
+    def save(self, path):
+        """Store the embeddings as float16 with the encoder name and threshold"""
+        with open(path, 'wb') as f:
+            np.savez(f, embeddings=self.embeddings.astype(np.float16),
+                     threshold=np.array(self.threshold), encoder=np.array(self.encoder.name))
+
+    @classmethod
+    def load(cls, path, encoder=None):
+        """Load a voiceprint saved by ``save``; returns an unenrolled one if missing"""
+        if not os.path.exists(path):
+            return cls(encoder)
+
+        with np.load(path) as data:
+            name = str(data['encoder'])
+            if encoder is None or encoder.name != name:
+                encoder = create_encoder(name)  # must match the encoder used at enrollment
+            voiceprint = cls(encoder, float(data['threshold']))
+            voiceprint.embeddings = data['embeddings'].astype(np.float32)
+        voiceprint._update()
+        return voiceprint
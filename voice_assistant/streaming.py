@@ -0,0 +1,166 @@
+"""
+Streaming Command Execution
+Sends partial transcripts of a phrase to the intent engine while it is
+still being spoken, so short commands like "next" fire without waiting
+for the trailing silence that ends the phrase and a final transcription
+"""
+
+import audioop
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+import speech_recognition as sr
+
+StreamedCommand = collections.namedtuple('StreamedCommand', ['match', 'text', 'partial'])
+
+
+class StreamingCommandListener:
+    """
+    Listens for one phrase at a time and executes its command early
+
+    While the phrase is being captured, the audio so far is re-transcribed
+    every ``partial_interval`` seconds on a background worker. As soon as a
+    partial transcript settles on a command (see IntentEngine.decide) it is
+    executed. When the phrase ends the final transcript is matched too; if
+    it agrees with what already ran it is dropped as a duplicate, and if it
+    corrects it to a different command that command runs instead.
+
+    ``execute(match, text, partial)`` returns True if the command ran. With
+    a ``vad``, audio that is not speech is never transcribed. ``source`` is
+    a CaptureStream: partial and final audio are views of its ring, with
+    its pre-roll, rather than copies.
+    """
+
+    def __init__(self, source, recognizer, backend, engine, execute, partial_interval=0.25, vad=None):
+        self.source = source
+        self.recognizer = recognizer
+        self.backend = backend
+        self.engine = engine
+        self.execute = execute
+        self.partial_interval = partial_interval
+        self.vad = vad
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="partial-recognizer")
+
+        self.partials = 0
+        self.early = 0  # commands fired from a partial transcript
+        self.duplicates = 0  # final transcripts that repeated an early command
+        self.corrections = 0
+
+    def listen(self, timeout=None, phrase_time_limit=None, context='command'):
+        """
+        Capture one phrase, executing its command as early as possible
+
+        Returns a StreamedCommand for the command that ran, or None.
+        Raises sr.WaitTimeoutError if no speech starts within ``timeout``.
+        The source's endpointer, if it has one, ends the phrase for ``context``.
+        """
+        source = self.source
+        seconds_per_chunk = source.CHUNK / source.SAMPLE_RATE
+        endpointer = source.endpointer
+        pause_limit = self.recognizer.pause_threshold
+
+        # Wait for speech; the phrase starts a little before it, taken from the capture ring
+        onset = source.wait_for_speech(self.recognizer, timeout)
+        if onset is None:
+            return None
+        start = source.phrase_start(onset)
+        try:
+            end = source.position
+
+            executed = None
+            pending = None
+            elapsed = since_partial = pause = 0.0
+            gaps = []
+            limited = False
+
+            while True:
+                chunk = source.read_view()
+                if not chunk:
+                    break
+                end = source.position
+                elapsed += seconds_per_chunk
+                since_partial += seconds_per_chunk
+
+                if audioop.rms(chunk, source.SAMPLE_WIDTH) > self.recognizer.energy_threshold:
+                    if pause:
+                        gaps.append(pause)
+                    pause = 0.0
+                else:
+                    pause += seconds_per_chunk
+                    if endpointer is not None:
+                        pause_limit = endpointer.pause_limit(context, elapsed - pause)
+                if pause > pause_limit:
+                    break
+                limit = phrase_time_limit
+                if limit is None and endpointer is not None:
+                    limit = endpointer.phrase_limit(context, elapsed - pause)
+                if limit and elapsed > limit:
+                    limited = True
+                    break
+
+                if executed is not None:
+                    continue
+
+                # Collect a finished partial, then start the next one
+                if pending is not None and pending.done():
+                    executed = self._decide(pending, final=False)
+                    pending = None
+                if pending is None and executed is None and since_partial >= self.partial_interval:
+                    since_partial = 0.0
+                    audio = source.phrase(start, end)  # the phrase so far, without copying it
+                    if self.vad is None or self.vad.accept(audio, count=False):
+                        self.partials += 1
+                        pending = self._worker.submit(self._transcribe, audio, True)
+
+            if pending is not None:
+                pending.cancel()
+            if endpointer is not None:
+                endpointer.observe(context, onset / source.SAMPLE_RATE, end / source.SAMPLE_RATE - pause, gaps, limited)
+
+            audio = source.hand_over(start, end)
+            if self.vad is not None and not self.vad.accept(audio):
+                return executed
+            final = self._worker.submit(self._transcribe, audio, False)
+            return self._finish(final, executed)
+        finally:
+            source.release_hold()  # also when recognition or the caller raises mid-phrase
+
+    def _transcribe(self, audio, partial):
+        transcribe = self.backend.transcribe_partial if partial else self.backend.transcribe
+        try:
+            return transcribe(audio).text
+        except (sr.UnknownValueError, sr.RequestError):
+            return None
+
+    def _decide(self, future, final):
+        text = future.result()
+        if not text:
+            return None
+        match = self.engine.decide(text, final=final)
+        if match is None:
+            return None
+        if self.execute(match, text, not final):
+            if not final:
+                self.early += 1
+            return StreamedCommand(match, text, not final)
+        return None
+
+    def _finish(self, final, executed):
+        if executed is None:
+            return self._decide(final, final=True)
+
+        text = final.result()
+        match = self.engine.decide(text, final=True) if text else None
+        if match is None or match.intent == executed.match.intent:
+            self.duplicates += 1
+            return executed
+
+        # The full phrase says something else; run that instead
+        self.corrections += 1
+        if self.execute(match, text, False):
+            return StreamedCommand(match, text, False)
+        return executed
+
+    def close(self):
+        """Stop the partial-transcription worker"""
+        self._worker.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,116 @@
+"""
+Voice Activity Detection
+Frame-level spectral check run on every endpointed phrase, so fans,
+knocks and background music are dropped before a recognizer is called
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from .frontend import HOP_MS, N_FFT, phrase_features
+
+
+class VoiceActivityDetector:
+    """
+    Speech / non-speech gate for phrases that already passed the energy threshold
+
+    Works on the phrase's shared spectral frames (frontend.PhraseFeatures,
+    25 ms every 10 ms). A frame is voiced when it is well
+    above the quietest frames of the phrase, most of its energy lies in the
+    voice band, and its spectrum there is peaky (harmonics) rather than flat
+    (fans, hiss, knocks). A phrase is speech when enough of its loud frames
+    are voiced and their level keeps moving from frame to frame the way
+    syllables do - sustained music is voiced but steady. Level changes are
+    taken between frames 20 ms apart.
+
+    ``accept`` counts the phrases it lets through and drops, and the frames
+    it has analysed and the time that took.
+    """
+
+    def __init__(self, sample_rate=16000, band=(80, 4000), min_band_ratio=0.7, max_flatness=0.3,
+                 min_voiced_seconds=0.15, min_voiced_ratio=0.5, min_modulation_db=1.5, loud_range_db=10,
+                 min_rms=50, modulation_seconds=0.02):
+        self.sample_rate = sample_rate
+        self.frame_seconds = HOP_MS / 1000  # one frame per hop
+        self.min_band_ratio = min_band_ratio
+        self.max_flatness = max_flatness
+        self.min_voiced_seconds = min_voiced_seconds
+        self.min_voiced_ratio = min_voiced_ratio
+        self.min_modulation_db = min_modulation_db
+        self.loud_range_db = loud_range_db
+        self.min_rms = min_rms
+
+        self._lag = max(1, round(modulation_seconds / self.frame_seconds))
+        freqs = np.fft.rfftfreq(N_FFT, 1 / sample_rate)
+        self._band = (freqs >= band[0]) & (freqs <= band[1])
+
+        self.accepted = 0
+        self.dropped = 0
+        self.frames = 0
+        self.cpu_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def frame_features(self, samples):
+        """(energy, voice-band ratio, spectral flatness) per frame of int16 ``samples`` or PhraseFeatures"""
+        features = phrase_features(samples, self.sample_rate)
+        energy = features.energy
+
+        spectrum = features.power.astype(np.float64) + 1e-10
+        band = spectrum[:, self._band]
+        band_ratio = band.sum(axis=1) / spectrum.sum(axis=1)
+        flatness = np.exp(np.mean(np.log(band), axis=1)) / np.mean(band, axis=1)
+        return energy, band_ratio, flatness
+
+    def is_speech(self, samples):
+        """True if int16 ``samples`` (or their PhraseFeatures) hold speech; does not touch the counters"""
+        energy, band_ratio, flatness = self.frame_features(samples)
+        if not len(energy):
+            return False
+
+        active = energy > max(np.percentile(energy, 10) * 4, self.min_rms ** 2)
+        voiced = active & (band_ratio >= self.min_band_ratio) & (flatness <= self.max_flatness)
+        if voiced.sum() * self.frame_seconds < self.min_voiced_seconds:
+            return False
+        if voiced.sum() < self.min_voiced_ratio * active.sum():
+            return False
+
+        # Mean level change between voiced frames 20 ms apart around the
+        # loudest part of the phrase, in dB; a quieter music bed is left out
+        lag = self._lag
+        level = 10 * np.log10(energy)
+        loud = voiced & (level >= level[voiced].max() - self.loud_range_db)
+        pairs = (loud[lag:] | loud[:-lag]) & voiced[lag:] & voiced[:-lag]
+        steps = np.abs(level[lag:] - level[:-lag])[pairs]
+        return len(steps) > 0 and np.mean(steps) >= self.min_modulation_db
+
+    def accept(self, audio, count=True):
+        """
+        True if the sr.AudioData phrase ``audio`` should go to a recognizer
+        Pass ``count=False`` for checks of a phrase still being captured
+        """
+        started = time.perf_counter()
+        features = phrase_features(audio, self.sample_rate)  # shared with the cache and voiceprint
+        speech = self.is_speech(features)
+        if not count:
+            return speech
+
+        with self._lock:
+            self.frames += len(features)
+            self.cpu_seconds += time.perf_counter() - started
+            if speech:
+                self.accepted += 1
+            else:
+                self.dropped += 1
+        return speech
+
+    def stats(self):
+        """Counters as a dict, with the average cost per frame in microseconds"""
+        with self._lock:
+            return {
+                'accepted': self.accepted,
+                'dropped': self.dropped,
+                'frames': self.frames,
+                'us_per_frame': 1e6 * self.cpu_seconds / self.frames if self.frames else 0.0,
+            }
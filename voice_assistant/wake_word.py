@@ -0,0 +1,373 @@
+"""
+Offline Wake Word Spotter
+MFCC features on 25 ms frames (10 ms hop) matched against enrolled
+samples of the wake word with streaming subsequence DTW
+Attached to an AudioFrontEnd, it takes the front-end's log-mel frames
+instead of transforming the stream itself
+No network round trip per phrase; runs on the capture thread
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from .frontend import AudioFrontEnd, FeatureExtractor, cepstral_matrix, phrase_features
+
+DEFAULT_SAMPLE_RATE = 16000
+ENROLLMENT_SAMPLES = 3
+THRESHOLD_MARGIN = 1.3  # accept up to 30% worse than the enrolled samples match each other
+DEFAULT_THRESHOLD = 0.35
+MIN_THRESHOLD = 0.15  # enrolled samples that match too well would make the spotter deaf
+MAX_THRESHOLD = 0.45
+OWNER_WINDOW = 10  # frames to keep matching after a crossing before naming whose wake word it was
+
+
+class MfccExtractor(FeatureExtractor):
+    """Streaming MFCC front-end: feed raw samples, get whole frames back"""
+
+    def __init__(self, sample_rate=DEFAULT_SAMPLE_RATE, frame_ms=25, hop_ms=10,
+                 n_mels=26, n_mfcc=13, n_fft=512, preemphasis=0.97):
+        super().__init__(sample_rate, frame_ms, hop_ms, n_mels, n_fft, preemphasis)
+        self._dct = cepstral_matrix(n_mels, n_mfcc)
+
+    def cepstra(self, log_mel):
+        """MFCCs without c0 for log-mel frames from this extractor or an AudioFrontEnd"""
+        return log_mel @ self._dct
+
+    def process(self, samples):
+        """Append samples; return MFCCs (without c0) for every completed frame"""
+        return self.cepstra(super().process(samples))
+
+    def features(self, samples):
+        """MFCCs for a whole utterance, starting from a clean state"""
+        self.reset()
+        features = self.process(samples)
+        self.reset()
+        return features
+
+
+def _normalize(features):
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    return features / np.maximum(norms, 1e-9)
+
+
+def trim_silence(samples, sample_rate=DEFAULT_SAMPLE_RATE, frame_ms=10, ratio=0.1):
+    """Drop leading and trailing audio quieter than ``ratio`` of the loudest frame"""
+    samples = np.asarray(samples, dtype=np.float32)
+    size = int(sample_rate * frame_ms / 1000)
+    count = len(samples) // size
+    if count == 0:
+        return samples
+    rms = np.sqrt(np.mean(samples[:count * size].reshape(count, size) ** 2, axis=1))
+    loud = np.nonzero(rms >= ratio * rms.max())[0]
+    return samples[loud[0] * size:(loud[-1] + 1) * size]
+
+
+def dtw_score(template, features):
+    """Average per-frame cosine distance of the best alignment of ``template`` inside ``features``"""
+    bank = DtwBank([template])
+    best = np.inf
+    for frame in features:
+        best = min(best, float(bank.step(frame)[0]))
+    return best
+
+
+class DtwBank:
+    """
+    One column of open-begin DTW for each of several templates, stepped together
+
+    Steps: stay on a template frame (slower speech), advance one frame,
+    or skip one (faster speech, paid twice so it is not a shortcut).
+    Templates are padded to the longest, so each input frame costs one
+    matrix product and a few array operations however many there are.
+    """
+
+    def __init__(self, templates):
+        self.lengths = np.array([len(template) for template in templates], dtype=np.intp)
+        width = templates[0].shape[1] if templates else 0
+        self.templates = np.zeros((len(templates), max(self.lengths, default=0), width), dtype=np.float32)
+        for row, template in zip(self.templates, templates):
+            row[:len(template)] = template
+        self._rows = np.arange(len(templates))
+        # Index 1 is the free start before template frame 0, index 0 cannot be reached
+        self._edge = np.tile(np.array([np.inf, 0.0], dtype=np.float32), (len(templates), 1))
+        self._edge_terms = np.zeros((len(templates), 2), dtype=np.float32)
+        self.reset()
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def reset(self):
+        self.cost = np.full(self.templates.shape[:2], np.inf, dtype=np.float32)
+        self.terms = np.zeros(self.templates.shape[:2], dtype=np.float32)
+
+    def step(self, frame):
+        """Consume one input frame; return each template's normalized cost of a full match ending here"""
+        distance = 1.0 - self.templates @ frame.astype(np.float32)
+
+        cost = np.concatenate((self._edge, self.cost), axis=1)
+        terms = np.concatenate((self._edge_terms, self.terms), axis=1)
+        stay, advance, skip = cost[:, 2:], cost[:, 1:-1], cost[:, :-2] + distance
+
+        best = np.minimum(np.minimum(stay, advance), skip)
+        from_skip = (skip <= stay) & (skip <= advance)
+        from_advance = ~from_skip & (advance <= stay)
+
+        prior_terms = np.where(from_skip, terms[:, :-2] + 1, np.where(from_advance, terms[:, 1:-1], terms[:, 2:]))
+        self.cost = best + distance
+        self.terms = prior_terms + 1
+        last = self.lengths - 1
+        return self.cost[self._rows, last] / self.terms[self._rows, last]
+
+
+class WakeWordSpotter:
+    """
+    Streaming keyword spotter for a wake word, or for several people's
+
+    Enroll a few recordings of the wake word, then feed raw 16-bit PCM
+    chunks to ``process`` (or ``attach`` it to a CaptureStream). The
+    ``detected`` event is set whenever the wake word is heard, and
+    ``on_detect(score)``, if set, is called on the same thread.
+    ``detection_sample`` is the stream sample where it ended, for
+    CaptureStream.seek.
+
+    Templates enrolled elsewhere can be added with an ``owner`` and their
+    own threshold; all templates are matched in one DtwBank, and
+    ``detection_owner`` names whose wake word was heard (None for the
+    spotter's own enrollment). With more than one owner, the detection
+    waits OWNER_WINDOW frames past the first crossing and goes to the
+    template that matched best in them, since similar voices cross
+    within a frame or two of each other.
+    """
+
+    def __init__(self, sample_rate=DEFAULT_SAMPLE_RATE, threshold=None):
+        self.sample_rate = sample_rate
+        self.extractor = MfccExtractor(sample_rate)
+        self.templates = []
+        self.owners = []  # per template: who enrolled it, None for the spotter's own
+        self.thresholds = []  # per template: its own threshold, None to follow ``threshold``
+        self.threshold = threshold
+        self.detected = threading.Event()
+        self.on_detect = None
+
+        self._bank = DtwBank([])
+        self._own = np.zeros(0, dtype=bool)
+        self._fixed = np.zeros(0, dtype=np.float32)
+        self._refractory = 0  # frames to ignore after a detection
+        self._window = 0  # frames past a crossing to wait before detecting; 0 detects at once
+        self._deciding = None  # [frames left, best score, its template, its end sample, frames since]
+        self._samples = 0  # stream samples fed to process
+        self._frames = 0  # stream frames fed to process_features
+
+        self.audio_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.detections = 0
+        self.last_score = np.inf
+        self.detection_score = None  # score of the most recent detection
+        self.last_latency = None  # seconds from end of wake word to detection
+        self.detection_sample = None  # stream sample where the most recent wake word ended
+        self.detection_owner = None  # owner of the template that matched it
+
+    @property
+    def enrolled(self):
+        return bool(self.templates)
+
+    def enroll(self, samples):
+        """Add one recording (int16 samples or PhraseFeatures) of the wake word"""
+        features = phrase_features(samples, self.sample_rate)
+        self.templates.append(_normalize(features.mfcc(frames=features.trimmed())))
+        self.owners.append(None)
+        self.thresholds.append(None)
+        self._rebuild()
+        self._calibrate()
+
+    def add(self, templates, threshold, owner):
+        """Match ``templates`` enrolled by another spotter too, at their own ``threshold``, as ``owner``'s"""
+        self.templates.extend(templates)
+        self.owners.extend([owner] * len(templates))
+        self.thresholds.extend([threshold] * len(templates))
+        self._rebuild()
+
+    def _rebuild(self):
+        self._bank = DtwBank(self.templates)
+        self._own = np.array([threshold is None for threshold in self.thresholds], dtype=bool)
+        self._fixed = np.array([threshold or 0.0 for threshold in self.thresholds], dtype=np.float32)
+        self._window = OWNER_WINDOW if len(set(self.owners)) > 1 else 0
+        self._deciding = None
+
+    def _calibrate(self):
+        """Derive the threshold from how well the enrolled samples match each other"""
+        own = [template for template, owner in zip(self.templates, self.owners) if owner is None]
+        if len(own) < 2:
+            if self.threshold is None:
+                self.threshold = DEFAULT_THRESHOLD
+            return
+
+        scores = [dtw_score(a, b) for i, a in enumerate(own) for j, b in enumerate(own) if i != j]
+        self.threshold = float(np.clip(np.max(scores) * THRESHOLD_MARGIN, MIN_THRESHOLD, MAX_THRESHOLD))
+
+    def save(self, path):
+        """Store the spotter's own templates and threshold"""
+        own = [template for template, owner in zip(self.templates, self.owners) if owner is None]
+        arrays = {f"template_{i}": template for i, template in enumerate(own)}
+        np.savez_compressed(path, threshold=np.array(self.threshold), **arrays)
+
+    @classmethod
+    def load(cls, path, sample_rate=DEFAULT_SAMPLE_RATE):
+        """Load templates saved by ``save``; returns an unenrolled spotter if missing"""
+        spotter = cls(sample_rate)
+        if not os.path.exists(path):
+            return spotter
+
+        with np.load(path) as data:
+            spotter.threshold = float(data['threshold'])
+            names = sorted((name for name in data.files if name.startswith('template_')),
+                           key=lambda name: int(name.split('_')[1]))
+            spotter.templates = [data[name] for name in names]
+        spotter.owners = [None] * len(spotter.templates)
+        spotter.thresholds = [None] * len(spotter.templates)
+        spotter._rebuild()
+        return spotter
+
+    def attach(self, source):
+        """Spot the wake word in every chunk captured by a CaptureStream, or in an AudioFrontEnd's features"""
+        if isinstance(source, AudioFrontEnd):
+            source.add_listener(self.process_features)
+        else:
+            source.add_listener(self.process)
+
+    def reset(self):
+        """Clear streaming state and any pending detection"""
+        self.extractor.reset()
+        self._bank.reset()
+        self._refractory = 0
+        self._deciding = None
+        self.detected.clear()
+
+    def wait(self, timeout=None):
+        """Block until the wake word is heard; clears the event before returning"""
+        if self.detected.wait(timeout):
+            self.detected.clear()
+            return True
+        return False
+
+    def process(self, chunk):
+        """Feed raw 16-bit PCM; returns True if the wake word ended in this chunk"""
+        samples = np.frombuffer(chunk, dtype=np.int16)
+        self._samples += len(samples)
+        if not self._bank:
+            return False
+
+        start = time.process_time()
+        features = self.extractor.process(samples)
+        extractor = self.extractor
+        # The last frame ends where the samples still waiting for the next one begin
+        last_end = self._samples - extractor.pending - extractor.hop_length + extractor.frame_length
+        return self._spot(features, start, last_end - (len(features) - 1) * extractor.hop_length)
+
+    def process_features(self, log_mel):
+        """Feed log-mel frames from an AudioFrontEnd; returns True if the wake word ended in them"""
+        first = self._frames
+        self._frames += len(log_mel)
+        if not self._bank:
+            return False
+        first_end = first * self.extractor.hop_length + self.extractor.frame_length
+        return self._spot(self.extractor.cepstra(log_mel), time.process_time(), first_end)
+
+    def _spot(self, features, start, first_end):
+        """Match ``features``; frame 0 ends at stream sample ``first_end``"""
+        features = _normalize(features)
+        hop_seconds = self.extractor.hop_length / self.sample_rate
+        found = False
+        threshold = self.threshold if self.threshold is not None else DEFAULT_THRESHOLD
+        limits = np.where(self._own, threshold, self._fixed)
+
+        for index, frame in enumerate(features):
+            scores = self._bank.step(frame)
+            self.last_score = float(scores.min())
+
+            if self._refractory > 0:
+                self._refractory -= 1
+                continue
+
+            end = first_end + index * self.extractor.hop_length
+            deciding = self._deciding
+            if deciding is None:
+                margins = scores - limits
+                best = int(np.argmin(margins))
+                if margins[best] > 0:
+                    continue
+                deciding = self._deciding = [self._window, float(scores[best]), best, end, 0]
+            else:
+                deciding[0] -= 1
+                deciding[4] += 1
+                best = int(np.argmin(scores))
+                if scores[best] < deciding[1]:
+                    deciding[1:] = [float(scores[best]), best, end, 0]
+            if deciding[0] > 0:
+                continue
+
+            _, score, best, end, waited = deciding
+            found = True
+            self.detections += 1
+            self.detection_score = score
+            self.detection_owner = self.owners[best]
+            self.detection_sample = end
+            # Frames since the best match, and those still waiting in this chunk, plus compute time
+            self.last_latency = (waited + len(features) - 1 - index) * hop_seconds
+            self._refractory = int(self._bank.lengths.max())
+            self._deciding = None
+            self._bank.reset()
+
+        elapsed = time.process_time() - start
+        self.cpu_seconds += elapsed
+        self.audio_seconds += len(features) * hop_seconds
+        if found:
+            self.last_latency += elapsed
+            self.detected.set()
+            if self.on_detect is not None:
+                self.on_detect(self.detection_score)
+        return found
+
+    def stats(self):
+        """Detection count, last latency and CPU seconds per second of audio"""
+        return {
+            'detections': self.detections,
+            'last_latency': self.last_latency,
+            'cpu_per_audio_second': self.cpu_seconds / self.audio_seconds if self.audio_seconds else 0.0,
+        }
+
+
+def strip_wake_word(text, wake_word):
+    """``text`` without a leading wake word, so a one-shot 'computer next' or 'hey jarvis next' is just 'next'"""
+    words = text.split()
+    wake = [word.lower().strip(".,!?") for word in wake_word.split()]
+    if wake and [word.lower().strip(".,!?") for word in words[:len(wake)]] == wake:
+        words = words[len(wake):]
+    return " ".join(words)
+
+
+def record_enrollment(spotter, recognizer, source, wake_word, count=ENROLLMENT_SAMPLES):
+    """Prompt for ``count`` recordings of the wake word and enroll them; False if the input ends first"""
+    import speech_recognition as sr
+
+    print(f"\nWake word enrollment: say '{wake_word}' {count} times, pausing between each.")
+    while len(spotter.templates) < count:
+        print(f"  Sample {len(spotter.templates) + 1} of {count}...")
+        try:
+            audio = source.listen(recognizer, timeout=10, phrase_time_limit=2)
+        except sr.WaitTimeoutError:
+            print("  Timeout - no speech detected. Speak louder or move closer.")
+            continue
+
+        if not audio.frame_data:
+            print(f"Wake word enrollment stopped: input ended after {len(spotter.templates)} of {count} samples.")
+            return False
+
+        raw = audio.get_raw_data(convert_rate=spotter.sample_rate, convert_width=2)
+        spotter.enroll(np.frombuffer(raw, dtype=np.int16))
+
+    print(f"Wake word enrolled (threshold {spotter.threshold:.3f})")
+    return True